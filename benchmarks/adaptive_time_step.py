@@ -0,0 +1,64 @@
+"""Compares daily time steps with a cohort age step schedule.
+
+The simulation in a model specification is run with the cohort age clock,
+once with an empty schedule, which keeps the specification's fixed daily
+step, and once with each schedule below.  The script reports the wall time
+and the number of steps, plus the relative drift in total deaths and DALYs
+from the daily run.
+
+Usage::
+
+    python benchmarks/adaptive_time_step.py /path/to/model_spec.yaml
+
+"""
+import sys
+import time
+
+from vivarium import InteractiveContext
+
+CLOCK_PLUGIN = {
+    'required': {
+        'clock': {
+            'controller': 'vivarium_gates_bep.components.clock.CohortAgeClock',
+            'builder_interface': 'vivarium.framework.time.TimeInterface',
+        }
+    }
+}
+
+DAILY = {'age_start': [], 'step_size': []}
+SCHEDULES = {
+    'weekly after neonatal': {'age_start': [0, 28], 'step_size': [1, 7]},
+    'weekly then monthly': {'age_start': [0, 28, 182], 'step_size': [1, 7, 30]},
+}
+
+
+def run_simulation(model_specification, schedule):
+    start = time.time()
+    sim = InteractiveContext(model_specification, configuration={'time': {'step_schedule': schedule}},
+                             plugin_configuration=CLOCK_PLUGIN)
+    steps = sim.run(with_logging=False)
+    sim.finalize()
+    metrics = sim.report()
+    return time.time() - start, steps, summarize(metrics)
+
+
+def summarize(metrics):
+    deaths = sum(value for key, value in metrics.items() if key.startswith('death_due_to_'))
+    dalys = sum(value for key, value in metrics.items() if key.startswith(('ylls_due_to_', 'ylds_due_to_')))
+    return deaths, dalys
+
+
+def run(model_specification):
+    daily_time, daily_steps, (daily_deaths, daily_dalys) = run_simulation(model_specification, DAILY)
+    print(f'{"daily":<24}{daily_steps:>6} steps {daily_time:9.1f}s  '
+          f'deaths {daily_deaths:10.1f}  DALYs {daily_dalys:12.1f}')
+    for name, schedule in SCHEDULES.items():
+        wall_time, steps, (deaths, dalys) = run_simulation(model_specification, schedule)
+        print(f'{name:<24}{steps:>6} steps {wall_time:9.1f}s  '
+              f'deaths {deaths:10.1f}  DALYs {dalys:12.1f}  '
+              f'speedup {daily_time / wall_time:5.1f}x  '
+              f'drift deaths {deaths / daily_deaths - 1:+.2%} DALYs {dalys / daily_dalys - 1:+.2%}')
+
+
+if __name__ == '__main__':
+    run(sys.argv[1])
@@ -0,0 +1,71 @@
+"""Compares row-wise and array-based continuous LBWSG sampling.
+
+Usage::
+
+    python benchmarks/lbwsg_continuous_sampling.py /path/to/artifact.hdf
+
+"""
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+from vivarium import Artifact
+
+from vivarium_gates_bep import globals as project_globals
+from vivarium_gates_bep.components.lbwsg import (build_categories_by_interval, get_category_edges,
+                                                 convert_to_continuous)
+
+SIZES = [10_000, 100_000, 1_000_000]
+
+
+def convert_to_continuous_by_row(categorical_exposure, categories_by_interval, birth_weight_draw,
+                                 gestation_time_draw):
+    """The original ``DataFrame.apply`` implementation, kept as a reference."""
+    intervals_by_category = categories_by_interval.reset_index().set_index('cat')
+
+    def single_values_from_category(row):
+        idx = row['index']
+        intervals = intervals_by_category.loc[row['cat']]
+        birth_weight = (intervals.birth_weight.left
+                        + birth_weight_draw[idx] * (intervals.birth_weight.right - intervals.birth_weight.left))
+        gestational_age = (intervals.gestation_time.left
+                           + gestation_time_draw[idx] * (intervals.gestation_time.right
+                                                         - intervals.gestation_time.left))
+        return birth_weight, gestational_age
+
+    values = categorical_exposure.reset_index().apply(single_values_from_category, axis=1)
+    return pd.DataFrame(list(values), index=categorical_exposure.index, columns=project_globals.LBWSG_COLUMNS)
+
+
+def run(artifact_path):
+    categories_by_interval = build_categories_by_interval(
+        Artifact(artifact_path).load(project_globals.LBWSG_CATEGORIES)
+    )
+    category_edges = get_category_edges(categories_by_interval)
+    random_state = np.random.RandomState(12345)
+
+    for size in SIZES:
+        index = pd.RangeIndex(size)
+        categorical_exposure = pd.Series(random_state.choice(categories_by_interval.values, size),
+                                         index=index, name='cat')
+        birth_weight_draw = pd.Series(random_state.random_sample(size), index=index)
+        gestation_time_draw = pd.Series(random_state.random_sample(size), index=index)
+
+        start = time.time()
+        by_row = convert_to_continuous_by_row(categorical_exposure, categories_by_interval,
+                                              birth_weight_draw, gestation_time_draw)
+        by_row_time = time.time() - start
+
+        start = time.time()
+        by_array = convert_to_continuous(categorical_exposure, category_edges,
+                                         birth_weight_draw, gestation_time_draw)
+        by_array_time = time.time() - start
+
+        assert np.array_equal(by_row.values, by_array.values), 'Array sampler is not bit-identical.'
+        print(f'n={size:>9,}  row-wise {by_row_time:8.3f}s  array {by_array_time:8.4f}s  '
+              f'speedup {by_row_time / by_array_time:8.1f}x')
+
+
+if __name__ == '__main__':
+    run(sys.argv[1])
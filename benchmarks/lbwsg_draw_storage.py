@@ -0,0 +1,79 @@
+"""Compares the per-node and chunked storage layouts for draw level data.
+
+Each LBWSG draw level table is read out of an existing artifact, which uses
+the per-node layout. It is then rewritten in both layouts to temporary
+files. The script reports file size and the time to load single draws
+from each layout.
+
+Usage::
+
+    python benchmarks/lbwsg_draw_storage.py /path/to/artifact.hdf
+
+"""
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from vivarium_gates_bep import globals as project_globals
+from vivarium_gates_bep.data.draws import write_draws, read_draw
+
+KEYS = [project_globals.LBWSG_EXPOSURE, project_globals.LBWSG_RELATIVE_RISK, project_globals.LBWSG_PAF]
+DRAWS = [0, 21, 500, 999]
+
+
+def read_all_draws(path, key):
+    key_path = key.replace('.', '/')
+    with pd.HDFStore(str(path), mode='r') as store:
+        index = pd.MultiIndex.from_frame(store.get(f'{key_path}/index'))
+        draws = sorted((node._v_name for node in store.get_node(key_path) if node._v_name.startswith('draw_')),
+                       key=lambda name: int(name.split('_')[-1]))
+        data = pd.DataFrame({draw: store.get(f'{key_path}/{draw}').values for draw in draws}, index=index)
+    return data
+
+
+def write_by_node(path, key, data):
+    """The original ``write_data_by_draw`` layout, kept as a reference."""
+    key_path = key.replace('.', '/')
+    with pd.HDFStore(str(path), complevel=9, mode='a') as store:
+        store.put(f'{key_path}/index', data.index.to_frame(index=False))
+        data = data.reset_index(drop=True)
+        for c in data.columns:
+            store.put(f'{key_path}/{c}', data[c])
+
+
+def time_reads(path, key, draws):
+    start = time.time()
+    for draw in draws:
+        read_draw(path, key, draw)
+    return (time.time() - start) / len(draws)
+
+
+def run(artifact_path):
+    with tempfile.TemporaryDirectory() as tmp:
+        by_node_path = Path(tmp) / 'by_node.hdf'
+        chunked_path = Path(tmp) / 'chunked.hdf'
+        for key in KEYS:
+            data = read_all_draws(artifact_path, key)
+            draws = [d for d in DRAWS if f'draw_{d}' in data.columns]
+            write_by_node(by_node_path, key, data)
+            write_draws(chunked_path, key, data)
+
+            by_node_time = time_reads(by_node_path, key, draws)
+            chunked_time = time_reads(chunked_path, key, draws)
+            error = max(np.abs(read_draw(by_node_path, key, d).value - read_draw(chunked_path, key, d).value).max()
+                        for d in draws)
+            print(f'{key}\n'
+                  f'    {data.shape[0]:,} rows x {data.shape[1]:,} draws, max float32 error {error:.2e}\n'
+                  f'    per-node {by_node_time:8.4f}s / draw   chunked {chunked_time:8.4f}s / draw   '
+                  f'speedup {by_node_time / chunked_time:6.1f}x')
+
+        print(f'file size: per-node {by_node_path.stat().st_size / 2**20:8.1f} MB   '
+              f'chunked {chunked_path.stat().st_size / 2**20:8.1f} MB')
+
+
+if __name__ == '__main__':
+    run(sys.argv[1])
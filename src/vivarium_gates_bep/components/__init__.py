@@ -3,7 +3,7 @@ from .observers import (MortalityObserver, DisabilityObserver,
                         DiseaseObserver, ChildGrowthFailureObserver, LBWSGObserver)
 from .lbwsg import LBWSGRisk, LBWSGRiskEffect
 from .maternal_malnutrition import MaternalMalnutrition, MaternalMalnutritionRiskEffect
-from .disease import SIR_fixed_duration, SIS, NeonatalSIS
+from .disease import SIR_fixed_duration, SIS, NeonatalSIS, DiseaseTransitionEngine
 from .treatment import MaternalSupplementationCoverage, MaternalSupplementationEffect
 from .mortality import Mortality
 from .correlated_risk import BirthweightCorrelatedRisk
@@ -0,0 +1,139 @@
+"""
+=====================
+Cohort Age Step Clock
+=====================
+
+The simulation follows a single birth cohort, so the cohort's age is the time
+since the simulation started.  Fine time steps only matter while the cohort
+is young, so this clock takes its step size from a schedule keyed to cohort
+age, e.g. daily through the neonatal period and monthly after that.
+
+Steps are stretched or shrunk so they land on the observer age bin edges,
+the CGF record points and the end of the simulation.  Each stretch between
+two of these boundaries is split into equal steps close to the scheduled
+size.  Steps are whole seconds and aim half a second past each boundary, so
+simulant ages, which are sums of step sizes in years, cross a boundary
+rather than stopping just short of it.
+
+The clock is a vivarium plugin and replaces the default clock with::
+
+    plugins:
+        required:
+            clock:
+                controller: "vivarium_gates_bep.components.clock.CohortAgeClock"
+                builder_interface: "vivarium.framework.time.TimeInterface"
+
+With an empty schedule it behaves like the default date-time clock.
+Otherwise the schedule sets every step, including those of an interactive
+simulation stepped with an explicit step size.
+
+"""
+from typing import List, Sequence
+
+import numpy as np
+import pandas as pd
+from vivarium.framework.time import DateTimeClock
+
+from vivarium_gates_bep import globals as project_globals
+from vivarium_gates_bep.components.observers import get_age_bins
+
+DAYS_PER_YEAR = 365.25
+SECOND = 1 / 86400  # Days
+
+
+class CohortAgeClock(DateTimeClock):
+    """A date-time clock with steps scheduled by cohort age."""
+
+    configuration_defaults = {
+        'time': {
+            'start': {
+                'year': 2005,
+                'month': 7,
+                'day': 2
+            },
+            'end': {
+                'year': 2010,
+                'month': 7,
+                'day': 2,
+            },
+            'step_size': 1,  # Days
+            'step_schedule': {
+                'age_start': [],  # Days
+                'step_size': [],  # Days
+            },
+        }
+    }
+
+    @property
+    def name(self):
+        return "cohort_age_clock"
+
+    def setup(self, builder):
+        super().setup(builder)
+        self._start_time = self._time
+        schedule = builder.configuration.time.step_schedule
+        duration = (self._stop_time - self._start_time).total_seconds() / 86400
+        self.schedule = StepSchedule(schedule.age_start, schedule.step_size, get_step_boundaries(duration))
+        self._scheduled_step = (None, None)
+
+    @property
+    def step_size(self) -> pd.Timedelta:
+        """The size of the next time step, set by the cohort age now."""
+        if not self.schedule:
+            return super().step_size
+        if self._time < self._start_time:
+            # Simulants are created a step before the start.
+            return self._start_time - self._time
+        time, step_size = self._scheduled_step
+        if time != self._time:
+            cohort_age = (self._time - self._start_time).total_seconds() / 86400
+            step_size = self.schedule.get_step_size(cohort_age)
+            self._scheduled_step = (self._time, step_size)
+        return step_size
+
+    def __repr__(self):
+        return "CohortAgeClock()"
+
+
+class StepSchedule:
+    """Step sizes by cohort age, aligned to a set of boundary ages.
+
+    The step size is set by the age at the start of the step.  All ages and
+    step sizes are in days.
+    """
+
+    def __init__(self, age_start: Sequence[float], step_size: Sequence[float], boundaries: Sequence[float]):
+        if len(age_start) != len(step_size):
+            raise ValueError('The step schedule needs a step size for each age start.')
+        if len(age_start) and (age_start[0] != 0 or np.any(np.diff(age_start) <= 0)):
+            raise ValueError('Step schedule age starts must increase from 0.')
+        if np.any(np.asarray(step_size) <= 0):
+            raise ValueError('Step schedule step sizes must be positive.')
+        self.age_start = np.asarray(age_start, dtype=float)
+        self.step_size = np.asarray(step_size, dtype=float)
+        self.targets = np.unique(np.asarray(boundaries, dtype=float)) + SECOND / 2
+
+    def __bool__(self):
+        return bool(len(self.age_start))
+
+    def get_step_size(self, cohort_age: float) -> pd.Timedelta:
+        """The step to take from ``cohort_age``."""
+        scheduled = self.step_size[np.searchsorted(self.age_start, cohort_age, side='right') - 1]
+        upcoming = self.targets[self.targets > cohort_age + SECOND / 4]
+        if len(upcoming):
+            remaining = upcoming[0] - cohort_age
+            scheduled = remaining / max(1, np.round(remaining / scheduled))
+        return pd.Timedelta(days=scheduled).ceil('s')
+
+
+def get_step_boundaries(duration: float) -> List[float]:
+    """The cohort ages in days that steps must land on.
+
+    These are the observer age bin edges, the CGF record points and the end
+    of a simulation lasting ``duration`` days.
+    """
+    age_bins = get_age_bins()
+    edges = set(age_bins.age_start) | set(age_bins.age_end)
+    edges |= {project_globals.TWENTY_NINE_DAYS, project_globals.THREE_SIX_SIX_DAYS}
+    edges = [edge * DAYS_PER_YEAR for edge in edges]
+    return sorted([edge for edge in edges if 0 < edge < duration] + [duration])
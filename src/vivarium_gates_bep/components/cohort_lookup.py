@@ -0,0 +1,99 @@
+"""
+=====================
+Cohort Lookup Tables
+=====================
+
+The simulation follows a single birth cohort: everyone is created with the
+same age at the same time and ages in lockstep, so on any time step the
+living simulants share one age and year and differ only by sex.  A vivarium
+lookup table still interpolates every simulant's (sex, age, year) row on
+every call.
+
+``CohortLookupTable`` is an order 0 lookup table that first finds the
+distinct demographic keys in the query.  When there are only a few, each
+table row is interpolated once per key and broadcast back to the simulants
+with a take.  Queries with more keys than that, as in a population with
+mixed ages, fall back to interpolating every simulant.
+
+"""
+from typing import Sequence, Union
+
+import numpy as np
+import pandas as pd
+from vivarium.interpolation import Interpolation
+
+DEFAULT_MAX_KEYS = 16
+
+
+class CohortLookupTable:
+    """An order 0 lookup table evaluated once per distinct demographic key.
+
+    Called with an index, it returns a Series if the data has one value
+    column and a DataFrame otherwise, like a vivarium lookup table.
+
+    Attributes
+    ----------
+    cohort_calls
+        The number of calls interpolated once per key.
+    fallback_calls
+        The number of calls with too many keys, interpolated per simulant.
+    """
+
+    def __init__(self, builder, data: pd.DataFrame, key_columns: Sequence[str] = (),
+                 parameter_columns: Sequence[str] = (), max_keys: int = DEFAULT_MAX_KEYS):
+        if builder.configuration.interpolation.order != 0:
+            raise ValueError('Cohort lookup tables require order 0 interpolation.')
+        self.key_columns = list(key_columns)
+        self.parameter_columns = list(parameter_columns)
+        self.max_keys = max_keys
+        self.interpolation = Interpolation(data, self.key_columns,
+                                           [(p, f'{p}_start', f'{p}_end') for p in self.parameter_columns],
+                                           order=0, extrapolate=builder.configuration.interpolation.extrapolate)
+        # Including tracked in the view keeps untracked simulants in the query.
+        self.view_columns = sorted(set(self.key_columns + self.parameter_columns) - {'year'})
+        self.population_view = builder.population.get_view(self.view_columns + ['tracked'])
+        self.clock = builder.time.clock()
+        self.cohort_calls = 0
+        self.fallback_calls = 0
+
+    def __call__(self, index: pd.Index) -> Union[pd.Series, pd.DataFrame]:
+        pop = self.population_view.get(index)[self.view_columns]
+        if 'year' in self.parameter_columns:
+            current_time = self.clock()
+            pop['year'] = current_time.year + current_time.timetuple().tm_yday / 365.25
+        values = self.interpolate(pop)
+        if len(values.columns) == 1:
+            return values[values.columns[0]]
+        return values
+
+    def interpolate(self, pop: pd.DataFrame) -> pd.DataFrame:
+        """Interpolates the table for each row of ``pop``."""
+        key_index, first = get_distinct_keys(pop, self.max_keys)
+        if key_index is None:
+            self.fallback_calls += 1
+            return self.interpolation(pop)
+        self.cohort_calls += 1
+        values = self.interpolation(pop.iloc[first])
+        return pd.DataFrame(values.values[key_index], index=pop.index, columns=values.columns)
+
+
+def get_distinct_keys(data: pd.DataFrame, max_keys: int):
+    """Finds the distinct rows of ``data`` if there are at most ``max_keys``.
+
+    Returns
+    -------
+        The position of each row's key among the distinct keys and the
+        position of the first row with each key, or ``(None, None)`` if
+        there are more than ``max_keys`` keys.
+    """
+    combined = np.zeros(len(data), dtype=np.int64)
+    for column in data.columns:
+        codes, uniques = pd.factorize(data[column])
+        if len(uniques) > max_keys:
+            return None, None
+        # Missing values have code -1, so codes are shifted to start at 0.
+        combined = combined * (len(uniques) + 1) + codes + 1
+    keys, first, key_index = np.unique(combined, return_index=True, return_inverse=True)
+    if len(keys) > max_keys:
+        return None, None
+    return key_index, first
@@ -9,34 +9,44 @@ based on birthweight. It works in concert with an extension to the
 LBWSG code in this project
 
 """
-import scipy
+
 import numpy as np
 import pandas as pd
+from loguru import logger
+from scipy.special import ndtr, ndtri
 
-from vivarium.framework.randomness import get_hash
 from vivarium_public_health.risks import Risk
-from vivarium_public_health.risks.data_transformations import get_exposure_post_processor
+from vivarium_public_health.risks.data_transformations import get_exposure_post_processor, pivot_categorical
 
 from vivarium_gates_bep import globals as project_globals
-from vivarium_gates_bep.utilites import sample_truncnorm
-
-
-CORRELATION_VALUES = {
-    # sample from truncated normal distribution created with the following parameters
-    # mean, lower_bound, upper_bound, clip_lower, clip_upper
-    'child_wasting': (0.308, 0.263, 0.351, 0.2, 0.4),
-    'child_stunting': (0.394, 0.353, 0.433, 0.3, 0.5)
-}
+from vivarium_gates_bep.components.cohort_lookup import CohortLookupTable
+from vivarium_gates_bep.components.ensemble_ppf import (DEFAULT_TOLERANCE, get_accuracy_report,
+                                                        get_ensemble_quantile_function)
+from vivarium_gates_bep.components.state_table import get_state_table_schema
+from vivarium_gates_bep.data import parameters
+from vivarium_gates_bep.utilites import get_shared
 
 
 class BirthweightCorrelatedRisk(Risk):
 
     def __init__(self, risk: str):
         super().__init__(risk)
+        risk_defaults = self.configuration_defaults.get(self.risk.name, {})
+        self.configuration_defaults = {
+            **self.configuration_defaults,
+            self.risk.name: {**risk_defaults, 'ppf_tolerance': DEFAULT_TOLERANCE},
+        }
 
     def setup(self, builder):
         self.randomness = builder.randomness.get_stream(f'initial_{self.risk.name}_propensity')
 
+        # Exposure is read from tabulated quantile functions, one for each
+        # combination of parameter and weight rows, built as they are needed.
+        self.ppf_tolerance = builder.configuration[self.risk.name].ppf_tolerance
+        self.exposure_parameters, self.exposure_parameter_row = self.load_exposure_parameters(builder)
+        self.exposure_weights, self.exposure_weight_row = self.load_exposure_weights(builder)
+        self.quantile_functions = {}
+
         self.propensity_col = f'{self.risk.name}_propensity'
         birth_weight_propensity_col = project_globals.BIRTH_WEIGHT_PROPENSITY
         self.propensity = builder.value.register_value_producer(
@@ -44,56 +54,188 @@ class BirthweightCorrelatedRisk(Risk):
             source=lambda index: self.population_view.get(index)[self.propensity_col],
             requires_columns=[self.propensity_col])
 
+        # A simulant's propensity is fixed, so their exposure only changes when
+        # they move to a new exposure parameter row.  Modifiers that depend
+        # only on characteristics fixed per simulant and on the exposure
+        # parameter age group modify the static exposure, which is cached per
+        # simulant and refreshed on a change of row.  Other modifiers modify
+        # the exposure and are applied on every read.
+        self.static_exposure = builder.value.register_value_producer(
+            f'{self.risk.name}.static_exposure',
+            source=self.get_current_exposure,
+            requires_columns=['age', 'sex'],
+            requires_values=[f'{self.risk.name}.propensity']
+        )
         self.exposure = builder.value.register_value_producer(
             f'{self.risk.name}.exposure',
-            source=self.get_current_exposure,
+            source=self.get_cached_exposure,
             requires_columns=['age', 'sex'],
-            requires_values=[f'{self.risk.name}.propensity'],
+            requires_values=[f'{self.risk.name}.static_exposure'],
             preferred_post_processor=get_exposure_post_processor(builder, self.risk)
         )
+        self.cached_row = np.empty(0, dtype=int)
+        self.cached_exposure = np.empty(0)
 
+        correlation = parameters.get_draw_parameters(builder)[parameters.get_correlation_parameter(self.risk.name)]
+        self.propensity_engine = get_correlated_propensity_engine(builder)
+        self.propensity_engine.register(self.risk.name, correlation, self.randomness)
+
+        self.schema = get_state_table_schema(builder)
         self.population_view = builder.population.get_view([self.propensity_col, birth_weight_propensity_col])
         builder.population.initializes_simulants(self.on_initialize_simulants,
                                                  creates_columns=[self.propensity_col],
                                                  requires_columns=[birth_weight_propensity_col],
                                                  requires_streams=[f'initial_{self.risk.name}_propensity'])
+        builder.event.register_listener('simulation_end', self.on_simulation_end)
 
     def on_initialize_simulants(self, pop_data):
-        """
-        Abie supplied the method.
-
-        Use BW percentile and specified correlation to find HAZ and WHZ percentiles
-
-        1.) probit transform birth weight percentile to get birth weight normal
-
-        2.) sample conditional bivariate normal for HAZ normal (conditional on BW normal, with specified correlation)
-
-        3.) inverse probit transform HAZ normal to get HAZ percentile (aka "propensity")
-
-        Repeat (2) and (3) for WHZ.
-        """
-        key = get_hash(f'{self.risk.name}_draw')
-        corr_val = get_cgf_correlation_value(key, CORRELATION_VALUES[self.risk.name])
-
-        bw_propensity = self.population_view.subview([project_globals.BIRTH_WEIGHT_PROPENSITY]).get(pop_data.index)
-        bw_probit = scipy.stats.norm.ppf(bw_propensity)[:,0]
-
-        draw = self.randomness.get_draw(pop_data.index)
-        target_probit = conditional_bivariate_normal(draw, bw_probit, corr_val)
-        correlated_propensity = scipy.stats.norm.cdf(target_probit)
-        self.population_view.update(pd.DataFrame({
-                self.propensity_col: correlated_propensity,
-            }, index=pop_data.index))
-
-
-def conditional_bivariate_normal(draw, a, rho):
-    # https://en.wikipedia.org/wiki/Multivariate_normal_distribution#Bivariate_case_2
-    # with mu1 = mu2 = 0 and sigma1 = sigma2 = 1
-    norm = scipy.stats.norm(rho*a, np.sqrt((1-rho**2)))
-    return norm.ppf(draw)
-
-
-def get_cgf_correlation_value(seed, args):
-    mean, lower_bound, upper_bound, clip_lower, clip_upper = args
-    std = project_globals.confidence_interval_std(upper_bound, lower_bound)
-    return sample_truncnorm(seed, mean, std, clip_lower, clip_upper)
+        self.population_view.update(self.schema.apply(pd.DataFrame({
+            self.propensity_col: self.propensity_engine.get_propensity(self.risk.name, pop_data.index),
+        }, index=pop_data.index)))
+
+    def on_simulation_end(self, event):
+        report = get_accuracy_report(self.quantile_functions.values())
+        logger.debug(f'{self.risk.name} tabulated quantile functions:\n{report}')
+
+    def get_cached_exposure(self, index):
+        rows = self.get_exposure_rows(index)
+        positions = index.values
+        if len(index) and positions.max() >= len(self.cached_row):
+            size = max(positions.max() + 1, 2 * len(self.cached_row))
+            self.cached_row = np.append(self.cached_row, np.full(size - len(self.cached_row), -1))
+            self.cached_exposure = np.append(self.cached_exposure, np.zeros(size - len(self.cached_exposure)))
+        stale = self.cached_row[positions] != rows
+        if stale.any():
+            self.cached_exposure[positions[stale]] = self.static_exposure(index[stale]).values
+            self.cached_row[positions[stale]] = rows[stale]
+        return pd.Series(self.cached_exposure[positions], index=index)
+
+    def get_current_exposure(self, index):
+        propensity = self.propensity(index).values
+        rows, row_index = np.unique(self.get_exposure_rows(index), return_inverse=True)
+        exposure = np.zeros(len(index))
+        for i, row in enumerate(rows):
+            in_row = row_index == i
+            quantile_function = self.get_quantile_function(*divmod(row, len(self.exposure_weights)))
+            exposure[in_row] = quantile_function(propensity[in_row])
+        return pd.Series(exposure, index=index)
+
+    def get_exposure_rows(self, index):
+        """Returns a code for each simulant's exposure parameter and weight rows."""
+        parameter_row = self.exposure_parameter_row(index).values.astype(int)
+        weight_row = self.exposure_weight_row(index).values.astype(int)
+        return parameter_row * len(self.exposure_weights) + weight_row
+
+    def get_quantile_function(self, parameter_row, weight_row):
+        if (parameter_row, weight_row) not in self.quantile_functions:
+            mean, sd = self.exposure_parameters.iloc[parameter_row]
+            if mean == 0 or np.isnan(mean):
+                # The ensemble is undefined here and its ppf is filled with 0.
+                quantile_function = np.zeros_like
+            else:
+                quantile_function = get_ensemble_quantile_function(self.exposure_weights.iloc[weight_row],
+                                                                   mean, sd, self.ppf_tolerance)
+            self.quantile_functions[(parameter_row, weight_row)] = quantile_function
+        return self.quantile_functions[(parameter_row, weight_row)]
+
+    def load_exposure_parameters(self, builder):
+        index_columns = ['sex', 'age_start', 'age_end', 'year_start', 'year_end']
+        mean = builder.data.load(f'{self.risk}.exposure').set_index(index_columns).value
+        sd = builder.data.load(f'{self.risk}.exposure_standard_deviation').set_index(index_columns).value
+        parameters = pd.DataFrame({'mean': mean, 'sd': sd}).reset_index()
+        return parameters[['mean', 'sd']], build_row_table(builder, parameters[index_columns])
+
+    def load_exposure_weights(self, builder):
+        index_columns = ['sex', 'age_start', 'age_end', 'year_start', 'year_end']
+        weights = pivot_categorical(builder.data.load(f'{self.risk}.exposure_distribution_weights'))
+        if 'glnorm' in weights.columns:
+            if np.any(weights['glnorm']):
+                raise NotImplementedError('glnorm distribution is not supported')
+            weights = weights.drop(columns='glnorm')
+        distributions = [c for c in weights.columns if c not in index_columns]
+        return weights[distributions], build_row_table(builder, weights[index_columns])
+
+
+def build_row_table(builder, data):
+    """Builds a lookup table that returns the position of each simulant's row in ``data``.
+
+    With order 0 interpolation the row number comes back unchanged, so it can
+    be used to index parameters held outside the lookup table.
+    """
+    if builder.configuration.interpolation.order != 0:
+        raise ValueError('Row lookup tables require order 0 interpolation.')
+    rows = data.reset_index(drop=True).assign(value=np.arange(len(data), dtype=float))
+    return CohortLookupTable(builder, rows, key_columns=['sex'], parameter_columns=['age', 'year'])
+
+
+# The engine is shared by all the correlated risks in a simulation.
+def get_correlated_propensity_engine(builder) -> 'CorrelatedPropensityEngine':
+    return get_shared(builder, CorrelatedPropensityEngine)
+
+
+class CorrelatedPropensityEngine:
+    """Generates the propensities of every birth weight correlated risk at once.
+
+    Abie supplied the method.
+
+    Use BW percentile and specified correlation to find HAZ and WHZ percentiles
+
+    1.) probit transform birth weight percentile to get birth weight normal
+
+    2.) sample conditional bivariate normal for HAZ normal (conditional on BW normal, with specified correlation)
+
+    3.) inverse probit transform HAZ normal to get HAZ percentile (aka "propensity")
+
+    Repeat (2) and (3) for WHZ.
+
+    The risks are conditionally independent given birth weight, so the joint
+    correlation of the birth weight normal and the risk normals is
+    ``C[0, i] = rho_i`` and ``C[i, j] = rho_i * rho_j``.  Multiplying a
+    standard birth weight normal and independent risk normals by the Cholesky
+    factor of ``C`` samples all of the conditional normals in step 2 in one
+    pass.  The first risk to initialize a group of simulants generates the
+    propensities for all of them and the others take theirs from the batch.
+    """
+
+    def __init__(self, builder):
+        self.risks = []
+        self.correlations = []
+        self.randomness = []
+        self.cholesky_factor = np.eye(1)
+        self.population_view = builder.population.get_view([project_globals.BIRTH_WEIGHT_PROPENSITY])
+
+        self._index = None
+        self._batch = {}
+
+    def register(self, risk: str, correlation: float, randomness):
+        self.risks.append(risk)
+        self.correlations.append(correlation)
+        self.randomness.append(randomness)
+        self.cholesky_factor = get_cholesky_factor(np.array(self.correlations))
+
+    def get_propensity(self, risk: str, index: pd.Index) -> np.ndarray:
+        if risk not in self._batch or not self._index.equals(index):
+            self._index = index
+            self._batch = dict(zip(self.risks, self.generate_propensities(index).T))
+        return self._batch.pop(risk)
+
+    def generate_propensities(self, index: pd.Index) -> np.ndarray:
+        bw_propensity = self.population_view.get(index)[project_globals.BIRTH_WEIGHT_PROPENSITY].values
+        normals = np.empty((len(index), len(self.risks) + 1))
+        normals[:, 0] = ndtri(bw_propensity)
+        for i, randomness in enumerate(self.randomness, start=1):
+            normals[:, i] = ndtri(randomness.get_draw(index).values)
+        return ndtr(normals @ self.cholesky_factor[1:].T)
+
+
+def get_cholesky_factor(correlations: np.ndarray) -> np.ndarray:
+    """Cholesky factor of the correlation of birth weight and the risks.
+
+    The first row and column are birth weight.  Each risk has the given
+    correlation with birth weight and the risks are conditionally
+    independent given birth weight.
+    """
+    correlations = np.append(1, correlations)
+    correlation_matrix = np.outer(correlations, correlations)
+    np.fill_diagonal(correlation_matrix, 1)
+    return np.linalg.cholesky(correlation_matrix)
@@ -1,3 +1,4 @@
+import numpy as np
 import pandas as pd
 from vivarium_public_health.disease import (DiseaseModel as DiseaseModel_, SusceptibleState,
                                             DiseaseState, RecoveredState)
@@ -5,13 +6,25 @@ from vivarium_public_health.disease import (DiseaseModel as DiseaseModel_, Susce
 
 class DiseaseModel(DiseaseModel_):
 
+    def setup(self, builder):
+        super().setup(builder)
+        engines = builder.components.get_components_by_type(DiseaseTransitionEngine)
+        self.transition_engine = engines[0] if engines else None
+
+    def on_time_step(self, event):
+        # The base model's setup registers this listener and vivarium has no
+        # way to remove a listener, so the model's own pass is skipped here
+        # when a transition engine makes its transitions.
+        if self.transition_engine is None:
+            super().on_time_step(event)
+
     def on_initialize_simulants(self, pop_data):
         population = self.population_view.subview(['age', 'sex']).get(pop_data.index)
         state_names, weights_bins = self.get_state_weights(pop_data.index, "birth_prevalence")
 
         if state_names and not population.empty:
             # only do this if there are states in the model that supply prevalence data
-            population['sex_id'] = population.sex.apply({'Male': 1, 'Female': 2}.get)
+            population['sex_id'] = population.sex.map({'Male': 1, 'Female': 2}).astype(int)
 
             condition_column = self.assign_initial_status_to_simulants(population, state_names, weights_bins,
                                                                        self.randomness.get_draw(population.index))
@@ -66,3 +79,157 @@ def NeonatalSIS(cause):
     # Looks like we want to skip this chunk of the default implementation:
     #   NotImplementedError('We do not currently support an age 0 cohort. '
     return DiseaseModel(cause, states=[healthy, with_condition])
+
+
+class DiseaseTransitionEngine:
+    """Makes the time step transitions of every disease model at once.
+
+    Each disease model used to make its own pass on every time step.  It read
+    its state column, then went state by state: evaluate the transition
+    probabilities, choose the new states and write the state column and the
+    event time and count columns of the new states.  The engine reads all
+    models' columns once.  It stacks the transition probabilities and random
+    draws of every model into ``(simulants, models, outputs)`` and
+    ``(simulants, models)`` arrays and chooses every transition at once.
+    All the changes go back in a single state table write.
+
+    The engine is added to the model specification alongside the disease
+    models.  It transitions every ``DiseaseModel`` in the simulation, and
+    those models skip their own pass when it is present.
+
+    Each state's transitions keep their own probability pipelines and
+    randomness stream, and the choice is made as ``RandomnessStream.choice``
+    makes it, so the transitions are the same as the models' own.  All the
+    probabilities are evaluated before any state changes.  That matches the
+    models' own sequential passes as long as no disease's transition rates
+    depend on another disease's state, which holds for the models here.
+    """
+
+    @property
+    def name(self):
+        return 'disease_transition_engine'
+
+    def setup(self, builder):
+        self.models = builder.components.get_components_by_type(DiseaseModel)
+        columns = []
+        for model in self.models:
+            columns.append(model.state_column)
+            for state in model.states:
+                columns += [state.event_time_column, state.event_count_column]
+        self.population_view = builder.population.get_view(columns)
+        builder.event.register_listener('time_step', self.on_time_step)
+
+    def on_time_step(self, event):
+        pop = self.population_view.get(event.index)
+        blocks = []
+        for position, model in enumerate(self.models):
+            model_states = pop[model.state_column].values
+            for state in model.states:
+                if not len(state.transition_set):
+                    continue
+                index = _get_eligible_index(state, pop.index[model_states == state.state_id], event.time)
+                if index.empty:
+                    continue
+                outputs, probabilities = _get_transition_probabilities(state.transition_set, index)
+                blocks.append((position, model, outputs, pop.index.get_indexer(index), probabilities,
+                               state.transition_set.random.get_draw(index).values))
+        if not blocks:
+            return
+
+        probabilities = np.zeros((len(pop), len(self.models), max(len(block[2]) for block in blocks)))
+        draws = np.zeros((len(pop), len(self.models)))
+        for position, _, outputs, rows, block_probabilities, block_draws in blocks:
+            probabilities[rows, position, :len(outputs)] = block_probabilities
+            draws[rows, position] = block_draws
+        choices = choose_outputs(probabilities, draws)
+
+        update = {}
+        for position, model, outputs, rows, _, _ in blocks:
+            choice = np.minimum(choices[rows, position], len(outputs) - 1)
+            for i, output in enumerate(outputs):
+                if output == 'null_transition':
+                    continue
+                transitioned = rows[choice == i]
+                if not len(transitioned):
+                    continue
+                for column in [model.state_column, output.event_time_column, output.event_count_column]:
+                    if column not in update:
+                        update[column] = pop[column].values.copy()
+                update[model.state_column][transitioned] = output.state_id
+                update[output.event_time_column][transitioned] = event.time
+                update[output.event_count_column][transitioned] += 1
+        if update:
+            self.population_view.update(pd.DataFrame(update, index=pop.index))
+
+
+# The engine makes each state's transition decisions itself, so it repeats two
+# steps that vivarium_public_health and vivarium only implement privately:
+# ``DiseaseState.next_state`` filters simulants by dwell time before choosing,
+# and ``TransitionSet.choose_new_state`` normalizes the probabilities and adds
+# the null transition.  tests/test_disease.py checks the engine against the
+# models' own transitions.
+
+def _get_eligible_index(state, index: pd.Index, event_time: pd.Timestamp) -> pd.Index:
+    """The simulants in ``index`` who can leave ``state``, as ``DiseaseState.next_state`` finds them."""
+    if not isinstance(state, DiseaseState):
+        return index
+    dwell_time = state.dwell_time(index)
+    if not np.any(dwell_time > 0):
+        return index
+    population = state.population_view.get(index, query='alive == "alive"')
+    exit_time = population[state.event_time_column] + pd.to_timedelta(dwell_time, unit='D')
+    return population.loc[exit_time <= event_time].index
+
+
+def _get_transition_probabilities(transition_set, index: pd.Index):
+    """The outputs and choice weights of a transition set, as ``TransitionSet.choose_new_state`` finds them.
+
+    A transition with probability 1 is a default, scaled down to share with
+    the others.  With a null transition, the weights are topped up to 1 with
+    it; without one, they are rescaled to sum to 1.
+    """
+    outputs, probabilities = zip(*[(transition.output_state, np.array(transition.probability(index)))
+                                   for transition in transition_set])
+    outputs, probabilities = list(outputs), np.transpose(probabilities).astype(float)
+
+    default_count = np.sum(probabilities == 1, axis=1)
+    if np.any(default_count > 1):
+        raise ValueError('Multiple transitions specified with probability 1.')
+    has_default = default_count == 1
+    total = np.sum(probabilities, axis=1)
+    probabilities[has_default] /= total[has_default, np.newaxis]
+
+    total = np.sum(probabilities, axis=1)
+    if transition_set.allow_null_transition:
+        if np.any(total > 1 + 1e-08):
+            raise ValueError(f'Null transition requested with un-normalized probability weights: {probabilities}')
+        total[total > 1] = 1
+        probabilities = np.concatenate([probabilities, (1 - total)[:, np.newaxis]], axis=1)
+        outputs.append('null_transition')
+    else:
+        if np.any(total == 0):
+            raise ValueError('No valid transitions for some simulants.')
+        probabilities /= total[:, np.newaxis]
+    return outputs, probabilities
+
+
+def choose_outputs(probabilities: np.ndarray, draws: np.ndarray) -> np.ndarray:
+    """Chooses an output for every simulant and model from uniform draws.
+
+    Parameters
+    ----------
+    probabilities
+        Output weights shaped ``(simulants, models, outputs)``.  Models with
+        fewer outputs are padded with zeros, and all-zero rows get output 0.
+    draws
+        Uniform draws shaped ``(simulants, models)``.
+
+    Returns
+    -------
+        The position of the chosen output, selected as
+        ``RandomnessStream.choice`` selects it.
+
+    """
+    with np.errstate(divide='ignore', invalid='ignore'):
+        probabilities = probabilities / probabilities.sum(axis=2, keepdims=True)
+    return (draws[..., np.newaxis] > np.cumsum(probabilities, axis=2)).sum(axis=2)
@@ -0,0 +1,126 @@
+"""
+============================
+Tabulated Ensemble Quantiles
+============================
+
+The ensemble distributions used for child growth failure exposure evaluate
+the quantile function as a weighted sum of the quantile functions of many
+scipy distributions, which is slow to do for every simulant on every pipeline
+read.  The parameters are constant within an (age group, sex, year) row, so
+each row's quantile function is tabulated once on a propensity grid and
+interpolated after that.
+
+The grid is uniform in probit space over the clipped propensity range and is
+refined until interpolation at the midpoints of the grid is within the
+tolerance of the exact quantile function.  This is a heuristic, not an error
+bound: the error is only measured at the midpoints.  Tables are built on
+first use and shared across the process.
+
+"""
+from typing import Callable, Dict, Iterable, Tuple
+
+import numpy as np
+import pandas as pd
+from loguru import logger
+from risk_distributions import EnsembleDistribution
+from scipy.interpolate import PchipInterpolator
+from scipy.special import ndtr, ndtri
+from vivarium.framework.randomness import get_hash
+from vivarium_public_health.risks.distributions import clip
+
+DEFAULT_TOLERANCE = 1e-4
+INITIAL_GRID_SIZE = 257
+MAX_GRID_SIZE = 2**16 + 1
+
+
+class TabulatedQuantileFunction:
+    """A monotone interpolant of a quantile function on a probit grid.
+
+    Attributes
+    ----------
+    max_error
+        The largest absolute difference from the exact quantile function at
+        the midpoints of the final grid.
+    grid_size
+        The number of points in the final grid.
+    """
+
+    def __init__(self, ppf: Callable[[np.ndarray], np.ndarray], tolerance: float = DEFAULT_TOLERANCE):
+        self.exact_ppf = ppf
+        self.tolerance = tolerance
+        lower, upper = ndtri(clip(np.array([0., 1.])))
+
+        grid = np.linspace(lower, upper, INITIAL_GRID_SIZE)
+        values = self._exact(grid)
+        while True:
+            midpoints = (grid[:-1] + grid[1:]) / 2
+            midpoint_values = self._exact(midpoints)
+            if not (np.all(np.isfinite(values)) and np.all(np.isfinite(midpoint_values))):
+                # Rows the exact ppf cannot evaluate everywhere aren't tabulated.
+                self.interpolant, self.max_error, self.grid_size = None, np.nan, 0
+                return
+            interpolant = PchipInterpolator(grid, values)
+            self.max_error = np.max(np.abs(interpolant(midpoints) - midpoint_values))
+            self.grid_size = len(grid)
+            if self.max_error <= tolerance or 2 * len(grid) - 1 > MAX_GRID_SIZE:
+                break
+            grid = np.insert(grid, np.arange(1, len(grid)), midpoints)
+            values = np.insert(values, np.arange(1, len(values)), midpoint_values)
+        self.interpolant = interpolant
+        if self.max_error > tolerance:
+            logger.warning(f'Tabulated quantile function error {self.max_error:.2e} exceeds the tolerance '
+                           f'{tolerance:.2e} with {self.grid_size} points.')
+
+    def __call__(self, q: np.ndarray) -> np.ndarray:
+        q = clip(np.array(q, dtype=float))
+        if self.interpolant is None:
+            with np.errstate(under='ignore'):
+                x = np.asarray(self.exact_ppf(q), dtype=float)
+            return np.where(np.isnan(x), 0., x)
+        return self.interpolant(ndtri(q))
+
+    def _exact(self, probit):
+        # vivarium makes numpy raise on floating point errors, and component
+        # cdfs underflow far in their tails at the clipped extreme quantiles.
+        with np.errstate(under='ignore'):
+            return np.asarray(self.exact_ppf(ndtr(probit)), dtype=float)
+
+
+_quantile_functions: Dict[Tuple, TabulatedQuantileFunction] = {}
+
+
+def get_ensemble_quantile_function(weights: pd.Series, mean: float, sd: float,
+                                   tolerance: float = DEFAULT_TOLERANCE) -> TabulatedQuantileFunction:
+    """Returns the tabulated quantile function of an ensemble distribution.
+
+    Tables are cached for the process by their parameters, so the exposure
+    pipeline and the shift calibration share them.  The distribution is
+    built under a seed derived from its parameters, so the table does not
+    depend on the state of the global random number generator, which is
+    restored afterwards.
+    """
+    key = (tuple(weights.items()), float(mean), float(sd), tolerance)
+    if key not in _quantile_functions:
+        state = np.random.get_state()
+        np.random.seed(get_hash(repr(key)))
+        distribution = EnsembleDistribution(weights=weights, mean=mean, sd=sd)
+        np.random.set_state(state)
+        quantile_function = TabulatedQuantileFunction(distribution.ppf, tolerance)
+        logger.debug(f'Tabulated ensemble quantile function for mean {mean:.4f}, sd {sd:.4f} with '
+                     f'{quantile_function.grid_size} points, max error {quantile_function.max_error:.2e}.')
+        _quantile_functions[key] = quantile_function
+    return _quantile_functions[key]
+
+
+def get_accuracy_report(quantile_functions: Iterable[TabulatedQuantileFunction] = None) -> pd.DataFrame:
+    """Summarizes the grid size and midpoint error of the tables built so far.
+
+    Every table is included unless ``quantile_functions`` restricts the
+    report to those tables.
+    """
+    included = None if quantile_functions is None else {id(f) for f in quantile_functions}
+    return pd.DataFrame([{'mean': mean, 'sd': sd, 'tolerance': tolerance,
+                          'grid_size': f.grid_size, 'max_error': f.max_error}
+                         for (_, mean, sd, tolerance), f in _quantile_functions.items()
+                         if included is None or id(f) in included],
+                        columns=['mean', 'sd', 'tolerance', 'grid_size', 'max_error'])
@@ -5,14 +5,32 @@ implementation that has been used in several public health models.
 Note that because the input data is so large, it relies on a custom relative
 risk data loader that expects data saved in keys by draw.
 """
+from collections import OrderedDict
+from pathlib import Path
 from typing import Tuple
 
+import numpy as np
 import pandas as pd
+from loguru import logger
 from vivarium import Artifact
+from vivarium.framework.values import list_combiner
 from vivarium_public_health.utilities import EntityString, TargetString
 from vivarium_public_health.risks.data_transformations import pivot_categorical
 
 from vivarium_gates_bep import globals as project_globals
+from vivarium_gates_bep.components.cohort_lookup import CohortLookupTable
+from vivarium_gates_bep.components.state_table import get_state_table_schema
+from vivarium_gates_bep.data.draws import read_draw
+from vivarium_gates_bep.utilites import get_shared
+
+
+# Birth weight propensities are kept this far from 0 and 1.
+BIRTH_WEIGHT_PROPENSITY_BOUND = 1e-6
+
+LBWSG_INDEX_COLUMNS = ['sex', 'age_start', 'age_end', 'year_start', 'year_end']
+LBWSG_SIM_KEYS = [project_globals.LBWSG_SIM_EXPOSURE,
+                  project_globals.LBWSG_SIM_RELATIVE_RISK,
+                  project_globals.LBWSG_SIM_PAF]
 
 
 class LBWSGRisk:
@@ -24,8 +42,8 @@ class LBWSGRisk:
     def setup(self, builder):
         self.risk = EntityString(f'risk_factor.{project_globals.LBWSG_MODEL_NAME}')
         self.exposure_distribution = LBWSGDistribution(builder)
-        bw_data = read_bw_bin_data(builder, project_globals.BIRTH_WEIGHT_BINS)
-        self.birth_weight_propensity = builder.lookup.build_table(bw_data, parameter_columns=['birth_weight'])
+        self.birth_weight_cdf = read_bw_bin_data(builder, project_globals.BIRTH_WEIGHT_BINS)
+        self.schema = get_state_table_schema(builder)
 
         # FIXME: These are not actual birth weights/gestational times, but the
         # raw values that source pipelines.  They should use different column
@@ -49,28 +67,105 @@ class LBWSGRisk:
             requires_values=f'{self.risk.name}.raw_exposure'
         )
 
+        # Birth weight and gestation time are fixed at birth and the exposure
+        # modifiers in this model depend only on characteristics fixed at
+        # birth, so the categorical exposure is computed once per simulant and
+        # stored as a category position.  A modifier whose effect changes over
+        # time must declare itself by modifying this pipeline (returning any
+        # value), which makes the stored categories refresh every time step.
+        self.time_varying_modifiers = builder.value.register_value_producer(
+            f'{self.risk.name}.exposure.time_varying_modifiers',
+            source=lambda index: [],
+            preferred_combiner=list_combiner
+        )
+        self.recompute_category = False
+        self.category_view = builder.population.get_view([project_globals.LBWSG_CATEGORY_COLUMN])
+        builder.population.initializes_simulants(self.on_initialize_category,
+                                                 creates_columns=[project_globals.LBWSG_CATEGORY_COLUMN],
+                                                 requires_values=[f'{self.risk.name}.exposure'])
+
+        builder.event.register_listener('post_setup', self.on_post_setup)
+        builder.event.register_listener('time_step__prepare', self.on_time_step_prepare)
+
+    def on_post_setup(self, event):
+        self.recompute_category = bool(self.time_varying_modifiers(pd.Index([])))
+        logger.debug(f'Per-draw data cache after setup: {draw_data_cache.info()}')
+
+    def on_initialize_category(self, pop_data):
+        self.category_view.update(self.get_category(pop_data.index))
+
+    def on_time_step_prepare(self, event):
+        if self.recompute_category:
+            index = self.category_view.get(event.index, query='alive == "alive"').index
+            self.category_view.update(self.get_category(index))
+
+    def get_category(self, index):
+        exposure = self.exposure(index, skip_post_processor=True)
+        category_index = self.exposure_distribution.convert_to_category_index(exposure)
+        return pd.Series(category_index.astype(np.int16), index=index, name=project_globals.LBWSG_CATEGORY_COLUMN)
+
     def on_initialize_simulants(self, pop_data):
         exposure = self.exposure_distribution.get_birth_weight_and_gestational_age(pop_data.index)
-        self.population_view.update(pd.DataFrame({
-            project_globals.BIRTH_WEIGHT: exposure[project_globals.BIRTH_WEIGHT],
-            project_globals.GESTATION_TIME: exposure[project_globals.GESTATION_TIME]
-        }, index=pop_data.index))
-        self.population_view.update(pd.DataFrame({
-            project_globals.BIRTH_WEIGHT_PROPENSITY: self.birth_weight_propensity(pop_data.index),
-        }, index=pop_data.index))
+        birth_weight = exposure[project_globals.BIRTH_WEIGHT]
+        self.population_view.update(self.schema.apply(pd.DataFrame({
+            project_globals.BIRTH_WEIGHT: birth_weight,
+            project_globals.GESTATION_TIME: exposure[project_globals.GESTATION_TIME],
+            project_globals.BIRTH_WEIGHT_PROPENSITY: self.get_birth_weight_propensity(birth_weight),
+        }, index=pop_data.index)))
+
+    def get_birth_weight_propensity(self, birth_weight):
+        propensity = np.interp(birth_weight.values, self.birth_weight_cdf[project_globals.BIRTH_WEIGHT].values,
+                               self.birth_weight_cdf.value.values)
+        # Keep the propensity off the support boundaries so its probit is finite.
+        return np.clip(propensity, BIRTH_WEIGHT_PROPENSITY_BOUND, 1 - BIRTH_WEIGHT_PROPENSITY_BOUND)
 
 
 def read_bw_bin_data(builder, key):
+    """Loads the birth weight CDF knots.
+
+    Older artifacts store an empirical CDF as ranked bins, which are read as
+    knots at the start of each bin.
+    """
     art = Artifact(builder.configuration.input_data.artifact_path)
-    return art.load(key)
+    data = art.load(key)
+    if 'birth_weight_start' in data:
+        data = (data.rename(columns={'birth_weight_start': project_globals.BIRTH_WEIGHT})
+                .filter([project_globals.BIRTH_WEIGHT, 'value']))
+    return data.sort_values(project_globals.BIRTH_WEIGHT).reset_index(drop=True)
+
+
+def get_birth_weight_cdf_knots(category_edges: pd.DataFrame, exposure: np.ndarray) -> pd.DataFrame:
+    """Computes the birth weight CDF implied by the LBWSG category exposure.
+
+    Birth weights are uniform within each category, so the CDF is a mixture
+    of uniform CDFs and is linear between the category birth weight edges.
+    Its values at those edges are an exact knot table for ``np.interp``.
+
+    Parameters
+    ----------
+    category_edges
+        Category edges as produced by ``get_category_edges``.
+    exposure
+        Probability of each category, in the order of ``category_edges``.
+
+    Returns
+    -------
+        The CDF value at each distinct birth weight edge.
+
+    """
+    start = category_edges.birth_weight_start.values
+    end = category_edges.birth_weight_end.values
+    knots = np.unique(np.concatenate([start, end]))
+    fraction_below = np.clip((knots[:, np.newaxis] - start) / (end - start), 0, 1)
+    exposure = np.asarray(exposure) / np.sum(exposure)
+    return pd.DataFrame({project_globals.BIRTH_WEIGHT: knots, 'value': fraction_below @ exposure})
 
 
 # FIXME: This class is not a clear representation of the lbwsg distribution.
-# It should act as a standalone (e.g. a library) class that could be used
-# to stand up and sample from the distribution outside the simulation, because
-# we have definite need of that.  A possibility is to port it to the
-# risk_distributions library and construct a simulation wrapper like we do
-# with the ensemble distributions in vph.
+# Use LBWSGSampler to sample from the distribution outside the simulation.
+# A possibility is to port both to the risk_distributions library and
+# construct a simulation wrapper like we do with the ensemble distributions
+# in vph.
 class LBWSGDistribution:
 
     def __init__(self, builder):
@@ -78,112 +173,72 @@ class LBWSGDistribution:
         self.randomness = builder.randomness.get_stream(f'{self.risk.name}.exposure')
 
         self.categories_by_interval = get_lbwsg_categories_by_interval(builder)
-        self.intervals_by_category = self.categories_by_interval.reset_index().set_index('cat')
-        self.max_gt_by_bw, self.max_bw_by_gt = self._get_boundary_mappings()
+        self.category_edges = get_category_edges(self.categories_by_interval)
+        self.lattice = CategoryLattice(self.category_edges)
+        self.population_view = builder.population.get_view(['age', 'sex'])
 
-        self.exposure_parameters = builder.lookup.build_table(self.get_exposure_data(builder),
-                                                              key_columns=['sex'],
-                                                              parameter_columns=['age', 'year'])
+        self.exposure_parameters = get_lbwsg_parameters(builder).exposure
 
     def get_birth_weight_and_gestational_age(self, index):
         category_draw = self.randomness.get_draw(index, additional_key='category')
-        exposure = self.exposure_parameters(index)[self.categories_by_interval.values]
-        exposure_sum = exposure.cumsum(axis='columns')
-        category_index = (exposure_sum.T < category_draw).T.sum('columns')
+        category_index = np.zeros(len(index), dtype=int)
+        # Everyone in a demographic group shares an exposure vector, so the
+        # cumulative exposure is built once per group rather than per simulant.
+        pop = self.population_view.get(index)
+        for group_index in pop.groupby(['sex', 'age']).indices.values():
+            exposure = self.exposure_parameters(index[group_index[:1]])[self.categories_by_interval.values]
+            cumulative_exposure = np.cumsum(exposure.values[0])
+            category_index[group_index] = get_category_index(cumulative_exposure,
+                                                             category_draw.values[group_index])
         categorical_exposure = pd.Series(self.categories_by_interval.values[category_index],
                                          index=index, name='cat')
         return self._convert_to_continuous(categorical_exposure)
 
     def convert_to_categorical(self, exposure, _):
+        category_index = self.convert_to_category_index(exposure)
+        return pd.Series(self.categories_by_interval.values[category_index], index=exposure.index, name='cat')
+
+    def convert_to_category_index(self, exposure):
         # FIXME: DIRTY HACK.  The problem with absolute shifts is that
         #  they can take you way out of a realistic domain for your
         #  values.  Like giving people negative birth weights
         birth_weight = exposure[project_globals.BIRTH_WEIGHT]
         exposure.loc[birth_weight < 100, project_globals.BIRTH_WEIGHT] = 100
-        exposure = self._convert_boundary_cases(exposure)
-        categorical_exposure = self.categories_by_interval.iloc[self._get_categorical_index(exposure)]
-        categorical_exposure.index = exposure.index
-        return categorical_exposure
-
-    def _convert_boundary_cases(self, exposure):
-        birth_weight = exposure[project_globals.BIRTH_WEIGHT]
-        gestation_time = exposure[project_globals.GESTATION_TIME]
-        eps = 1e-4
-        outside_bounds = self._get_categorical_index(exposure) == -1
-        shift_down = outside_bounds & (
-                (birth_weight < 1000)
-                | ((1000 < birth_weight) & (birth_weight < project_globals.MAX_BIRTH_WEIGHT)
-                   & (40 < gestation_time))
-        )
-        shift_left = outside_bounds & (
-            ((1000 < birth_weight) & (gestation_time < 34))
-                | ((project_globals.MAX_BIRTH_WEIGHT < birth_weight)
-                   & (gestation_time < project_globals.MAX_GESTATIONAL_TIME))
-        )
-        tmrel = outside_bounds & (
-                (project_globals.MAX_BIRTH_WEIGHT < birth_weight)
-                & (project_globals.MAX_GESTATIONAL_TIME < gestation_time)
-        )
-
-        max_gt_for_bw = self.max_gt_by_bw.loc[exposure.loc[shift_down, project_globals.BIRTH_WEIGHT]].values
-        exposure.loc[shift_down, project_globals.GESTATION_TIME] = max_gt_for_bw - eps
-
-        max_bw_for_gt = self.max_bw_by_gt.loc[exposure.loc[shift_left, project_globals.GESTATION_TIME]].values
-        exposure.loc[shift_left, project_globals.BIRTH_WEIGHT] = max_bw_for_gt - eps
-
-        exposure.loc[tmrel, project_globals.GESTATION_TIME] = project_globals.MAX_GESTATIONAL_TIME - eps
-        exposure.loc[tmrel, project_globals.BIRTH_WEIGHT] = project_globals.MAX_BIRTH_WEIGHT - eps
-
-        return exposure
+        category_index = self._get_categorical_index(exposure)
+        exposure, category_index = self._convert_boundary_cases(exposure, category_index)
+        return category_index
+
+    def _convert_boundary_cases(self, exposure, category_index):
+        if (category_index == -1).any():
+            birth_weight, gestation_time, category_index = self.lattice.resolve_boundary_cases(
+                exposure[project_globals.BIRTH_WEIGHT].values,
+                exposure[project_globals.GESTATION_TIME].values,
+                category_index
+            )
+            exposure[project_globals.BIRTH_WEIGHT] = birth_weight
+            exposure[project_globals.GESTATION_TIME] = gestation_time
+        return exposure, category_index
 
     def _get_categorical_index(self, exposure):
-        exposure_bw_gt_index = exposure.set_index(project_globals.LBWSG_COLUMNS).index
-        return self.categories_by_interval.index.get_indexer(exposure_bw_gt_index, method=None)
+        return self.lattice.get_category_index(exposure[project_globals.BIRTH_WEIGHT].values,
+                                               exposure[project_globals.GESTATION_TIME].values)
 
     def _convert_to_continuous(self, categorical_exposure):
         birth_weight_draw = self.randomness.get_draw(categorical_exposure.index,
                                                      additional_key=project_globals.BIRTH_WEIGHT)
         gestational_time_draw = self.randomness.get_draw(categorical_exposure.index,
                                                          additional_key=project_globals.GESTATION_TIME)
-        draws = {project_globals.BIRTH_WEIGHT: birth_weight_draw,
-                 project_globals.GESTATION_TIME: gestational_time_draw}
-
-        def single_values_from_category(row):
-            idx = row['index']
-            bw_draw = draws[project_globals.BIRTH_WEIGHT][idx]
-            gt_draw = draws[project_globals.GESTATION_TIME][idx]
-
-            intervals = self.intervals_by_category.loc[row['cat']]
-
-            birth_weight = (intervals.birth_weight.left
-                            + bw_draw * (intervals.birth_weight.right - intervals.birth_weight.left))
-            gestational_age = (intervals.gestation_time.left
-                               + gt_draw * (intervals.gestation_time.right - intervals.gestation_time.left))
-
-            return birth_weight, gestational_age
-
-        values = categorical_exposure.reset_index().apply(single_values_from_category, axis=1)
-        return pd.DataFrame(list(values), index=categorical_exposure.index,
-                            columns=project_globals.LBWSG_COLUMNS)
-
-    def _get_boundary_mappings(self):
-        cats = self.categories_by_interval.reset_index()
-        max_gt_by_bw = pd.Series({bw_interval: pd.Index(group.gestation_time).right.max()
-                                  for bw_interval, group in cats.groupby(project_globals.BIRTH_WEIGHT)})
-        max_bw_by_gt = pd.Series({gt_interval: pd.Index(group.birth_weight).right.max()
-                                  for gt_interval, group in cats.groupby(project_globals.GESTATION_TIME)})
-        return max_gt_by_bw, max_bw_by_gt
-
-    @staticmethod
-    def get_exposure_data(builder):
-        exposure = read_data_by_draw(builder, project_globals.LBWSG_EXPOSURE)
-        exposure = pivot_categorical(exposure)
-        exposure[project_globals.LBWSG_MISSING_CATEGORY.CAT] = project_globals.LBWSG_MISSING_CATEGORY.EXPOSURE
-        return exposure
+        return convert_to_continuous(categorical_exposure, self.category_edges,
+                                     birth_weight_draw, gestational_time_draw)
 
 
 def get_lbwsg_categories_by_interval(builder):
     category_dict = builder.data.load(project_globals.LBWSG_CATEGORIES)
+    return build_categories_by_interval(category_dict)
+
+
+def build_categories_by_interval(category_dict):
+    category_dict = dict(category_dict)
     category_dict[project_globals.LBWSG_MISSING_CATEGORY.CAT] = project_globals.LBWSG_MISSING_CATEGORY.NAME
     cats = (pd.DataFrame.from_dict(category_dict, orient='index')
             .reset_index()
@@ -195,6 +250,250 @@ def get_lbwsg_categories_by_interval(builder):
     return cats
 
 
+def get_category_edges(categories_by_interval: pd.Series) -> pd.DataFrame:
+    """Unpacks the category intervals into a table of edges indexed by category.
+
+    Columns are the left and right edges of the birth weight and gestation
+    time intervals, stored as floats so continuous values can be generated
+    with plain array arithmetic.
+    """
+    edges = {}
+    for column in project_globals.LBWSG_COLUMNS:
+        intervals = pd.IntervalIndex(categories_by_interval.index.get_level_values(column))
+        edges[f'{column}_start'] = intervals.left.values.astype(float)
+        edges[f'{column}_end'] = intervals.right.values.astype(float)
+    return pd.DataFrame(edges, index=pd.Index(categories_by_interval.values, name='cat'),
+                        columns=[f'{column}_{side}' for column in project_globals.LBWSG_COLUMNS
+                                 for side in ['start', 'end']])
+
+
+class CategoryLattice:
+    """The LBWSG categories as a birth weight by gestation time grid.
+
+    The sorted unique interval edges along each axis partition the plane
+    into cells.  Each cell holds the position of the category covering it
+    (matching the order of the category edges) or -1 where the lattice has
+    a hole, so points are categorized with one ``searchsorted`` per axis.
+    """
+
+    def __init__(self, category_edges: pd.DataFrame):
+        bw_columns = [f'{project_globals.BIRTH_WEIGHT}_start', f'{project_globals.BIRTH_WEIGHT}_end']
+        gt_columns = [f'{project_globals.GESTATION_TIME}_start', f'{project_globals.GESTATION_TIME}_end']
+        self.birth_weight_edges = np.unique(category_edges[bw_columns].values)
+        self.gestation_time_edges = np.unique(category_edges[gt_columns].values)
+
+        self.grid = np.full((len(self.birth_weight_edges) - 1, len(self.gestation_time_edges) - 1), -1)
+        for code, (bw_start, bw_end, gt_start, gt_end) in enumerate(category_edges[bw_columns + gt_columns].values):
+            bw_cells = slice(*np.searchsorted(self.birth_weight_edges, [bw_start, bw_end]))
+            gt_cells = slice(*np.searchsorted(self.gestation_time_edges, [gt_start, gt_end]))
+            self.grid[bw_cells, gt_cells] = code
+
+        # The largest gestation time right edge reachable in each birth weight
+        # row and the largest birth weight right edge reachable in each
+        # gestation time column, used to project points back onto the lattice.
+        on_lattice = self.grid != -1
+        self.max_gestation_time = np.where(on_lattice, self.gestation_time_edges[1:], -np.inf).max(axis=1)
+        self.max_birth_weight = np.where(on_lattice, self.birth_weight_edges[1:, np.newaxis], -np.inf).max(axis=0)
+
+    def get_cells(self, birth_weight: np.ndarray, gestation_time: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        """Returns the grid row and column for each point.
+
+        Points outside the extent of the grid along an axis get -1 or the
+        number of cells along that axis.
+        """
+        bw_cell = np.searchsorted(self.birth_weight_edges, birth_weight, side='right') - 1
+        gt_cell = np.searchsorted(self.gestation_time_edges, gestation_time, side='right') - 1
+        return bw_cell, gt_cell
+
+    def get_category_index(self, birth_weight: np.ndarray, gestation_time: np.ndarray) -> np.ndarray:
+        """Returns the category position for each point, or -1 if it falls off the lattice."""
+        bw_cell, gt_cell = self.get_cells(birth_weight, gestation_time)
+        on_grid = ((0 <= bw_cell) & (bw_cell < self.grid.shape[0])
+                   & (0 <= gt_cell) & (gt_cell < self.grid.shape[1]))
+        category_index = np.full(len(bw_cell), -1)
+        category_index[on_grid] = self.grid[bw_cell[on_grid], gt_cell[on_grid]]
+        return category_index
+
+    def resolve_boundary_cases(self, birth_weight: np.ndarray, gestation_time: np.ndarray,
+                               category_index: np.ndarray) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """Projects points that fall off the lattice back onto it.
+
+        Off-lattice points are shifted down to the largest gestation time
+        for their birth weight, shifted left to the largest birth weight for
+        their gestation time, or moved to the TMREL corner, depending on
+        where they fall.  Only the points with a category index of -1 are
+        examined, and only those are re-categorized.
+
+        Returns
+        -------
+            Birth weight, gestation time and category index with the boundary
+            cases resolved.  The inputs are not modified.
+
+        """
+        eps = 1e-4
+        outside = np.flatnonzero(category_index == -1)
+        birth_weight, gestation_time = birth_weight.copy(), gestation_time.copy()
+        category_index = category_index.copy()
+
+        bw, gt = birth_weight[outside], gestation_time[outside]
+        shift_down = (
+                (bw < 1000)
+                | ((1000 < bw) & (bw < project_globals.MAX_BIRTH_WEIGHT) & (40 < gt))
+        )
+        shift_left = (
+                ((1000 < bw) & (gt < 34))
+                | ((project_globals.MAX_BIRTH_WEIGHT < bw) & (gt < project_globals.MAX_GESTATIONAL_TIME))
+        )
+        tmrel = (project_globals.MAX_BIRTH_WEIGHT < bw) & (project_globals.MAX_GESTATIONAL_TIME < gt)
+
+        bw_cell, gt_cell = self.get_cells(bw, gt)
+        new_bw, new_gt = bw.copy(), gt.copy()
+        new_gt[shift_down] = self.max_gestation_time[bw_cell[shift_down]] - eps
+        new_bw[shift_left] = self.max_birth_weight[gt_cell[shift_left]] - eps
+        new_gt[tmrel] = project_globals.MAX_GESTATIONAL_TIME - eps
+        new_bw[tmrel] = project_globals.MAX_BIRTH_WEIGHT - eps
+
+        birth_weight[outside] = new_bw
+        gestation_time[outside] = new_gt
+        category_index[outside] = self.get_category_index(new_bw, new_gt)
+        return birth_weight, gestation_time, category_index
+
+
+def convert_to_continuous(categorical_exposure: pd.Series, category_edges: pd.DataFrame,
+                          birth_weight_draw: pd.Series, gestation_time_draw: pd.Series) -> pd.DataFrame:
+    """Places each simulant uniformly within the rectangle of its category.
+
+    Parameters
+    ----------
+    categorical_exposure
+        LBWSG category names indexed by simulant.
+    category_edges
+        Interval edges by category, as produced by ``get_category_edges``.
+    birth_weight_draw
+        Uniform draws used to position simulants within the birth weight
+        interval of their category.
+    gestation_time_draw
+        Uniform draws used to position simulants within the gestation time
+        interval of their category.
+
+    Returns
+    -------
+        Birth weight and gestation time indexed by simulant.
+
+    """
+    category_index = category_edges.index.get_indexer(categorical_exposure.values)
+    draws = np.column_stack([birth_weight_draw.loc[categorical_exposure.index].values,
+                             gestation_time_draw.loc[categorical_exposure.index].values])
+    return pd.DataFrame(place_in_category(category_edges.values, category_index, draws),
+                        index=categorical_exposure.index, columns=project_globals.LBWSG_COLUMNS)
+
+
+def place_in_category(edges: np.ndarray, category_index: np.ndarray, draws: np.ndarray) -> np.ndarray:
+    """Maps (birth weight, gestation time) draws into the rectangles of the given categories."""
+    edges = edges[category_index]
+    left, right = edges[:, ::2], edges[:, 1::2]
+    return left + draws * (right - left)
+
+
+class LBWSGSampler:
+    """The LBWSG distribution for a single demographic group, usable outside a simulation.
+
+    Categories are chosen by inverting the cumulative category exposure and
+    simulants are placed uniformly within their category's rectangle, exactly
+    as ``LBWSGDistribution`` does for the same three draws.  Everything is
+    returned as NumPy arrays.
+
+    """
+
+    def __init__(self, categories_by_interval: pd.Series, exposure: pd.Series):
+        """
+        Parameters
+        ----------
+        categories_by_interval
+            Category names indexed by (birth weight, gestation time) intervals,
+            as produced by ``build_categories_by_interval``.
+        exposure
+            Category exposure for a single demographic group, indexed by
+            category name.
+        """
+        self.categories = categories_by_interval.values
+        self.category_edges = get_category_edges(categories_by_interval)
+        self.lattice = CategoryLattice(self.category_edges)
+        self.exposure = exposure[self.categories].values
+        self.cumulative_exposure = np.cumsum(self.exposure)
+
+    @classmethod
+    def from_artifact(cls, artifact_path: str, draw: int, sex: str, age: float = 0., year: int = 2017):
+        """Builds a sampler from the per-draw exposure stored in an artifact.
+
+        The exposure row is the one whose age bin contains ``age`` and whose
+        year bin starts at ``year``, falling back to the most recent year
+        available.
+        """
+        categories_by_interval = build_categories_by_interval(
+            Artifact(artifact_path).load(project_globals.LBWSG_CATEGORIES)
+        )
+        if project_globals.LBWSG_SIM_EXPOSURE in Artifact(artifact_path):
+            exposure = load_data_by_draw(artifact_path, project_globals.LBWSG_SIM_EXPOSURE, draw)
+        else:
+            exposure = get_sim_exposure_data(load_data_by_draw(artifact_path, project_globals.LBWSG_EXPOSURE, draw))
+        if year not in exposure.year_start.values:
+            year = exposure.year_start.max()
+        exposure = exposure[(exposure.sex == sex) & (exposure.year_start == year)
+                            & (exposure.age_start <= age) & (age < exposure.age_end)]
+        if len(exposure) != 1:
+            raise ValueError(f'Expected a single LBWSG exposure row for sex {sex}, age {age} and year {year}. '
+                             f'Found {len(exposure)}.')
+        return cls(categories_by_interval, exposure.iloc[0])
+
+    def sample(self, n: int, random_state=None) -> Tuple[np.ndarray, np.ndarray]:
+        """Draws birth weights and gestation times for ``n`` simulants.
+
+        Parameters
+        ----------
+        n
+            The number of samples.
+        random_state
+            A seed or ``np.random.RandomState`` for reproducible samples.
+
+        Returns
+        -------
+            Birth weights in grams and gestation times in weeks.
+
+        """
+        if not isinstance(random_state, np.random.RandomState):
+            random_state = np.random.RandomState(random_state)
+        return self.ppf(*random_state.random_sample((3, n)))
+
+    def ppf(self, category_q: np.ndarray, birth_weight_q: np.ndarray,
+            gestation_time_q: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        """Maps uniform quantiles to birth weights and gestation times.
+
+        The category quantile selects a category from the cumulative exposure
+        and the other two place the sample within that category's birth weight
+        and gestation time intervals.
+        """
+        category_index = self.get_category_index(category_q)
+        draws = np.column_stack([np.asarray(birth_weight_q), np.asarray(gestation_time_q)])
+        values = place_in_category(self.category_edges.values, category_index, draws)
+        return values[:, 0], values[:, 1]
+
+    def get_category_index(self, category_q: np.ndarray) -> np.ndarray:
+        """Returns the position of the category selected by each quantile."""
+        return get_category_index(self.cumulative_exposure, category_q)
+
+
+def get_category_index(cumulative_exposure: np.ndarray, category_q: np.ndarray) -> np.ndarray:
+    """Selects categories by inverting a cumulative exposure vector.
+
+    Each quantile picks the first category whose cumulative exposure is not
+    below it, i.e. the number of categories with cumulative exposure strictly
+    less than the quantile.
+    """
+    category_index = np.searchsorted(cumulative_exposure, category_q, side='left')
+    return np.minimum(category_index, len(cumulative_exposure) - 1)
+
+
 def get_intervals_from_name(name: str) -> Tuple[pd.Interval, pd.Interval]:
     """Converts a LBWSG category name to a pair of intervals.
 
@@ -233,70 +532,176 @@ class LBWSGRiskEffect:
         return f"risk_effect.{self.risk}.{self.target}"
 
     def setup(self, builder):
-        rr_data = self.get_relative_risk_data(builder)
-        paf_data = self.get_population_attributable_fraction_data(builder)
-        self.relative_risk = builder.lookup.build_table(rr_data,
-                                                        key_columns=['sex'],
-                                                        parameter_columns=['age', 'year'])
-        self.population_attributable_fraction = builder.lookup.build_table(paf_data,
-                                                                           key_columns=['sex'],
-                                                                           parameter_columns=['age', 'year'])
+        parameters = get_lbwsg_parameters(builder)
+        self.relative_risk = parameters.relative_risk
+        self.population_attributable_fraction = parameters.population_attributable_fraction
 
-        self.exposure_effect = self.get_exposure_effect(builder)
+        # Categories are read from the per-simulant column maintained by
+        # LBWSGRisk rather than by re-evaluating the exposure pipeline.
+        self.category_view = builder.population.get_view([project_globals.LBWSG_CATEGORY_COLUMN])
 
         builder.value.register_value_modifier(f'{self.target.name}.{self.target.measure}',
-                                              modifier=self.adjust_target)
+                                              modifier=self.adjust_target,
+                                              requires_columns=[project_globals.LBWSG_CATEGORY_COLUMN])
         builder.value.register_value_modifier(
             f'{self.target.name}.{self.target.measure}.population_attributable_fraction',
             modifier=self.population_attributable_fraction)
 
     def adjust_target(self, index, target):
-        return self.exposure_effect(target, self.relative_risk(index))
-
-    def get_relative_risk_data(self, builder):
-        relative_risk_data = read_data_by_draw(builder, f'{self.risk}.relative_risk')
-        correct_target = ((relative_risk_data['affected_entity'] == 'all')
-                          & (relative_risk_data['affected_measure'] == 'excess_mortality_rate'))
-        relative_risk_data = (relative_risk_data[correct_target]
-                              .drop(['affected_entity', 'affected_measure'], 'columns'))
-        relative_risk_data = pivot_categorical(relative_risk_data)
-        relative_risk_data[project_globals.LBWSG_MISSING_CATEGORY.CAT] = (relative_risk_data['cat106']
-                                                                          + relative_risk_data['cat116']) / 2
-        return relative_risk_data
-
-    def get_population_attributable_fraction_data(self, builder):
-        index_columns = ['sex', 'age_start', 'age_end', 'year_start', 'year_end']
-        rr_data = self.get_relative_risk_data(builder).set_index(index_columns)
-        exposure_data = self.get_exposure_data(builder).set_index(index_columns)
-        mean_rr = (rr_data * exposure_data).sum(axis=1)
-        paf_data = ((mean_rr - 1)/mean_rr).reset_index().rename(columns={0: 'value'})
-        return paf_data
-
-    def get_exposure_effect(self, builder):
-        risk_exposure = builder.value.get_value(f'{self.risk.name}.exposure')
-
-        def exposure_effect(rates, rr):
-            exposure = risk_exposure(rr.index)
-            return rates * (rr.lookup(exposure.index, exposure))
-
-        return exposure_effect
-
-    @staticmethod
-    def get_exposure_data(builder):
-        exposure = read_data_by_draw(builder, project_globals.LBWSG_EXPOSURE)
-        exposure = pivot_categorical(exposure)
-        exposure[project_globals.LBWSG_MISSING_CATEGORY.CAT] = project_globals.LBWSG_MISSING_CATEGORY.EXPOSURE
-        return exposure
+        category_index = self.category_view.get(index)[project_globals.LBWSG_CATEGORY_COLUMN].values
+        return target * self.relative_risk(index, category_index)
+
+
+# Parameters are shared by every LBWSG component in a simulation.
+def get_lbwsg_parameters(builder) -> 'LBWSGParameters':
+    return get_shared(builder, LBWSGParameters)
+
+
+class LBWSGParameters:
+    """The LBWSG exposure, relative risk and PAF lookup tables.
+
+    The relative risk is restricted to the ``all`` affected entity, so it and
+    the PAF derived from it are the same for every target.  They are built
+    once per simulation by ``get_lbwsg_parameters`` and shared by the
+    exposure distribution and all of the risk effects.
+    """
+
+    def __init__(self, builder):
+        self.risk = EntityString(f'risk_factor.{project_globals.LBWSG_MODEL_NAME}')
+        self.categories = get_lbwsg_categories_by_interval(builder).values
+
+        artifact = Artifact(builder.configuration.input_data.artifact_path)
+        if all(key in artifact for key in LBWSG_SIM_KEYS):
+            # Sim ready tables written when the artifact was built.
+            exposure_data = read_data_by_draw(builder, project_globals.LBWSG_SIM_EXPOSURE)
+            relative_risk_data = read_data_by_draw(builder, project_globals.LBWSG_SIM_RELATIVE_RISK)
+            paf_data = read_data_by_draw(builder, project_globals.LBWSG_SIM_PAF)
+        else:
+            exposure_data = get_sim_exposure_data(read_data_by_draw(builder, project_globals.LBWSG_EXPOSURE))
+            relative_risk_data = get_sim_relative_risk_data(
+                read_data_by_draw(builder, project_globals.LBWSG_RELATIVE_RISK)
+            )
+            paf_data = get_population_attributable_fraction_data(exposure_data, relative_risk_data, self.categories)
+
+        self.exposure = CohortLookupTable(builder, exposure_data,
+                                          key_columns=['sex'],
+                                          parameter_columns=['age', 'year'])
+        self.relative_risk = CategoricalLookupTable(builder, relative_risk_data, self.categories)
+        self.population_attributable_fraction = CohortLookupTable(builder, paf_data,
+                                                                  key_columns=['sex'],
+                                                                  parameter_columns=['age', 'year'])
+
+
+def get_sim_exposure_data(exposure: pd.DataFrame) -> pd.DataFrame:
+    """Pivots a draw of LBWSG exposure to one column per category."""
+    exposure = pivot_categorical(exposure)
+    exposure[project_globals.LBWSG_MISSING_CATEGORY.CAT] = project_globals.LBWSG_MISSING_CATEGORY.EXPOSURE
+    return exposure
+
+
+def get_sim_relative_risk_data(relative_risk_data: pd.DataFrame) -> pd.DataFrame:
+    """Pivots a draw of the all cause LBWSG relative risk to one column per category."""
+    correct_target = ((relative_risk_data['affected_entity'] == 'all')
+                      & (relative_risk_data['affected_measure'] == 'excess_mortality_rate'))
+    relative_risk_data = (relative_risk_data[correct_target]
+                          .drop(['affected_entity', 'affected_measure'], 'columns'))
+    relative_risk_data = pivot_categorical(relative_risk_data)
+    relative_risk_data[project_globals.LBWSG_MISSING_CATEGORY.CAT] = (relative_risk_data['cat106']
+                                                                      + relative_risk_data['cat116']) / 2
+    return relative_risk_data
+
+
+def get_population_attributable_fraction_data(exposure_data: pd.DataFrame, relative_risk_data: pd.DataFrame,
+                                              categories: np.ndarray) -> pd.DataFrame:
+    """Computes the PAF of the all cause relative risk for each demographic row."""
+    rr_data = relative_risk_data.set_index(LBWSG_INDEX_COLUMNS)[categories]
+    exposure_data = exposure_data.set_index(LBWSG_INDEX_COLUMNS).reindex(rr_data.index)[categories]
+    mean_rr = (rr_data.values * exposure_data.values).sum(axis=1)
+    paf_data = pd.DataFrame({'value': (mean_rr - 1) / mean_rr}, index=rr_data.index).reset_index()
+    return paf_data
+
+
+class CategoricalLookupTable:
+    """A lookup table for data with one column per LBWSG category.
+
+    The data is held as a contiguous (demographic rows, categories) array
+    with columns in category position order.  A vivarium lookup table over
+    the row numbers finds each simulant's demographic row, so a lookup is a
+    single integer gather ``values[row, category]`` instead of interpolating
+    every category column for every simulant.  This relies on order 0
+    interpolation, under which the row number comes back unchanged.
+    """
+
+    def __init__(self, builder, data: pd.DataFrame, categories: np.ndarray):
+        if builder.configuration.interpolation.order != 0:
+            raise ValueError('Categorical LBWSG lookup tables require order 0 interpolation.')
+        data = data.reset_index(drop=True)
+        self.values = np.ascontiguousarray(data[categories].values)
+        rows = data[LBWSG_INDEX_COLUMNS].assign(value=np.arange(len(data), dtype=float))
+        self._rows = CohortLookupTable(builder, rows, key_columns=['sex'], parameter_columns=['age', 'year'])
+
+    def get_rows(self, index: pd.Index) -> np.ndarray:
+        """Returns the demographic row of each simulant."""
+        return self._rows(index).values.astype(int)
+
+    def __call__(self, index: pd.Index, category_index: np.ndarray) -> np.ndarray:
+        return self.values[self.get_rows(index), category_index]
 
 
 def read_data_by_draw(builder, key):
     path = builder.configuration.input_data.artifact_path
     draw = builder.configuration.input_data.input_draw_number
-    key = key.replace(".", "/")
-    with pd.HDFStore(path, mode='r') as store:
-        index = store.get(f'{key}/index')
-        draw = store.get(f'{key}/draw_{draw}')
-    draw = draw.rename("value")
-    data = pd.concat([index, draw], axis=1)
-    data = data.drop(columns='location')
+    return load_data_by_draw(path, key, draw)
+
+
+class DrawDataCache:
+    """A bounded, process-wide cache of per-draw artifact tables.
+
+    Setup reads the same per-draw tables from several components (the
+    exposure distribution and each of the risk effects), so the tables are
+    kept keyed by the artifact file, its modification time, the key and the
+    draw.  Least recently used entries are evicted once more than
+    ``maxsize`` tables are held.  Callers get a copy of the cached table so
+    they are free to modify it.
+    """
+
+    def __init__(self, maxsize: int = 16):
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+        self._data = OrderedDict()
+
+    def get(self, path, key: str, draw: int) -> pd.DataFrame:
+        path = Path(path).resolve()
+        cache_key = (str(path), path.stat().st_mtime_ns, key, draw)
+        if cache_key in self._data:
+            self.hits += 1
+            self._data.move_to_end(cache_key)
+        else:
+            self.misses += 1
+            self._data[cache_key] = _load_data_by_draw(path, key, draw)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+        return self._data[cache_key].copy()
+
+    def info(self) -> dict:
+        return {'hits': self.hits, 'misses': self.misses, 'maxsize': self.maxsize, 'size': len(self._data)}
+
+    def clear(self):
+        self._data.clear()
+        self.hits = 0
+        self.misses = 0
+
+
+draw_data_cache = DrawDataCache()
+
+
+def load_data_by_draw(path, key, draw):
+    return draw_data_cache.get(path, key, draw)
+
+
+def _load_data_by_draw(path, key, draw):
+    data = read_draw(path, key, draw)
+    # Sim ready tables are stored without a location.
+    data = data.drop(columns='location', errors='ignore')
     return data
@@ -1,14 +1,21 @@
+import hashlib
+import json
+import os
+import tempfile
+from pathlib import Path
+
 import numpy as np
 import pandas as pd
-from risk_distributions import EnsembleDistribution
-import scipy.optimize
 from vivarium import Artifact
 from vivarium.framework.randomness import get_hash
-from vivarium_public_health.risks.data_transformations import pivot_categorical
 from vivarium_public_health.risks.distributions import clip
 
 from vivarium_gates_bep import globals as project_globals
-from vivarium_gates_bep.utilites import sample_beta_distribution, sample_gamma_distribution, sample_normal_distribution
+from vivarium_gates_bep.components.ensemble_ppf import get_ensemble_quantile_function
+from vivarium_gates_bep.components.lbwsg import LBWSGSampler
+from vivarium_gates_bep.components.shift_solver import solve_shifts
+from vivarium_gates_bep.components.state_table import get_state_table_schema
+from vivarium_gates_bep.data import parameters
 
 
 class MaternalMalnutrition:
@@ -21,6 +28,7 @@ class MaternalMalnutrition:
         self.exposure = self.load_exposure(builder)
 
         self.randomness = builder.randomness.get_stream(project_globals.MATERNAL_MALNUTRITION_MODEL_NAME)
+        self.schema = get_state_table_schema(builder)
 
         self.population_view = builder.population.get_view([project_globals.MOTHER_NUTRITION_STATUS_COLUMN])
         builder.population.initializes_simulants(self.on_initialize_simulants,
@@ -35,9 +43,9 @@ class MaternalMalnutrition:
             [self.exposure, 1 - self.exposure]
         )
 
-        self.population_view.update(pd.DataFrame({
+        self.population_view.update(self.schema.apply(pd.DataFrame({
             project_globals.MOTHER_NUTRITION_STATUS_COLUMN: mother_nutrition_status
-        }, index=pop_data.index))
+        }, index=pop_data.index)))
 
     def metrics(self, index, metrics):
         metrics[project_globals.MALNOURISHED_MOTHERS_PROPORTION_COLUMN] = self.exposure
@@ -45,9 +53,7 @@ class MaternalMalnutrition:
 
     @staticmethod
     def load_exposure(builder):
-        location = builder.configuration.input_data.location
-        draw = builder.configuration.input_data.input_draw_number
-        return load_exposure(location, draw)
+        return parameters.get_draw_parameters(builder)[parameters.MATERNAL_MALNUTRITION_EXPOSURE]
 
 
 class MaternalMalnutritionRiskEffect:
@@ -62,6 +68,8 @@ class MaternalMalnutritionRiskEffect:
     def setup(self, builder):
         self.relative_risk = self.load_relative_risk(builder)
         self.shifts = self.compute_shifts(builder, self.relative_risk)
+        self.cgf_shifts = {cgf_risk: AgeSexShiftTable(self.shifts[cgf_risk])
+                           for cgf_risk in [project_globals.WASTING_MODEL_NAME, project_globals.STUNTING_MODEL_NAME]}
         self.population_view = builder.population.get_view(
             ['sex', 'age', project_globals.MOTHER_NUTRITION_STATUS_COLUMN]
         )
@@ -74,12 +82,12 @@ class MaternalMalnutritionRiskEffect:
 
         if self._enable_adjust_cgf:
             builder.value.register_value_modifier(
-                f'{project_globals.WASTING_MODEL_NAME}.exposure',
+                f'{project_globals.WASTING_MODEL_NAME}.static_exposure',
                 self.adjust_wasting,
                 requires_columns=[project_globals.MOTHER_NUTRITION_STATUS_COLUMN, 'sex', 'age']
             )
             builder.value.register_value_modifier(
-                f'{project_globals.STUNTING_MODEL_NAME}.exposure',
+                f'{project_globals.STUNTING_MODEL_NAME}.static_exposure',
                 self.adjust_stunting,
                 requires_columns=[project_globals.MOTHER_NUTRITION_STATUS_COLUMN, 'sex', 'age']
             )
@@ -106,186 +114,171 @@ class MaternalMalnutritionRiskEffect:
 
     def adjust_cgf(self, index, exposure, cgf_risk):
         pop = self.population_view.get(index)
-        ages = pop.age.unique()
-        shifts = self.shifts[cgf_risk]
-
-        for age in ages:
-            for (age_start, age_end, sex), (shift_up, shift_down) in shifts.items():
-                if age_start <= age < age_end:
-                    right_sex_and_age = (pop.sex == sex) & (pop.age == age)
-                    mom_malnourished = (pop[project_globals.MOTHER_NUTRITION_STATUS_COLUMN]
-                                        == project_globals.MOTHER_NUTRITION_MALNOURISHED)
-
-                    exposure.loc[right_sex_and_age] += shift_up
-                    exposure.loc[right_sex_and_age & mom_malnourished] -= shift_down
-
-        return exposure
+        mom_malnourished = (pop[project_globals.MOTHER_NUTRITION_STATUS_COLUMN]
+                            == project_globals.MOTHER_NUTRITION_MALNOURISHED)
+        return exposure + self.cgf_shifts[cgf_risk].get_shift(pop.age.values, pop.sex.values, mom_malnourished.values)
 
     @staticmethod
     def load_relative_risk(builder):
-        draw = builder.configuration.input_data.input_draw_number
-        return load_relative_risk(draw)
+        return parameters.get_draw_parameters(builder)[parameters.MATERNAL_MALNUTRITION_RELATIVE_RISK]
 
     @staticmethod
     def compute_shifts(builder, relative_risk):
         artifact_path = builder.configuration.input_data.artifact_path
         draw = builder.configuration.input_data.input_draw_number
         location = builder.configuration.input_data.location
+        draw_parameters = parameters.get_draw_parameters(builder)
+        exposure = draw_parameters[parameters.MATERNAL_MALNUTRITION_EXPOSURE]
 
-        birth_weight_shifts = compute_birth_weight_shift_crude(draw, location)
-        wasting_shifts = compute_cgf_shifts(artifact_path, draw, location,
-                                            project_globals.WASTING_MODEL_NAME, relative_risk)
-        stunting_shifts = compute_cgf_shifts(artifact_path, draw, location,
-                                             project_globals.STUNTING_MODEL_NAME, relative_risk)
+        birth_weight_shifts = compute_birth_weight_shift_crude(
+            location, draw_parameters[parameters.MATERNAL_MALNUTRITION_BIRTH_WEIGHT_SHIFT]
+        )
+        wasting_shifts = load_cgf_shifts(artifact_path, draw, location, project_globals.WASTING_MODEL_NAME,
+                                         exposure, relative_risk)
+        stunting_shifts = load_cgf_shifts(artifact_path, draw, location, project_globals.STUNTING_MODEL_NAME,
+                                          exposure, relative_risk)
 
         return {project_globals.BIRTH_WEIGHT: birth_weight_shifts,
                 project_globals.WASTING_MODEL_NAME: wasting_shifts,
                 project_globals.STUNTING_MODEL_NAME: stunting_shifts}
 
 
-# TODO: A bunch of code here should be shared with the lbwsg component,
-# but just trying to make things work for now.  Cleanup later.
-def load_exposure(location, draw):
-    key = f'{project_globals.MATERNAL_MALNUTRITION_MODEL_NAME}_exposure_draw_{draw}'
-    seed = get_hash(key)
-    mean = project_globals.MALNOURISHED_MOTHERS_PROPORTION_MEAN[location]
-    variance = project_globals.MALNOURISHED_MOTHERS_PROPORTION_VARIANCE[location]
-    exposure = sample_beta_distribution(seed, mean=mean, variance=variance, lower_bound=0, upper_bound=1)
-    return exposure
-
-
-def load_relative_risk(draw):
-    key = f'{project_globals.MATERNAL_MALNUTRITION_MODEL_NAME}_relative_risk_draw_{draw}'
-    seed = get_hash(key)
-    return sample_gamma_distribution(seed, **project_globals.MALNOURISHED_MOTHERS_EFFECT_RR_PARAMETERS)
+class AgeSexShiftTable:
+    """CGF exposure shifts by age group and sex, compiled for vectorized lookup.
+
+    The shifts are held in (sex, age bin) arrays over the sorted age group
+    edges, so the shift for a population is a single ``searchsorted`` and
+    gather however many ages and groups there are.  Simulants outside every
+    age group, or of a sex without shifts, are not shifted.
+    """
+
+    def __init__(self, shifts: dict):
+        """
+        Parameters
+        ----------
+        shifts
+            Mapping of (age_start, age_end, sex) to [shift_up, shift_down].
+        """
+        self.sexes = pd.Index(sorted({sex for _, _, sex in shifts}))
+        self.age_edges = np.unique([age for age_start, age_end, _ in shifts for age in (age_start, age_end)])
+        # Bin i + 1 is [age_edges[i], age_edges[i + 1]); the last row is for unknown sexes.
+        self.shift_up = np.zeros((len(self.sexes) + 1, len(self.age_edges) + 1))
+        self.shift_down = np.zeros_like(self.shift_up)
+        bin_starts = np.append(-np.inf, self.age_edges)
+        for (age_start, age_end, sex), (shift_up, shift_down) in shifts.items():
+            in_group = np.flatnonzero((age_start <= bin_starts) & (bin_starts < age_end))
+            self.shift_up[self.sexes.get_loc(sex), in_group] += shift_up
+            self.shift_down[self.sexes.get_loc(sex), in_group] += shift_down
+
+    def get_shift(self, age: np.ndarray, sex: np.ndarray, shift_down: np.ndarray) -> np.ndarray:
+        """Returns the shift for each simulant, lowered for those flagged to shift down."""
+        age_bin = np.searchsorted(self.age_edges, age, side='right')
+        sex_index = self.sexes.get_indexer(sex)
+        return self.shift_up[sex_index, age_bin] - shift_down * self.shift_down[sex_index, age_bin]
 
 
-def compute_birth_weight_shift(artifact_path, draw, location, relative_risk):
-    maternal_malnutrition_exposure = load_exposure(location, draw)
+# TODO: A bunch of code here should be shared with the lbwsg component,
+# but just trying to make things work for now.  Cleanup later.
+def compute_birth_weight_shift(artifact_path, draw, maternal_malnutrition_exposure, relative_risk):
     mean_rr = relative_risk*maternal_malnutrition_exposure + 1*(1 - maternal_malnutrition_exposure)
     paf = (mean_rr - 1)/mean_rr
 
-    lbwsg_exposure = read_lbwsg_data_by_draw(artifact_path, draw)
-    birth_weight_categories = get_birth_weight_categories(artifact_path)
-
     sample_size = 100_000
-    shifts = {}
-    for sex in ['Male', 'Female']:
-        sample = sample_lbwsg_distribution(sample_size, sex, lbwsg_exposure, birth_weight_categories)
-        proportion_underweight = len(sample[sample.birth_weight < 2500])/len(sample)
-        low_bmi_mask = np.random.choice([True, False], sample_size,
-                                        p=[maternal_malnutrition_exposure, 1-maternal_malnutrition_exposure])
+    sexes = ['Male', 'Female']
+    samples, low_bmi_masks = [], []
+    for sex in sexes:
+        random_state = np.random.RandomState(get_hash(f'birth_weight_distribution_{sex}'))
+        birth_weight, _ = LBWSGSampler.from_artifact(artifact_path, draw, sex).sample(sample_size, random_state)
+        samples.append(birth_weight)
+        low_bmi_masks.append(random_state.choice([True, False], sample_size,
+                                                 p=[maternal_malnutrition_exposure, 1-maternal_malnutrition_exposure]))
 
-        target_underweight = proportion_underweight * (1 - paf)
+    shift_up, shift_down = solve_shifts(np.array(samples), np.array(low_bmi_masks), 2500, paf)
+    return {sex: [up, down] for sex, up, down in zip(sexes, shift_up, shift_down)}
 
-        def shift_up_objective(guess):
-            bw = sample.birth_weight + guess
-            mean_bw = len(bw[bw < 2500])/len(bw)
-            return (mean_bw - target_underweight)**2
 
-        shift_up = scipy.optimize.minimize(shift_up_objective, 100, method='Nelder-Mead', tol=1e-6).x[0]
-
-        def shift_down_objective(guess):
-            bw = sample.birth_weight + shift_up
-            bw[low_bmi_mask] -= guess
-            mean_bw = len(bw[bw < 2500]) / len(bw)
-            return (mean_bw - proportion_underweight) ** 2
-
-        shift_down = scipy.optimize.minimize(shift_down_objective, 100, method='Nelder-Mead', tol=1e-6).x[0]
-        shifts[sex] = [shift_up, shift_down]
-
-    return shifts
-
-
-def compute_birth_weight_shift_crude(draw, location):
+def compute_birth_weight_shift_crude(location, shift_down):
     prop_malnourished = project_globals.MALNOURISHED_MOTHERS_PROPORTION_MEAN[location]
     prop_typical = 1 - prop_malnourished
-    key = f'{project_globals.MATERNAL_MALNUTRITION_MODEL_NAME}_bw_shift_draw_{draw}_location_{location}'
-    seed = get_hash(key)
-    shift_down = sample_normal_distribution(seed, project_globals.CRUDE_BW_SHIFT, project_globals.CRUDE_BW_SHIFT_SD)
     shift_up = (prop_malnourished * shift_down) / prop_typical
     return (shift_up, shift_down)
 
 
-def compute_cgf_shifts(artifact_path, draw, location, cgf_risk, relative_risk):
-    maternal_malnutrition_exposure = load_exposure(location, draw)
+# Bump when the calibration changes so stale cached shifts are not reused.
+CGF_SHIFT_CALIBRATION_VERSION = 3
+
+
+def load_cgf_shifts(artifact_path, draw, location, cgf_risk, maternal_malnutrition_exposure, relative_risk):
+    """Loads CGF shifts from the calibration cache, computing them on a miss.
+
+    The shifts depend only on the arguments, so they are computed by the
+    first job for a draw and shared with every seed and scenario through a
+    cache directory beside the artifact.  Files are written to a temporary
+    name and atomically renamed, so concurrent jobs never read a partial
+    file; a job that loses the race just replaces it with the same shifts.
+    """
+    resolved_path = Path(artifact_path).resolve()
+    artifact_stat = resolved_path.stat()
+    inputs = [str(resolved_path), artifact_stat.st_mtime_ns, artifact_stat.st_size,
+              draw, location, cgf_risk, repr(float(maternal_malnutrition_exposure)), repr(float(relative_risk)),
+              CGF_SHIFT_CALIBRATION_VERSION]
+    key = hashlib.sha256(json.dumps(inputs).encode()).hexdigest()
+    cache_path = resolved_path.parent / 'calibration_cache' / f'{cgf_risk}_shifts_{key}.json'
+
+    try:
+        with cache_path.open() as f:
+            records = json.load(f)
+        return {(age_start, age_end, sex): [shift_up, shift_down]
+                for age_start, age_end, sex, shift_up, shift_down in records}
+    except (OSError, ValueError):
+        pass
+
+    shifts = compute_cgf_shifts(artifact_path, draw, cgf_risk, maternal_malnutrition_exposure, relative_risk)
+    records = [[float(age_start), float(age_end), sex, float(shift_up), float(shift_down)]
+               for (age_start, age_end, sex), (shift_up, shift_down) in shifts.items()]
+    try:
+        cache_path.parent.mkdir(parents=True, exist_ok=True)
+        fd, temp_path = tempfile.mkstemp(dir=str(cache_path.parent), suffix='.tmp')
+    except OSError:
+        # The cache is an optimization; a read-only artifact directory is fine.
+        return shifts
+    try:
+        with os.fdopen(fd, 'w') as f:
+            json.dump(records, f)
+        os.replace(temp_path, str(cache_path))
+    except OSError:
+        pass
+    finally:
+        # The temporary file is left behind only if the write or the replace failed.
+        if os.path.exists(temp_path):
+            try:
+                os.remove(temp_path)
+            except OSError:
+                pass
+    return shifts
+
+
+def compute_cgf_shifts(artifact_path, draw, cgf_risk, maternal_malnutrition_exposure, relative_risk):
     mean_rr = relative_risk * maternal_malnutrition_exposure + 1 * (1 - maternal_malnutrition_exposure)
     paf = (mean_rr - 1) / mean_rr
 
     params, weights = get_cgf_exposure_parameters(artifact_path, draw, cgf_risk)
     sample_size = 100_000
     shifts = {}
+    groups, samples, low_bmi_masks = [], [], []
     for idx, mean, sd in params.itertuples():
         if mean == 0:
             shifts[idx] = [0, 0]
             continue
-        sample = sample_cgf_distribution(sample_size, mean, sd, weights, cgf_risk, idx)
-        proportion_exposed = len(sample[sample < 8]) / len(sample)
-        low_bmi_mask = np.random.choice([True, False], sample_size,
-                                        p=[maternal_malnutrition_exposure, 1 - maternal_malnutrition_exposure])
-
-        target_exposed = proportion_exposed * (1 - paf)
+        groups.append(idx)
+        samples.append(sample_cgf_distribution(sample_size, mean, sd, weights, cgf_risk, idx))
+        low_bmi_masks.append(np.random.choice([True, False], sample_size,
+                                              p=[maternal_malnutrition_exposure, 1 - maternal_malnutrition_exposure]))
 
-        def shift_up_objective(guess):
-            exposure = sample + guess
-            mean_exposed = len(exposure[exposure < 8]) / len(exposure)
-            return (mean_exposed - target_exposed) ** 2
-
-        shift_up = scipy.optimize.minimize(shift_up_objective, 1, method='Nelder-Mead', tol=1e-6).x[0]
-
-        def shift_down_objective(guess):
-            exposure = sample + shift_up
-            exposure[low_bmi_mask] -= guess
-            mean_exposed = len(exposure[exposure < 8]) / len(exposure)
-            return (mean_exposed - proportion_exposed) ** 2
-
-        shift_down = scipy.optimize.minimize(shift_down_objective, 1, method='Nelder-Mead', tol=1e-6).x[0]
-        shifts[idx] = [shift_up, shift_down]
-
-    return shifts
-
-
-def read_lbwsg_data_by_draw(artifact_path, draw):
-    key = 'risk_factor/low_birth_weight_and_short_gestation/exposure'
-    with pd.HDFStore(artifact_path, mode='r') as store:
-        index = store.get(f'{key}/index')
-        draw = store.get(f'{key}/draw_{draw}')
-    draw = draw.rename("value")
-    data = pd.concat([index, draw], axis=1)
-    data = data.drop(columns='location')
-    data = pivot_categorical(data)
-    data = (data[(data.age_start == 0) & (data.year_start == 2017)]
-            .drop(columns=['age_start', 'age_end', 'year_start', 'year_end'])
-            .set_index('sex'))
-    data[project_globals.LBWSG_MISSING_CATEGORY.CAT] = project_globals.LBWSG_MISSING_CATEGORY.EXPOSURE
-    return data
-
-
-def get_birth_weight_categories(path):
-    raw_category_dict = Artifact(path).load(f'risk_factor.low_birth_weight_and_short_gestation.categories')
-    raw_category_dict[project_globals.LBWSG_MISSING_CATEGORY.CAT] = project_globals.LBWSG_MISSING_CATEGORY.NAME
-    category_dict = {'category': [],
-                     'birth_weight_start': [],
-                     'birth_weight_end': []}
-    for key, value in raw_category_dict.items():
-        birth_weight = value.split(' wks, ')[1]
-        birth_weight_start, birth_weight_end = [
-            int(item) for item in birth_weight.lstrip('[').rstrip(') g').split(', ')
-        ]
-        category_dict['category'].append(key)
-        category_dict['birth_weight_start'].append(birth_weight_start)
-        category_dict['birth_weight_end'].append(birth_weight_end)
-    return pd.DataFrame(category_dict).set_index('category')
-
-
-def sample_lbwsg_distribution(sample_size, sex, exposure, categories):
-    seed = get_hash(f'birth_weight_distribution_{sex}')
-    np.random.seed(seed)
-    data = exposure.loc[sex, categories.index]
-    choices = np.random.choice(data.index.values, sample_size, p=data.values)
-    intervals = categories.loc[choices]
-    birth_weights = np.random.uniform(intervals.birth_weight_start, intervals.birth_weight_end, sample_size)
-    return pd.DataFrame({'birth_weight': birth_weights})
+    if groups:
+        shift_up, shift_down = solve_shifts(np.array(samples), np.array(low_bmi_masks), 8, paf)
+        shifts.update({idx: [up, down] for idx, up, down in zip(groups, shift_up, shift_down)})
+    return {idx: shifts[idx] for idx in params.index}
 
 
 def get_cgf_exposure_parameters(artifact_path, draw, risk):
@@ -325,9 +318,8 @@ def get_cgf_exposure_parameters(artifact_path, draw, risk):
 
 def sample_cgf_distribution(sample_size, mean, sd, weights, cgf_risk, group):
     seed = get_hash(f'{cgf_risk}_distribution_{group}')
-    np.random.seed(seed)
-    dist = EnsembleDistribution(weights=weights, mean=mean, sd=sd)
+    quantile_function = get_ensemble_quantile_function(weights, mean, sd)
     np.random.seed(seed)
     q = np.random.random(sample_size)
     q = clip(q)
-    return dist.ppf(q)
+    return quantile_function(q)
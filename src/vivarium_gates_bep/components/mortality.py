@@ -36,11 +36,62 @@ mortality hazard PAF pipeline (used internally). The cause specific rates are
 summed and added to the cause deleted mortality rate. These values are multiplied
 by 1 - PAF. The end product comprises the values in the mortality hazard pipeline.
 
+While the time step is processed, rate and hazard pipeline values computed for
+the living population are kept and values for any subset of it (the simulants
+who die) are sliced from them rather than computed again.
+
 """
+from contextlib import contextmanager
+
+from loguru import logger
 import pandas as pd
 
+from vivarium import Artifact
 from vivarium.framework.values import union_post_processor, list_combiner
 from vivarium_gates_bep import globals as project_globals
+from vivarium_gates_bep.components.cohort_lookup import CohortLookupTable
+from vivarium_gates_bep.components.state_table import get_state_table_schema
+
+
+class StepMemo:
+    """Reuses pipeline values within a single time step.
+
+    Outside of ``step`` the memo is a pass through.  Inside it, the first
+    value computed for each key, normally for the whole living population,
+    is kept and later requests for the same key with an index that is a
+    subset of the kept one are sliced from it.
+    Counts of hits and misses are kept by key.
+    """
+
+    def __init__(self):
+        self.hits = {}
+        self.misses = {}
+        self._values = None
+
+    @contextmanager
+    def step(self):
+        self._values = {}
+        try:
+            yield
+        finally:
+            self._values = None
+
+    def get(self, key, pipeline, index):
+        if self._values is None:
+            return pipeline(index)
+        cached = self._values.get(key)
+        if cached is not None and index.isin(cached.index).all():
+            self.hits[key] = self.hits.get(key, 0) + 1
+            return cached.loc[index]
+        self.misses[key] = self.misses.get(key, 0) + 1
+        value = pipeline(index)
+        if cached is None:
+            self._values[key] = value
+        return value
+
+    def info(self):
+        return {key: {'hits': self.hits.get(key, 0), 'misses': self.misses.get(key, 0)}
+                for key in sorted(set(self.hits) | set(self.misses))}
 
 
 class Mortality:
@@ -51,18 +102,18 @@ class Mortality:
 
     def setup(self, builder):
         all_cause_mortality_data = builder.data.load("cause.all_causes.cause_specific_mortality_rate")
-        self.all_cause_mortality_rate = builder.lookup.build_table(all_cause_mortality_data,
-                                                                   key_columns=['sex'],
-                                                                   parameter_columns=['age', 'year'])
+        self.all_cause_mortality_rate = CohortLookupTable(builder, all_cause_mortality_data,
+                                                          key_columns=['sex'],
+                                                          parameter_columns=['age', 'year'])
 
         self.cause_specific_mortality_rate = builder.value.register_value_producer(
             'cause_specific_mortality_rate', source=builder.lookup.build_table(0)
         )
 
         affected_unmodeled_lb_csmr_data = self.load_unmodeled_lb_affected_csmr(builder)
-        self._affected_unmodeled_csmr = builder.lookup.build_table(affected_unmodeled_lb_csmr_data,
-                                                                      key_columns=['sex'],
-                                                                      parameter_columns=['age', 'year'])
+        self._affected_unmodeled_csmr = CohortLookupTable(builder, affected_unmodeled_lb_csmr_data,
+                                                          key_columns=['sex'],
+                                                          parameter_columns=['age', 'year'])
         self.affected_unmodeled_csmr = builder.value.register_value_producer('affected_unmodeled.csmr',
                                                                              source=self.get_affected_unmodeled_csmr,
                                                                              requires_columns=['age', 'sex'])
@@ -87,10 +138,12 @@ class Mortality:
         )
 
         life_expectancy_data = builder.data.load("population.theoretical_minimum_risk_life_expectancy")
-        self.life_expectancy = builder.lookup.build_table(life_expectancy_data, parameter_columns=['age'])
+        self.life_expectancy = CohortLookupTable(builder, life_expectancy_data, parameter_columns=['age'])
 
         self.random = builder.randomness.get_stream('mortality_handler')
         self.clock = builder.time.clock()
+        self.step_memo = StepMemo()
+        self.schema = get_state_table_schema(builder)
 
         columns_created = ['cause_of_death', 'years_of_life_lost']
         view_columns = columns_created + ['alive', 'exit_time', 'age', 'sex', 'location']
@@ -99,26 +152,35 @@ class Mortality:
                                                  creates_columns=columns_created)
 
         builder.event.register_listener('time_step', self.on_time_step, priority=0)
+        builder.event.register_listener('simulation_end', self.on_simulation_end)
 
     def on_initialize_simulants(self, pop_data):
         pop_update = pd.DataFrame({'cause_of_death': 'not_dead',
                                    'years_of_life_lost': 0.},
                                   index=pop_data.index)
-        self.population_view.update(pop_update)
+        self.population_view.update(self.schema.apply(pop_update))
 
     def on_time_step(self, event):
+        with self.step_memo.step():
+            self.apply_deaths(event)
+
+    def apply_deaths(self, event):
         pop = self.population_view.get(event.index, query="alive =='alive'")
-        mortality_hazard = self.mortality_hazard(pop.index)
+        mortality_hazard = self.step_memo.get('all_causes.mortality_hazard', self.mortality_hazard, pop.index)
         deaths = self.random.filter_for_rate(pop.index, mortality_hazard, additional_key='death')
         if not deaths.empty:
-            cause_of_death_weights = self.mortality_rate(deaths).divide(mortality_hazard.loc[deaths], axis=0)
+            mortality_rate = self.step_memo.get('mortality_rate', self.mortality_rate, deaths)
+            cause_of_death_weights = mortality_rate.divide(mortality_hazard.loc[deaths], axis=0)
             cause_of_death = self.random.choice(deaths, cause_of_death_weights.columns, cause_of_death_weights,
                                                 additional_key='cause_of_death')
             pop.loc[deaths, 'alive'] = 'dead'
             pop.loc[deaths, 'exit_time'] = event.time
             pop.loc[deaths, 'years_of_life_lost'] = self.life_expectancy(deaths)
             pop.loc[deaths, 'cause_of_death'] = cause_of_death
-            self.population_view.update(pop)
+            self.population_view.update(self.schema.apply(pop))
+
+    def on_simulation_end(self, event):
+        logger.debug(f'Mortality step memo: {self.step_memo.info()}')
 
     def calculate_mortality_rate(self, index):
         acmr = self.all_cause_mortality_rate(index)
@@ -129,7 +191,7 @@ class Mortality:
         return pd.DataFrame({'other_causes': cause_deleted_mortality_rate})
 
     def _mortality_hazard(self, index):
-        mortality_rates = pd.DataFrame(self.mortality_rate(index))
+        mortality_rates = pd.DataFrame(self.step_memo.get('mortality_rate', self.mortality_rate, index))
         mortality_hazard = mortality_rates.sum(axis=1)
         paf = self._mortality_hazard_paf(index)
         return mortality_hazard * (1 - paf)
@@ -140,6 +202,8 @@ class Mortality:
         return raw_csmr * (1 - paf)
 
     def load_unmodeled_lb_affected_csmr(self, builder):
+        if project_globals.AFFECTED_UNMODELLED_LBWSG_CSMR in Artifact(builder.configuration.input_data.artifact_path):
+            return builder.data.load(project_globals.AFFECTED_UNMODELLED_LBWSG_CSMR)
         df = pd.DataFrame()
         for idx, cause in enumerate(project_globals.UNMODELLED_LBWSG_AFFECTED_CAUSES):
             if 0 == idx:
@@ -1,6 +1,7 @@
 from collections import Counter
 from itertools import product
 
+import numpy as np
 import pandas as pd
 from vivarium_public_health.metrics import (MortalityObserver as MortalityObserver_,
                                             DisabilityObserver as DisabilityObserver_)
@@ -10,6 +11,7 @@ from vivarium_public_health.metrics.utilities import (get_output_template, get_g
                                                       get_years_lived_with_disability)
 
 from vivarium_gates_bep import globals as project_globals
+from vivarium_gates_bep.components.state_table import get_state_table_schema
 
 
 class MortalityObserver(MortalityObserver_):
@@ -156,6 +158,7 @@ class DiseaseObserver:
         self.transitions = project_globals.DISEASE_MODEL_MAP[self.disease]['transitions']
 
         self.previous_state_column = f'previous_{self.disease}'
+        self.schema = get_state_table_schema(builder)
         builder.population.initializes_simulants(self.on_initialize_simulants,
                                                  creates_columns=[self.previous_state_column])
 
@@ -178,7 +181,8 @@ class DiseaseObserver:
         builder.event.register_listener('collect_metrics', self.on_collect_metrics)
 
     def on_initialize_simulants(self, pop_data):
-        self.population_view.update(pd.Series('', index=pop_data.index, name=self.previous_state_column))
+        self.population_view.update(self.schema.apply(pd.Series('', index=pop_data.index,
+                                                                name=self.previous_state_column)))
 
     def on_time_step_prepare(self, event):
         pop = self.population_view.get(event.index)
@@ -199,7 +203,7 @@ class DiseaseObserver:
         # This enables tracking of transitions between states
         prior_state_pop = self.population_view.get(event.index)
         prior_state_pop[self.previous_state_column] = prior_state_pop[self.disease]
-        self.population_view.update(prior_state_pop)
+        self.population_view.update(self.schema.apply(prior_state_pop))
 
     def on_collect_metrics(self, event):
         pop = self.population_view.get(event.index)
@@ -225,17 +229,26 @@ class DiseaseObserver:
 
 
 class ChildGrowthFailureObserver():
+    """Records CGF z-score summaries and category counts for the newborn cohort.
+
+    The cohort ages in lockstep, so its age is tracked from the step sizes
+    alone, exactly as the population ages it, and the state table is only
+    read on the steps where it passes a record point.
+    """
 
     @property
     def name(self):
         return f'risk_observer.child_growth_failure'
 
     def setup(self, builder):
-        self.wasting = builder.value.get_value(f'{project_globals.WASTING_MODEL_NAME}.exposure')
-        self.stunting = builder.value.get_value(f'{project_globals.STUNTING_MODEL_NAME}.exposure')
+        self.risks = {'wasting': project_globals.WASTING_MODEL_NAME, 'stunting': project_globals.STUNTING_MODEL_NAME}
+        self.exposures = {name: builder.value.get_value(f'{risk}.exposure') for name, risk in self.risks.items()}
+        self.category_thresholds = {name: builder.configuration[risk].category_thresholds
+                                    for name, risk in self.risks.items()}
 
         self.record_points = [(project_globals.Z_SCORE_TIMEPOINTS[0], project_globals.TWENTY_NINE_DAYS),
                               (project_globals.Z_SCORE_TIMEPOINTS[1], project_globals.THREE_SIX_SIX_DAYS)]
+        self.cohort_age = builder.configuration.population.age_start
         self.results = self.get_results_template()
         self.population_view = builder.population.get_view(['age', 'sex',
                                                             project_globals.MOTHER_NUTRITION_STATUS_COLUMN,
@@ -246,19 +259,14 @@ class ChildGrowthFailureObserver():
         builder.value.register_value_modifier('metrics', self.metrics)
 
     def on_collect_metrics(self, event):
+        # Simulants are aged on time_step__cleanup, before metrics are collected.
+        self.cohort_age += to_years(event.step_size)
+        tp_name, tp_value = get_record_point(self.cohort_age, to_years(event.step_size), self.record_points)
+        if tp_name is None:
+            return
         pop = self.population_view.get(event.index)
-        yes_record, tp_name, tp_value = is_record_point(pop.age, self.record_points, event.step_size)
-        if yes_record:
-            pop = pop[(tp_value <= pop.age) & (pop.age < tp_value + to_years(event.step_size))]
-            categories = product(project_globals.MOTHER_NUTRITION_CATEGORIES, project_globals.TREATMENTS)
-            for mother_cat, treatment in categories:
-                pop_in_group = pop.loc[(pop[project_globals.MOTHER_NUTRITION_STATUS_COLUMN] == mother_cat)
-                                       & (pop[project_globals.SCENARIO_COLUMN] == treatment)]
-
-                stats = self.get_cgf_stats(pop_in_group, tp_name)
-                stats = {f'{k}_mother_{mother_cat}_treatment_{treatment}': v
-                         for k, v in stats.items()}
-                self.results.update(stats)
+        pop = pop[(tp_value <= pop.age) & (pop.age < tp_value + to_years(event.step_size))]
+        self.results.update(self.get_cgf_stats(pop, tp_name))
 
     def get_results_template(self):
         stats = {}
@@ -277,22 +285,26 @@ class ChildGrowthFailureObserver():
         return stats
 
     def get_cgf_stats(self, pop, timepoint):
+        """Summarizes each exposure for every mother nutrition and treatment group present."""
         stats = {}
-        if not pop.empty:
-            pop = pop.drop(columns='age')
-            pop['wasting_z'] = self.wasting(pop.index, skip_post_processor=True)
-            pop['wasting_cat'] = self.wasting(pop.index)
-            pop['stunting_z'] = self.stunting(pop.index, skip_post_processor=True)
-            pop['stunting_cat'] = self.stunting(pop.index)
-
-            stats[f'wasting_z_score_mean_at_{timepoint}'] = pop.wasting_z.mean()
-            stats[f'wasting_z_score_sd_at_{timepoint}'] = pop.wasting_z.std()
-            stats[f'stunting_z_score_mean_at_{timepoint}'] = pop.stunting_z.mean()
-            stats[f'stunting_z_score_sd_at_{timepoint}'] = pop.stunting_z.std()
-            for cat, value in dict(pop.wasting_cat.value_counts()).items():
-                stats[f'wasting_{cat}_exposed_at_{timepoint}'] = value
-            for cat, value in dict(pop.stunting_cat.value_counts()).items():
-                stats[f'stunting_{cat}_exposed_at_{timepoint}'] = value
+        if pop.empty:
+            return stats
+        strata = [project_globals.MOTHER_NUTRITION_STATUS_COLUMN, project_globals.SCENARIO_COLUMN]
+        pop = pop[strata]
+        for name, exposure in self.exposures.items():
+            # Evaluated once and categorized as the exposure post-processor would.
+            z = exposure(pop.index, skip_post_processor=True)
+            data = pop.assign(z=z, category=get_cgf_category(z.values, self.category_thresholds[name]))
+
+            summary = data.groupby(strata, observed=True).z.agg(['mean', 'std'])
+            for (mother_cat, treatment), (mean, sd) in summary.iterrows():
+                suffix = f'mother_{mother_cat}_treatment_{treatment}'
+                stats[f'{name}_z_score_mean_at_{timepoint}_{suffix}'] = mean
+                stats[f'{name}_z_score_sd_at_{timepoint}_{suffix}'] = sd
+
+            counts = data.groupby(strata + ['category'], observed=True).size()
+            for (mother_cat, treatment, cat), count in counts.items():
+                stats[f'{name}_{cat}_exposed_at_{timepoint}_mother_{mother_cat}_treatment_{treatment}'] = count
         return stats
 
     def metrics(self, index, metrics):
@@ -300,20 +312,25 @@ class ChildGrowthFailureObserver():
         return metrics
 
 
-def get_age_from_sparse(age_values: pd.Series) -> float:
-    """ input is a pd.Series containing identical float values. I want a single float value
-        but no index value is always valid.
-    """
-    vc = age_values.value_counts()
-    return vc.index[0]
+def get_record_point(cohort_age, step_size, timepoints):
+    """The record point the cohort passed on the step just taken, if any."""
+    for name, value in timepoints:
+        if value <= cohort_age < value + step_size:
+            return name, value
+    return None, None
 
 
-def is_record_point(sim_ages, timepoints, step_size):
-    sim_age = get_age_from_sparse(sim_ages)
-    for name, value in timepoints:
-        if value <= sim_age and sim_age < value + to_years(step_size):
-            return (True, name, value)
-    return (False, None, None)
+def get_cgf_category(z, thresholds):
+    """Categorizes CGF z-scores as the exposure post-processor does.
+
+    Intervals are closed on the right and cat1 is the lowest.  Missing
+    z-scores get the category 'nan', as the post-processor's string cast
+    gives them.
+    """
+    thresholds = np.asarray(thresholds)
+    names = np.array([f'cat{i}' for i in range(1, len(thresholds) + 2)] + ['nan'])
+    category = np.digitize(z, thresholds, right=True)
+    return names[np.where(np.isnan(z), len(names) - 1, category)]
 
 
 class LBWSGObserver:
@@ -1,7 +1,9 @@
 import pandas as pd
+from loguru import logger
 from vivarium_public_health import utilities
 
 from vivarium_gates_bep import globals as project_globals
+from vivarium_gates_bep.components.state_table import get_memory_report, get_state_table_schema
 
 
 class NewbornPopulation:
@@ -12,7 +14,10 @@ class NewbornPopulation:
             'age_start': 0,
             'age_end': 0,
             'exit_age': 4,  # FIXME: Hack for the observers
-        }
+        },
+        'state_table': {
+            'float32': False,
+        },
     }
 
     @property
@@ -25,15 +30,18 @@ class NewbornPopulation:
         self.sex_probability = self.load_sex_probability(builder)
 
         self.randomness = builder.randomness.get_stream('population_sex')
+        self.schema = get_state_table_schema(builder)
 
         columns = ['index', 'age', 'sex', 'alive', 'location', 'entrance_time', 'exit_time']
         self.population_view = builder.population.get_view(columns)
         builder.population.initializes_simulants(self.on_initialize_simulants,
                                                  creates_columns=columns)
         self.register_simulants = builder.randomness.register_simulants
+        self.state_table_view = builder.population.get_view([])
 
         # Need to age people after everything else since age is used for all the data.
         builder.event.register_listener('time_step__cleanup', self.on_time_step_cleanup)
+        builder.event.register_listener('simulation_end', self.on_simulation_end)
 
     def on_initialize_simulants(self, pop_data):
         pop = pd.DataFrame({
@@ -47,7 +55,7 @@ class NewbornPopulation:
         pop['location'] = self.location
         pop['entrance_time'] = pop_data.creation_time
         pop['exit_time'] = pd.NaT
-        self.population_view.update(pop)
+        self.population_view.update(self.schema.apply(pop))
 
     def on_time_step_cleanup(self, event):
         """Ages simulants each time step."""
@@ -55,16 +63,25 @@ class NewbornPopulation:
         population['age'] += utilities.to_years(event.step_size)
         self.population_view.update(population)
 
+    def on_simulation_end(self, event):
+        report = get_memory_report(self.state_table_view.get(event.index))
+        logger.debug(f'State table memory usage:\n{report}')
+
     @staticmethod
     def load_sex_probability(builder):
         year_start = builder.configuration.time.start.year
         # Fixme: replace with live births
         pop_data = builder.data.load(project_globals.POPULATION_STRUCTURE)
-        if year_start not in pop_data.year_start:
-            year_start = pop_data.year_start.max()
-        pop_data = pop_data.loc[(pop_data.year_start == year_start) & (pop_data.age_start == 0)]
-        pop_data = pop_data.set_index('sex').value
-        return pop_data / pop_data.sum()
+        return get_sex_probability(pop_data, year_start)
 
     def __repr__(self):
         return "BasePopulation()"
+
+
+def get_sex_probability(pop_data, year_start):
+    """Returns the probability of each sex among newborns in a year."""
+    if year_start not in pop_data.year_start:
+        year_start = pop_data.year_start.max()
+    pop_data = pop_data.loc[(pop_data.year_start == year_start) & (pop_data.age_start == 0)]
+    pop_data = pop_data.set_index('sex').value
+    return pop_data / pop_data.sum()
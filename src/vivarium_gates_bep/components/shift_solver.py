@@ -0,0 +1,96 @@
+"""
+=====================
+Exposure Shift Solver
+=====================
+
+Solves for the exposure shifts used to apply the maternal malnutrition
+effect.  Everyone's exposure is shifted up so the fraction of a sample below
+a threshold falls to a target, then the exposure of a masked subset (the
+children of malnourished mothers) is shifted back down until the fraction
+below the threshold returns to its original value.
+
+Fractions of a fixed sample below a threshold move in steps of ``1 / n``, so
+rather than minimizing the squared error with an optimizer, the count that
+best matches each target is found directly and the shift is read off the
+sorted sample as the midpoint between the two order statistics that bound
+that count.  Every function takes one sample per row and solves all rows at
+once.
+
+"""
+from typing import Tuple
+
+import numpy as np
+
+
+def solve_shifts(samples: np.ndarray, mask: np.ndarray, threshold: float,
+                 paf: float) -> Tuple[np.ndarray, np.ndarray]:
+    """Finds the shift up for everyone and the shift down for the masked samples.
+
+    Parameters
+    ----------
+    samples
+        Exposure samples with one row per group.
+    mask
+        Boolean array the shape of ``samples`` marking the samples that are
+        shifted down.
+    threshold
+        Exposures strictly below the threshold count as exposed.
+    paf
+        The population attributable fraction of the mask.  The shift up
+        reduces the exposed fraction by this proportion.
+
+    Returns
+    -------
+        The shift up and shift down for each group.
+
+    """
+    samples = np.atleast_2d(samples)
+    mask = np.atleast_2d(mask)
+    proportion_exposed = np.mean(samples < threshold, axis=1)
+    shift_up = solve_shift_up(samples, threshold, proportion_exposed * (1 - paf))
+    shift_down = solve_shift_down(samples + shift_up[:, np.newaxis], mask, threshold, proportion_exposed)
+    return shift_up, shift_down
+
+
+def solve_shift_up(samples: np.ndarray, threshold: float, target: np.ndarray) -> np.ndarray:
+    """Finds ``s`` so the fraction of ``samples + s`` below the threshold is nearest the target."""
+    samples = np.atleast_2d(samples)
+    size = samples.shape[1]
+    count = get_nearest_count(target, size)
+    split = get_split_point(np.sort(samples, axis=1), count, np.full(len(samples), size))
+    return threshold - split
+
+
+def solve_shift_down(samples: np.ndarray, mask: np.ndarray, threshold: float, target: np.ndarray) -> np.ndarray:
+    """Finds ``d`` so the fraction below the threshold nears the target when masked samples are lowered by ``d``."""
+    samples = np.atleast_2d(samples)
+    mask = np.atleast_2d(mask)
+    count = get_nearest_count(target, samples.shape[1])
+    unmasked_count = np.sum(~mask & (samples < threshold), axis=1)
+    masked_size = np.sum(mask, axis=1)
+    masked_count = np.clip(count - unmasked_count, 0, masked_size)
+
+    masked_samples = np.sort(np.where(mask, samples, np.inf), axis=1)
+    split = get_split_point(masked_samples, masked_count, masked_size)
+    return np.where(masked_size > 0, split - threshold, 0.)
+
+
+def get_nearest_count(target: np.ndarray, size: int) -> np.ndarray:
+    """The number of ``size`` samples whose fraction is nearest the target."""
+    return np.clip(np.round(np.asarray(target) * size), 0, size).astype(int)
+
+
+def get_split_point(sorted_samples: np.ndarray, count: np.ndarray, size: np.ndarray) -> np.ndarray:
+    """A value with exactly ``count`` of the first ``size`` samples in each row strictly below it.
+
+    Between two order statistics the midpoint is used; below the smallest
+    sample the smallest sample itself works and above the largest the next
+    float up is used.
+    """
+    rows = np.arange(len(sorted_samples))
+    last = np.maximum(size - 1, 0)
+    lower = sorted_samples[rows, np.clip(count - 1, 0, last)]
+    upper = sorted_samples[rows, np.minimum(count, last)]
+    split = (lower + upper) / 2
+    split = np.where(count == 0, upper, split)
+    return np.where(count >= size, np.nextafter(lower, np.inf), split)
@@ -0,0 +1,99 @@
+"""
+==================
+State Table Schema
+==================
+
+Most string columns in the state table take a handful of values and are
+compared against them on every time step and in every observer stratum.
+They are stored as pandas categoricals with fixed category sets, so each
+simulant takes a byte per column and comparisons are done on integer codes.
+Continuous columns fixed at birth can optionally be narrowed to float32 with
+the ``state_table.float32`` configuration key.
+
+Vivarium rejects updates that change a column's dtype, so every component
+writing one of these columns passes its update through
+``StateTableSchema.apply``.  Disease state columns are written as plain
+strings by the vivarium_public_health state machine and are left alone.
+
+"""
+from typing import Union
+
+import numpy as np
+import pandas as pd
+
+from vivarium_gates_bep import globals as project_globals
+from vivarium_gates_bep.utilites import get_shared
+
+CATEGORIES = {
+    'alive': ('alive', 'dead', 'untracked'),
+    'sex': ('Male', 'Female'),
+    'location': tuple(project_globals.LOCATIONS),
+    'cause_of_death': ('not_dead',) + tuple(project_globals.CAUSES_OF_DEATH),
+    project_globals.MOTHER_NUTRITION_STATUS_COLUMN: tuple(project_globals.MOTHER_NUTRITION_CATEGORIES),
+    project_globals.BASELINE_COLUMN: tuple(project_globals.TREATMENTS),
+    project_globals.SCENARIO_COLUMN: tuple(project_globals.TREATMENTS),
+}
+CATEGORIES.update({
+    f'previous_{model}': ('',) + tuple(project_globals.DISEASE_MODEL_MAP[model]['states'])
+    for model in project_globals.DISEASE_MODEL_MAP
+})
+
+FLOAT32_COLUMNS = (
+    [project_globals.BIRTH_WEIGHT, project_globals.GESTATION_TIME, project_globals.BIRTH_WEIGHT_PROPENSITY]
+    + [f'{risk}_propensity' for risk in project_globals.CGF_BIRTH_WEIGHT_CORRELATION_PARAMETERS]
+)
+
+
+class StateTableSchema:
+    """The dtypes of the state table columns this project writes."""
+
+    def __init__(self, float32: bool = False):
+        self.dtypes = {column: pd.api.types.CategoricalDtype(categories)
+                       for column, categories in CATEGORIES.items()}
+        if float32:
+            self.dtypes.update({column: np.dtype(np.float32) for column in FLOAT32_COLUMNS})
+
+    def apply(self, data: Union[pd.DataFrame, pd.Series]) -> Union[pd.DataFrame, pd.Series]:
+        """Casts the schema columns of a state table update to their dtypes.
+
+        Raises
+        ------
+        ValueError
+            If a categorical column has values outside its categories.
+        """
+        if isinstance(data, pd.Series):
+            return self._cast(data.name, data)
+        columns = [column for column in data.columns if column in self.dtypes]
+        return data.assign(**{column: self._cast(column, data[column]) for column in columns})
+
+    def _cast(self, column: str, values: pd.Series) -> pd.Series:
+        dtype = self.dtypes.get(column)
+        if dtype is None or dtype == values.dtype:
+            return values
+        if isinstance(dtype, pd.api.types.CategoricalDtype):
+            unknown = ~values.isin(dtype.categories) & values.notnull()
+            if unknown.any():
+                raise ValueError(f'Values {sorted(set(values[unknown]))} are not categories '
+                                 f'of state table column {column}.')
+        return values.astype(dtype)
+
+
+def get_state_table_schema(builder) -> StateTableSchema:
+    """Returns the state table schema for a simulation."""
+    return get_shared(builder, _make_state_table_schema)
+
+
+def _make_state_table_schema(builder) -> StateTableSchema:
+    return StateTableSchema(builder.configuration.state_table.float32)
+
+
+def get_memory_report(state_table: pd.DataFrame) -> pd.DataFrame:
+    """Summarizes the dtype and memory use of each state table column."""
+    memory = state_table.memory_usage(index=False, deep=True)
+    report = pd.DataFrame({
+        'dtype': state_table.dtypes.astype(str),
+        'bytes': memory,
+        'bytes_per_simulant': memory / max(len(state_table), 1),
+    })
+    report.loc['total'] = ['', memory.sum(), memory.sum() / max(len(state_table), 1)]
+    return report
@@ -1,8 +1,8 @@
 import pandas as pd
-from vivarium.framework.randomness import get_hash
 
 from vivarium_gates_bep import globals as project_globals
-from vivarium_gates_bep.utilites import sample_beta_distribution
+from vivarium_gates_bep.components.state_table import get_state_table_schema
+from vivarium_gates_bep.data import parameters
 
 
 class MaternalSupplementationCoverage:
@@ -25,6 +25,7 @@ class MaternalSupplementationCoverage:
         self.scenario_coverage = self.load_coverage(builder, self.scenario)
 
         self.randomness = builder.randomness.get_stream(f'{project_globals.TREATMENT_MODEL_NAME}.propensity')
+        self.schema = get_state_table_schema(builder)
         columns = [project_globals.BASELINE_COLUMN, project_globals.SCENARIO_COLUMN]
         self.population_view = builder.population.get_view(columns)
         builder.population.initializes_simulants(self.on_initialize_simulants,
@@ -62,38 +63,14 @@ class MaternalSupplementationCoverage:
         else:
             raise NotImplementedError(f'Unhandled scenario "{self.scenario}"')
 
-        self.population_view.update(treatment)
+        self.population_view.update(self.schema.apply(treatment))
 
     def load_coverage(self, builder, scenario):
+        draw_parameters = parameters.get_draw_parameters(builder)
         if scenario == 'baseline' or '_low' in scenario:
-            coverage = load_ifa_proportion_among_general_population(
-                builder.configuration.input_data.input_draw_number,
-                builder.configuration.input_data.location
-            )
-            return coverage
+            return draw_parameters[parameters.IFA_COVERAGE]
         else:
-            anc_proportion = self.load_anc_proportion(builder)
-            return project_globals.ANC_SCALEUP * anc_proportion
-
-    @staticmethod
-    def load_anc_proportion(builder):
-        anc = builder.data.load(project_globals.COVARIATE_ANC1_COVERAGE)
-        anc = (anc[anc.year_start == 2017]
-               .drop(columns=['year_start', 'year_end'])
-               .set_index('parameter'))
-        variance = project_globals.confidence_interval_variance(anc.loc['upper_value'], anc.loc['lower_value'])
-        draw = builder.configuration.input_data.input_draw_number
-        key = f'anc_coverage_proportion_draw_{draw}'
-        seed = get_hash(key)
-        return sample_beta_distribution(seed, anc.loc['mean_value'], variance, 0, 1)
-
-
-def load_ifa_proportion_among_general_population(draw, location):
-    key = f'maternal_ifa_proportion_among_anc_draw_{draw}'
-    seed = get_hash(key)
-    mean = project_globals.IFA_COVERAGE_MEAN[location]
-    variance = project_globals.IFA_COVERAGE_VARIANCE[location]
-    return sample_beta_distribution(seed, mean, variance, 0, 1)
+            return project_globals.ANC_SCALEUP * draw_parameters[parameters.ANC_COVERAGE]
 
 
 class MaternalSupplementationEffect:
@@ -108,10 +85,7 @@ class MaternalSupplementationEffect:
     def setup(self, builder):
         tmp = builder.configuration.maternal_supplementation.scenario
         self.bep_treatment = tmp[:3] if tmp.startswith('bep') else tmp
-        self.p_ifa = load_ifa_proportion_among_general_population(
-            builder.configuration.input_data.input_draw_number,
-            builder.configuration.input_data.location
-        )
+        self.p_ifa = parameters.get_draw_parameters(builder)[parameters.IFA_COVERAGE]
         self.treatment_effects = self.load_treatment_effects(builder)
 
         columns = [project_globals.BASELINE_COLUMN,
@@ -124,10 +98,10 @@ class MaternalSupplementationEffect:
                                               requires_columns=columns)
 
         if self._enable_adjust_cgf:
-            builder.value.register_value_modifier(f'{project_globals.STUNTING_MODEL_NAME}.exposure',
+            builder.value.register_value_modifier(f'{project_globals.STUNTING_MODEL_NAME}.static_exposure',
                                                   self.adjust_cgf,
                                                   requires_columns=columns)
-            builder.value.register_value_modifier(f'{project_globals.WASTING_MODEL_NAME}.exposure',
+            builder.value.register_value_modifier(f'{project_globals.WASTING_MODEL_NAME}.static_exposure',
                                                   self.adjust_cgf,
                                                   requires_columns=columns)
 
@@ -172,23 +146,16 @@ class MaternalSupplementationEffect:
         scenario = builder.configuration.maternal_supplementation.scenario
         bep_effect_chooser = (project_globals.EFFECT_CURRENT_EVIDENCE
                               if '_ce_' in scenario else project_globals.EFFECT_HOPES_AND_DREAMS)
-        draw = builder.configuration.input_data.input_draw_number
-        seed = get_hash(f'ifa_effect_size_draw_{draw}')
-        ifa_effect = sample_beta_distribution(seed, **project_globals.IFA_BIRTH_WEIGHT_SHIFT_SIZE_PARAMETERS)
-        seed = get_hash(f'mmn_effect_size_draw_{draw}')
-        mmn_effect = sample_beta_distribution(seed, **project_globals.MMN_BIRTH_WEIGHT_SHIFT_SIZE_PARAMETERS)
-        seed = get_hash(f'bep_effect_size_draw_{draw}')
-        bep_normal_effect = sample_beta_distribution(
-            seed, **project_globals.BEP_BIRTH_WEIGHT_SHIFT_SIZE_NORMAL_PARAMETERS[bep_effect_chooser]
-        )
-        bep_malnourished_parameters = project_globals.BEP_BIRTH_WEIGHT_SHIFT_SIZE_MALNOURISHED[bep_effect_chooser]
-        bep_malnourished_effect = bep_malnourished_parameters['distribution'](
-            seed, **bep_malnourished_parameters['parameters']
-        )
-        bep_cgf_effect = (sample_beta_distribution(
-            seed, **project_globals.BEP_CGF_SHIFT_SIZE_PARAMETERS)
-            if bep_effect_chooser == project_globals.EFFECT_HOPES_AND_DREAMS
-            else project_globals.BEP_CE_CGF_SHIFT_SIZE)
+        draw_parameters = parameters.get_draw_parameters(builder)
+        ifa_effect = draw_parameters[parameters.IFA_BIRTH_WEIGHT_SHIFT]
+        mmn_effect = draw_parameters[parameters.MMN_BIRTH_WEIGHT_SHIFT]
+        bep_normal_effect = draw_parameters[
+            parameters.get_bep_parameter(parameters.BEP_BIRTH_WEIGHT_SHIFT_NORMAL, bep_effect_chooser)
+        ]
+        bep_malnourished_effect = draw_parameters[
+            parameters.get_bep_parameter(parameters.BEP_BIRTH_WEIGHT_SHIFT_MALNOURISHED, bep_effect_chooser)
+        ]
+        bep_cgf_effect = draw_parameters[parameters.get_bep_parameter(parameters.BEP_CGF_SHIFT, bep_effect_chooser)]
 
         return {
             project_globals.TREATMENTS.NONE: 0,
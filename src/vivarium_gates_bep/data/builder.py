@@ -12,7 +12,8 @@ import pandas as pd
 from vivarium.framework.artifact import Artifact, get_location_term, EntityKey
 
 from vivarium_gates_bep import globals as project_globals
-from vivarium_gates_bep.data import loader
+from vivarium_gates_bep.components import lbwsg
+from vivarium_gates_bep.data import draws, loader, parameters
 
 
 def open_artifact(output_path: Path, location: str) -> Artifact:
@@ -90,13 +91,33 @@ def write_data(artifact: Artifact, key: str, data: pd.DataFrame):
 
 
 def write_data_by_draw(artifact: Artifact, key: str, data: pd.DataFrame):
-    with pd.HDFStore(artifact.path, complevel=9, mode='a') as store:
+    """Writes draw level data to the artifact in the chunked draw layout.
+
+    See :mod:`vivarium_gates_bep.data.draws` for the layout.
+
+    """
+    key = EntityKey(key)
+    artifact._keys.append(key)
+    draws.write_draws(artifact.path, key, data)
+
+
+def write_draw_parameters(artifact: Artifact, location: str):
+    """Samples the draw level scalar parameters and writes them to the artifact.
+
+    See :mod:`vivarium_gates_bep.data.parameters` for the parameters.
+
+    """
+    key = project_globals.DRAW_PARAMETERS
+    if key in artifact:
+        logger.debug(f'Data for {key} already in artifact.  Skipping...')
+    else:
+        logger.debug(f'Sampling draw level parameters for location {location}.')
+        anc_coverage = parameters.get_anc_coverage(artifact.load(project_globals.COVARIATE_ANC1_COVERAGE), location)
+        data = parameters.sample_parameters([location], anc_coverage)
+        logger.debug(f'Writing data for {key} to artifact.')
         key = EntityKey(key)
         artifact._keys.append(key)
-        store.put(f'{key.path}/index', data.index.to_frame(index=False))
-        data = data.reset_index(drop=True)
-        for c in data.columns:
-            store.put(f'{key.path}/{c}', data[c])
+        parameters.write_parameters(artifact.path, key, data)
 
 
 def load_and_write_demographic_data(artifact: Artifact, location: str):
@@ -249,3 +270,53 @@ def load_and_write_affected_unmodelled_lbwsg_csmr(artifact: Artifact, location:
 def load_and_write_birth_weight_bin_data(artifact: Artifact, location: str):
     load_and_write_data(artifact, project_globals.BIRTH_WEIGHT_BINS, location)
 
+
+def write_derived_data(artifact: Artifact):
+    """Writes sim ready tables derived from data already in the artifact.
+
+    Components read these instead of reshaping the source data during
+    setup.
+
+    """
+    write_affected_unmodelled_lbwsg_csmr(artifact)
+    write_lbwsg_sim_data(artifact)
+
+
+def write_affected_unmodelled_lbwsg_csmr(artifact: Artifact):
+    key = project_globals.AFFECTED_UNMODELLED_LBWSG_CSMR
+    if key in artifact:
+        logger.debug(f'Data for {key} already in artifact.  Skipping...')
+        return
+    logger.debug('Summing cause specific mortality of unmodelled LBWSG affected causes.')
+    data = artifact.load(project_globals.UNMODELLED_LBWSG_AFFECTED_CAUSES[0]).copy()
+    draw_columns = [c for c in data.columns if str(c).startswith('draw_')]
+    for cause_key in project_globals.UNMODELLED_LBWSG_AFFECTED_CAUSES[1:]:
+        data[draw_columns] += artifact.load(cause_key)[draw_columns].values
+    write_data(artifact, key, data)
+
+
+def write_lbwsg_sim_data(artifact: Artifact):
+    keys = lbwsg.LBWSG_SIM_KEYS
+    if all(key in artifact for key in keys):
+        logger.debug(f'Data for {keys} already in artifact.  Skipping...')
+        return
+    logger.debug('Deriving sim ready LBWSG exposure, relative risk and PAF.')
+    categories = lbwsg.build_categories_by_interval(artifact.load(project_globals.LBWSG_CATEGORIES)).values
+    frames = {key: {} for key in keys}
+    for draw in draws.get_draws(artifact.path, project_globals.LBWSG_EXPOSURE):
+        exposure = lbwsg.get_sim_exposure_data(
+            draws.read_draw(artifact.path, project_globals.LBWSG_EXPOSURE, draw).drop(columns='location')
+        )
+        relative_risk = lbwsg.get_sim_relative_risk_data(
+            draws.read_draw(artifact.path, project_globals.LBWSG_RELATIVE_RISK, draw).drop(columns='location')
+        )
+        frames[project_globals.LBWSG_SIM_EXPOSURE][draw] = exposure
+        frames[project_globals.LBWSG_SIM_RELATIVE_RISK][draw] = relative_risk
+        frames[project_globals.LBWSG_SIM_PAF][draw] = lbwsg.get_population_attributable_fraction_data(
+            exposure, relative_risk, categories
+        )
+    for key in keys:
+        if key not in artifact:
+            logger.debug(f'Writing data for {key} to artifact.')
+            artifact._keys.append(EntityKey(key))
+            draws.write_draw_frames(artifact.path, key, frames[key], lbwsg.LBWSG_INDEX_COLUMNS)
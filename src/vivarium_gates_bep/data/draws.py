@@ -0,0 +1,137 @@
+"""Chunked storage for data with one column per draw.
+
+The draw level data (the LBWSG exposure, relative risk and PAF) is too large
+to store in the usual artifact format.  It is stored under its entity key as
+an ``index`` frame holding the demographic and category columns, shared by
+all draws, and a ``draws`` array of shape (draw, row) in float32.  The array
+is chunked one draw per chunk and compressed with a fast codec, so reading a
+single draw reads and decompresses exactly one chunk.
+
+Tables that are already in the shape the simulation uses, with one column
+per category for each draw, are stored the same way with a (draw, row,
+column) array chunked one draw per chunk.
+
+The previous layout, one ``draw_{n}`` series per draw, is still readable.
+
+"""
+from pathlib import Path
+from typing import List, Mapping, Sequence, Union
+
+import numpy as np
+import pandas as pd
+import tables
+
+DRAW_ARRAY = 'draws'
+
+
+def write_draws(path: Union[str, Path], key: str, data: pd.DataFrame,
+                complib: str = 'blosc:lz4', complevel: int = 5):
+    """Writes draw level data in the chunked layout.
+
+    Parameters
+    ----------
+    path
+        Path to the HDF file to write to.
+    key
+        The entity key associated with the data, e.g.
+        ``risk_factor.low_birth_weight_and_short_gestation.exposure``.
+    data
+        Data indexed by demographic and category columns with one
+        ``draw_{n}`` column per draw.
+    complib
+        Compression library for the draw array.
+    complevel
+        Compression level for the draw array.
+
+    """
+    key = key.replace('.', '/')
+    draws = [int(c.split('_')[-1]) for c in data.columns]
+    values = np.ascontiguousarray(data.values.T, dtype=np.float32)
+    with pd.HDFStore(str(path), mode='a') as store:
+        store.put(f'{key}/index', data.index.to_frame(index=False))
+    with tables.open_file(str(path), mode='a') as f:
+        filters = tables.Filters(complib=complib, complevel=complevel, shuffle=True)
+        array = f.create_carray(f'/{key}', DRAW_ARRAY, obj=values, filters=filters,
+                                chunkshape=(1, values.shape[1]))
+        array.attrs.draws = draws
+
+
+def write_draw_frames(path: Union[str, Path], key: str, frames: Mapping[int, pd.DataFrame],
+                      index_columns: Sequence[str], complib: str = 'blosc:lz4', complevel: int = 5):
+    """Writes one table per draw in the chunked layout.
+
+    Parameters
+    ----------
+    path
+        Path to the HDF file to write to.
+    key
+        The entity key associated with the data.
+    frames
+        A table for each draw.  The tables must share their index columns,
+        row order and value columns.
+    index_columns
+        The columns shared by all draws.  Every other column is stored by
+        draw.
+    complib
+        Compression library for the draw array.
+    complevel
+        Compression level for the draw array.
+
+    """
+    key = key.replace('.', '/')
+    draws = sorted(frames)
+    first = frames[draws[0]]
+    columns = [c for c in first.columns if c not in index_columns]
+    values = np.stack([frames[draw][columns].values for draw in draws]).astype(np.float32)
+    with pd.HDFStore(str(path), mode='a') as store:
+        store.put(f'{key}/index', first[list(index_columns)].reset_index(drop=True))
+    with tables.open_file(str(path), mode='a') as f:
+        filters = tables.Filters(complib=complib, complevel=complevel, shuffle=True)
+        array = f.create_carray(f'/{key}', DRAW_ARRAY, obj=values, filters=filters,
+                                chunkshape=(1,) + values.shape[1:])
+        array.attrs.draws = draws
+        array.attrs.columns = columns
+
+
+def get_draws(path: Union[str, Path], key: str) -> List[int]:
+    """Lists the draws stored for draw level data."""
+    key = key.replace('.', '/')
+    with pd.HDFStore(str(path), mode='r') as store:
+        array = store.get_node(f'{key}/{DRAW_ARRAY}')
+        if array is not None:
+            return [int(draw) for draw in array.attrs.draws]
+        return sorted(int(node._v_name.split('_')[-1]) for node in store.get_node(key)
+                      if node._v_name.startswith('draw_'))
+
+
+def read_draw(path: Union[str, Path], key: str, draw: int) -> pd.DataFrame:
+    """Reads a single draw of draw level data.
+
+    Parameters
+    ----------
+    path
+        Path to the HDF file to read from.
+    key
+        The entity key associated with the data.
+    draw
+        The draw to read.
+
+    Returns
+    -------
+        The index columns and the draw as a ``value`` column, or as the
+        stored columns for tables written with ``write_draw_frames``.
+
+    """
+    key = key.replace('.', '/')
+    with pd.HDFStore(str(path), mode='r') as store:
+        index = store.get(f'{key}/index')
+        array = store.get_node(f'{key}/{DRAW_ARRAY}')
+        if array is not None and array.ndim == 3:
+            position = list(array.attrs.draws).index(draw)
+            value = pd.DataFrame(array[position].astype(np.float64), columns=list(array.attrs.columns))
+        elif array is not None:
+            position = list(array.attrs.draws).index(draw)
+            value = pd.Series(array[position].astype(np.float64), name='value')
+        else:
+            value = store.get(f'{key}/draw_{draw}').rename('value')
+    return pd.concat([index, value], axis=1)
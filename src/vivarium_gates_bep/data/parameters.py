@@ -0,0 +1,190 @@
+"""Draw level scalar parameters.
+
+Several model parameters are single values per draw sampled from a
+distribution around a point estimate: the malnourished mothers proportion
+and relative risk, coverage proportions, treatment effect sizes and the
+birth weight correlations of child growth failure.  They are all sampled
+here at once, for every draw and location, by evaluating each
+distribution's quantile function at a fixed set of uniform draws, and the
+result is written to the artifact as one small table.
+
+Each parameter has its own stream of uniform draws, seeded from its name,
+with one draw per input draw, so the value for a draw does not depend on
+which other draws or locations are sampled.  Parameters that only differ
+by effect size assumptions share a stream.
+
+"""
+from pathlib import Path
+from typing import Iterable, Sequence, Union
+
+import numpy as np
+import pandas as pd
+from vivarium.framework.randomness import get_hash
+
+from vivarium_gates_bep import globals as project_globals
+from vivarium_gates_bep.utilites import (beta_distribution_ppf, gamma_distribution_ppf, get_shared,
+                                         normal_distribution_ppf, truncnorm_ppf)
+
+MATERNAL_MALNUTRITION_EXPOSURE = 'maternal_malnutrition_exposure'
+MATERNAL_MALNUTRITION_RELATIVE_RISK = 'maternal_malnutrition_relative_risk'
+MATERNAL_MALNUTRITION_BIRTH_WEIGHT_SHIFT = 'maternal_malnutrition_birth_weight_shift'
+IFA_COVERAGE = 'ifa_coverage'
+ANC_COVERAGE = 'anc_coverage'
+IFA_BIRTH_WEIGHT_SHIFT = 'ifa_birth_weight_shift'
+MMN_BIRTH_WEIGHT_SHIFT = 'mmn_birth_weight_shift'
+BEP_BIRTH_WEIGHT_SHIFT_NORMAL = 'bep_birth_weight_shift_normal'
+BEP_BIRTH_WEIGHT_SHIFT_MALNOURISHED = 'bep_birth_weight_shift_malnourished'
+BEP_CGF_SHIFT = 'bep_cgf_shift'
+CGF_BIRTH_WEIGHT_CORRELATION = 'birth_weight_correlation'
+
+EFFECTS = [project_globals.EFFECT_CURRENT_EVIDENCE, project_globals.EFFECT_HOPES_AND_DREAMS]
+
+
+def get_bep_parameter(name: str, effect: str) -> str:
+    """The column of a BEP effect size under one set of effect assumptions."""
+    return f'{name}_{effect}'
+
+
+def get_correlation_parameter(risk: str) -> str:
+    """The column of the birth weight correlation of a child growth failure risk."""
+    return f'{risk}_{CGF_BIRTH_WEIGHT_CORRELATION}'
+
+
+def get_quantiles(name: str, draws: np.ndarray) -> np.ndarray:
+    """Returns the uniform draws for a parameter at the given input draws."""
+    random_state = np.random.RandomState(get_hash(f'{name}_parameter_draws'))
+    return random_state.random_sample(project_globals.NUM_DRAWS)[draws]
+
+
+def sample_parameters(locations: Sequence[str], anc_coverage: pd.DataFrame,
+                      draws: Iterable[int] = None) -> pd.DataFrame:
+    """Samples every draw level scalar parameter.
+
+    Parameters
+    ----------
+    locations
+        The locations to sample parameters for.
+    anc_coverage
+        ANC coverage indexed by location with ``mean_value``, ``lower_value``
+        and ``upper_value`` columns, as produced by ``get_anc_coverage``.
+    draws
+        The input draws to sample.  Defaults to all of them.
+
+    Returns
+    -------
+        The parameters indexed by location and draw with one column per
+        parameter.
+
+    """
+    draws = np.arange(project_globals.NUM_DRAWS) if draws is None else np.asarray(list(draws))
+
+    def by_location(values):
+        return np.array([values[location] for location in locations], dtype=float)[:, np.newaxis]
+
+    q = {}
+    for name in [MATERNAL_MALNUTRITION_EXPOSURE, MATERNAL_MALNUTRITION_RELATIVE_RISK,
+                 MATERNAL_MALNUTRITION_BIRTH_WEIGHT_SHIFT, IFA_COVERAGE, ANC_COVERAGE, IFA_BIRTH_WEIGHT_SHIFT,
+                 MMN_BIRTH_WEIGHT_SHIFT, BEP_BIRTH_WEIGHT_SHIFT_NORMAL, BEP_BIRTH_WEIGHT_SHIFT_MALNOURISHED,
+                 BEP_CGF_SHIFT] + [get_correlation_parameter(risk)
+                                   for risk in project_globals.CGF_BIRTH_WEIGHT_CORRELATION_PARAMETERS]:
+        q[name] = get_quantiles(name, draws)
+
+    anc_coverage = anc_coverage.loc[list(locations)]
+    parameters = {
+        MATERNAL_MALNUTRITION_EXPOSURE: beta_distribution_ppf(
+            q[MATERNAL_MALNUTRITION_EXPOSURE],
+            mean=by_location(project_globals.MALNOURISHED_MOTHERS_PROPORTION_MEAN),
+            variance=by_location(project_globals.MALNOURISHED_MOTHERS_PROPORTION_VARIANCE),
+            upper_bound=1, lower_bound=0
+        ),
+        MATERNAL_MALNUTRITION_RELATIVE_RISK: gamma_distribution_ppf(
+            q[MATERNAL_MALNUTRITION_RELATIVE_RISK], **project_globals.MALNOURISHED_MOTHERS_EFFECT_RR_PARAMETERS
+        ),
+        MATERNAL_MALNUTRITION_BIRTH_WEIGHT_SHIFT: normal_distribution_ppf(
+            q[MATERNAL_MALNUTRITION_BIRTH_WEIGHT_SHIFT], project_globals.CRUDE_BW_SHIFT,
+            project_globals.CRUDE_BW_SHIFT_SD
+        ),
+        IFA_COVERAGE: beta_distribution_ppf(
+            q[IFA_COVERAGE],
+            mean=by_location(project_globals.IFA_COVERAGE_MEAN),
+            variance=by_location(project_globals.IFA_COVERAGE_VARIANCE),
+            upper_bound=1, lower_bound=0
+        ),
+        ANC_COVERAGE: beta_distribution_ppf(
+            q[ANC_COVERAGE],
+            mean=anc_coverage.mean_value.values[:, np.newaxis],
+            variance=project_globals.confidence_interval_variance(anc_coverage.upper_value.values,
+                                                                  anc_coverage.lower_value.values)[:, np.newaxis],
+            upper_bound=1, lower_bound=0
+        ),
+        IFA_BIRTH_WEIGHT_SHIFT: beta_distribution_ppf(
+            q[IFA_BIRTH_WEIGHT_SHIFT], **project_globals.IFA_BIRTH_WEIGHT_SHIFT_SIZE_PARAMETERS
+        ),
+        MMN_BIRTH_WEIGHT_SHIFT: beta_distribution_ppf(
+            q[MMN_BIRTH_WEIGHT_SHIFT], **project_globals.MMN_BIRTH_WEIGHT_SHIFT_SIZE_PARAMETERS
+        ),
+    }
+    for effect in EFFECTS:
+        parameters[get_bep_parameter(BEP_BIRTH_WEIGHT_SHIFT_NORMAL, effect)] = beta_distribution_ppf(
+            q[BEP_BIRTH_WEIGHT_SHIFT_NORMAL], **project_globals.BEP_BIRTH_WEIGHT_SHIFT_SIZE_NORMAL_PARAMETERS[effect]
+        )
+        malnourished_parameters = project_globals.BEP_BIRTH_WEIGHT_SHIFT_SIZE_MALNOURISHED[effect]
+        parameters[get_bep_parameter(BEP_BIRTH_WEIGHT_SHIFT_MALNOURISHED, effect)] = (
+            malnourished_parameters['distribution'](q[BEP_BIRTH_WEIGHT_SHIFT_MALNOURISHED],
+                                                    **malnourished_parameters['parameters'])
+        )
+        parameters[get_bep_parameter(BEP_CGF_SHIFT, effect)] = (
+            beta_distribution_ppf(q[BEP_CGF_SHIFT], **project_globals.BEP_CGF_SHIFT_SIZE_PARAMETERS)
+            if effect == project_globals.EFFECT_HOPES_AND_DREAMS
+            else np.full(len(draws), project_globals.BEP_CE_CGF_SHIFT_SIZE)
+        )
+    for risk, (mean, lower_bound, upper_bound, clip_lower, clip_upper) in (
+            project_globals.CGF_BIRTH_WEIGHT_CORRELATION_PARAMETERS.items()):
+        std = project_globals.confidence_interval_std(upper_bound, lower_bound)
+        name = get_correlation_parameter(risk)
+        parameters[name] = truncnorm_ppf(q[name], mean, std, clip_lower, clip_upper)
+
+    shape = (len(locations), len(draws))
+    index = pd.MultiIndex.from_product([list(locations), draws], names=['location', 'draw'])
+    return pd.DataFrame({name: np.broadcast_to(values, shape).ravel() for name, values in parameters.items()},
+                        index=index)
+
+
+def get_anc_coverage(data: pd.DataFrame, location: str, year: int = 2017) -> pd.DataFrame:
+    """Formats ANC coverage estimates for ``sample_parameters``."""
+    data = data.reset_index()
+    data = data[data.year_start == year].set_index('parameter').value
+    return pd.DataFrame({parameter: [data[parameter]] for parameter in ['mean_value', 'lower_value', 'upper_value']},
+                        index=[location])
+
+
+def write_parameters(path: Union[str, Path], key: str, data: pd.DataFrame):
+    """Writes the parameter table under its entity key."""
+    with pd.HDFStore(str(path), complevel=9, mode='a') as store:
+        store.put(key.replace('.', '/'), data)
+
+
+def read_parameters(path: Union[str, Path], key: str) -> pd.DataFrame:
+    """Reads the parameter table, raising a ``KeyError`` if it isn't there."""
+    return pd.read_hdf(str(path), key.replace('.', '/'))
+
+
+def get_draw_parameters(builder) -> pd.Series:
+    """Returns the scalar parameters for the simulation's location and draw.
+
+    Parameters are read from the artifact.  Artifacts built before the table
+    was added get the same values by sampling the draw here.
+    """
+    return get_shared(builder, _load_draw_parameters)
+
+
+def _load_draw_parameters(builder) -> pd.Series:
+    location = builder.configuration.input_data.location
+    draw = builder.configuration.input_data.input_draw_number
+    try:
+        data = read_parameters(builder.configuration.input_data.artifact_path,
+                               project_globals.DRAW_PARAMETERS)
+    except KeyError:
+        anc_coverage = get_anc_coverage(builder.data.load(project_globals.COVARIATE_ANC1_COVERAGE), location)
+        data = sample_parameters([location], anc_coverage, draws=[draw])
+    return data.loc[(location, draw)]
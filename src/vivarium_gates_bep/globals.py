@@ -1,7 +1,7 @@
 import itertools
 from typing import NamedTuple
 
-from vivarium_gates_bep.utilites import sample_beta_distribution, sample_normal_distribution
+from vivarium_gates_bep.utilites import beta_distribution_ppf, normal_distribution_ppf
 
 ####################
 # Project metadata #
@@ -15,6 +15,8 @@ MAKE_ARTIFACT_MEM = '3G'
 MAKE_ARTIFACT_CPU = '1'
 MAKE_ARTIFACT_RUNTIME = '4:00:00'
 
+NUM_DRAWS = 1000
+
 LOCATIONS = [
     'India',
     'Mali',
@@ -159,7 +161,7 @@ BEP_CE_BIRTH_WEIGHT_SHIFT_SIZE_MALNOURISHED_VARIANCE = confidence_interval_varia
 
 BEP_BIRTH_WEIGHT_SHIFT_SIZE_MALNOURISHED = {
     EFFECT_CURRENT_EVIDENCE: {
-        'distribution': sample_beta_distribution,
+        'distribution': beta_distribution_ppf,
         'parameters': {
             'mean': BEP_CE_BIRTH_WEIGHT_SHIFT_SIZE_MALNOURISHED_MEAN,
             'variance': BEP_CE_BIRTH_WEIGHT_SHIFT_SIZE_MALNOURISHED_VARIANCE,
@@ -168,7 +170,7 @@ BEP_BIRTH_WEIGHT_SHIFT_SIZE_MALNOURISHED = {
         }
     },
     EFFECT_HOPES_AND_DREAMS: {
-        'distribution': sample_normal_distribution,
+        'distribution': normal_distribution_ppf,
         'parameters': {
             'mean': BEP_HD_BIRTH_WEIGHT_SHIFT_SIZE_MALNOURISHED_MEAN,
             'sd': BEP_HD_BIRTH_WEIGHT_SHIFT_SIZE_MALNOURISHED_SD
@@ -194,6 +196,13 @@ BEP_CGF_SHIFT_SIZE_PARAMETERS = {
 
 ANC_SCALEUP = 0.9
 
+CGF_BIRTH_WEIGHT_CORRELATION_PARAMETERS = {
+    # sample from truncated normal distribution created with the following parameters
+    # mean, lower_bound, upper_bound, clip_lower, clip_upper
+    'child_wasting': (0.308, 0.263, 0.351, 0.2, 0.4),
+    'child_stunting': (0.394, 0.353, 0.433, 0.3, 0.5)
+}
+
 #############
 # Data Keys #
 #############
@@ -267,9 +276,15 @@ LBWSG_CATEGORIES = 'risk_factor.low_birth_weight_and_short_gestation.categories'
 LBWSG_EXPOSURE = 'risk_factor.low_birth_weight_and_short_gestation.exposure'
 LBWSG_RELATIVE_RISK = 'risk_factor.low_birth_weight_and_short_gestation.relative_risk'
 LBWSG_PAF = 'risk_factor.low_birth_weight_and_short_gestation.population_attributable_fraction'
+# Sim ready tables derived from the LBWSG data at build time.
+LBWSG_SIM_EXPOSURE = 'risk_factor.low_birth_weight_and_short_gestation.sim_exposure'
+LBWSG_SIM_RELATIVE_RISK = 'risk_factor.low_birth_weight_and_short_gestation.sim_relative_risk'
+LBWSG_SIM_PAF = 'risk_factor.low_birth_weight_and_short_gestation.sim_population_attributable_fraction'
 
 BIRTH_WEIGHT_BINS = 'birth_weight.bins'
 
+DRAW_PARAMETERS = 'parameters.draw_level_scalars'
+
 
 # Cause specific mortality rates for causes affected by LBWSG but not included as a Disease Model
 URI_CAUSE_SPECIFIC_MORTALITY_RATE = 'cause.upper_respiratory_infections.cause_specific_mortality_rate'
@@ -286,6 +301,9 @@ HEMOLYTIC_DISEASE_AND_OTHER_NEONATAL_JAUNDICE_CAUSE_SPECIFIC_MORTALITY_RATE = 'c
 OTHER_NEONATAL_DISORDERS_CAUSE_SPECIFIC_MORTALITY_RATE = 'cause.other_neonatal_disorders.cause_specific_mortality_rate'
 
 
+# The summed CSMR of UNMODELLED_LBWSG_AFFECTED_CAUSES, derived at build time.
+AFFECTED_UNMODELLED_LBWSG_CSMR = 'cause.affected_unmodelled_lbwsg_causes.cause_specific_mortality_rate'
+
 UNMODELLED_LBWSG_AFFECTED_CAUSES = [
     URI_CAUSE_SPECIFIC_MORTALITY_RATE,
     OTITIS_MEDIA_CAUSE_SPECIFIC_MORTALITY_RATE,
@@ -373,6 +391,7 @@ BIRTH_WEIGHT_PROPENSITY = 'birth_weight_propensity'
 GESTATION_TIME = 'gestation_time'
 LBWSG_COLUMNS = [BIRTH_WEIGHT, GESTATION_TIME]
 LBWSG_COLUMNS_CORR = [BIRTH_WEIGHT, GESTATION_TIME, BIRTH_WEIGHT_PROPENSITY]
+LBWSG_CATEGORY_COLUMN = f'{LBWSG_MODEL_NAME}_category'
 UNDERWEIGHT = 2500  # grams
 MAX_BIRTH_WEIGHT = 4500  # grams
 PRETERM = 37  # weeks
@@ -180,6 +180,8 @@ def build_single_location_artifact(path: Union[str, Path], location: str, log_to
     artifact = builder.open_artifact(path, location)
     logger.info(f'Loading and writing demographic data.')
     builder.load_and_write_demographic_data(artifact, location)
+    logger.info(f'Sampling and writing draw level parameters.')
+    builder.write_draw_parameters(artifact, location)
 
     logger.info(f'Loading and writing diarrhea data.')
     builder.load_and_write_diarrhea_data(artifact, location)
@@ -199,6 +201,8 @@ def build_single_location_artifact(path: Union[str, Path], location: str, log_to
     builder.load_and_write_affected_unmodelled_lbwsg_csmr(artifact, location)
     logger.info('Loading and writing birth weight bin data')
     builder.load_and_write_birth_weight_bin_data(artifact, location)
+    logger.info('Writing derived sim ready data')
+    builder.write_derived_data(artifact)
 
     logger.info('**DONE**')
 
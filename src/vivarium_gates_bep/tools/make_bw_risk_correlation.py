@@ -1,49 +1,39 @@
 """Application functions for producing specification files from which we derive birth weight risk correlation."""
-import numpy as np
-import pandas as pd
+import yaml
 
 from pathlib import Path
 
-from vivarium import InteractiveContext
+from vivarium import Artifact
+from vivarium_gates_bep import globals as project_globals
+from vivarium_gates_bep.components.lbwsg import LBWSGSampler, get_birth_weight_cdf_knots
+from vivarium_gates_bep.components.population import get_sex_probability
 from vivarium_gates_bep.tools.make_specs import build_model_specifications
 from vivarium_gates_bep.utilites import sanitize_location
 
 
-LARGER_THAN_LARGEST_BABY_ON_RECORD = 25 * 454
-
-
 def create_bw_rc_data(spec_file: str):
-    sim = InteractiveContext(spec_file)
-    df = pd.DataFrame()
-    df['birth_weights'] = sim.get_population().birth_weight
-
-    # rank birth weights
-    df = df.sort_values(by=['birth_weights']).reset_index(drop=True)
-
-    # create upper and lower bounds, fill starting and ending bins appropriately
-    df['birth_weight_start'] = df.birth_weights.shift(periods=1, fill_value=0.0)
-    df['birth_weight_end'] = df.birth_weights
-    df['birth_weight_end'].iloc[-1] = LARGER_THAN_LARGEST_BABY_ON_RECORD
-    df['value'] = df.index / len(df)
+    """Computes the newborn birth weight CDF for the simulation in a spec.
 
-    # clean up the sim, drop the redundant column
-    del sim
-    df = correct_support_values(df)
-    return df.drop('birth_weights', axis=1)
-
-
-def correct_support_values(df):
-    if 0.0 == df.value.iloc[0]:
-        df.value.iloc[0] = df.value.iloc[1] / 2.0
-    if 1.0 == df.value.iloc[-1]:
-        df.value.iloc[-1] = df.value.iloc[-2] + (1.0 - df.value.iloc[-2]) / 2.0
-    return df
+    Newborns are split by sex as in ``NewbornPopulation`` and birth weights are
+    distributed as in ``LBWSGRisk``, so the CDF is computed directly from the
+    category exposure rather than from a simulated population.
+    """
+    with open(spec_file) as f:
+        configuration = yaml.safe_load(f)['configuration']
+    artifact_path = configuration['input_data']['artifact_path']
+    draw = configuration['input_data']['input_draw_number']
+    year = configuration['time']['start']['year']
 
+    sex_probability = get_sex_probability(Artifact(artifact_path).load(project_globals.POPULATION_STRUCTURE), year)
+    samplers = {sex: LBWSGSampler.from_artifact(artifact_path, draw, sex, year=year) for sex in sex_probability.index}
+    exposure = sum(sex_probability[sex] * sampler.exposure for sex, sampler in samplers.items())
+    category_edges = next(iter(samplers.values())).category_edges
+    return get_birth_weight_cdf_knots(category_edges, exposure)
 
 
 def build_bw_rc_data(template: str, location: str, output_dir: str):
     """Writes model specifications from a template and location that
-    are used to produce birth weight propensities and ranked bins.
+    are used to produce the birth weight CDF knots for birth weight propensities.
 
     Parameters
     ----------
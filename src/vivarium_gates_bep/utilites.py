@@ -1,3 +1,5 @@
+import weakref
+
 import numpy as np
 import scipy.stats
 
@@ -20,13 +22,43 @@ def sanitize_location(location: str):
     return location.replace(" ", "_").replace("'", "_").lower()
 
 
-def sample_beta_distribution(seed: int, mean: float, variance: float, upper_bound: float, lower_bound: float) -> float:
-    """Gets a single random draw from a scaled beta distribution.
+# All the components of a simulation are set up with the same builder, so it
+# scopes the objects they share, and they are released with it.
+_shared_by_builder = weakref.WeakKeyDictionary()
+
+
+def get_shared(builder, factory):
+    """Returns the object ``factory`` makes for a simulation, making it on first use.
+
+    Parameters
+    ----------
+    builder
+        The builder the simulation's components are set up with.
+    factory
+        A callable that makes the shared object from the builder.  It is
+        also the key the object is stored under, so it must be defined once,
+        not made anew on every call.
+
+    Returns
+    -------
+        The object ``factory(builder)`` made on the first call for this
+        builder and factory.
+
+    """
+    shared = _shared_by_builder.setdefault(builder, {})
+    if factory not in shared:
+        shared[factory] = factory(builder)
+    return shared[factory]
+
+
+def beta_distribution_ppf(q: np.ndarray, mean: float, variance: float,
+                          upper_bound: float, lower_bound: float) -> np.ndarray:
+    """Evaluates the quantile function of a scaled beta distribution.
 
     Parameters
     ----------
-    seed
-        Seed for the random number generator.
+    q
+        Quantiles to evaluate.
     mean
         The mean of the scaled beta distribution.
     variance
@@ -38,25 +70,24 @@ def sample_beta_distribution(seed: int, mean: float, variance: float, upper_boun
 
     Returns
     -------
-        The random variate from the scaled beta distribution.
+        The values of the scaled beta distribution at the quantiles.
 
     """
-    np.random.seed(seed)
     support_width = (upper_bound - lower_bound)
     mean = (mean - lower_bound) / support_width
-    variance /= support_width ** 2
+    variance = variance / support_width ** 2
     alpha = mean * (mean * (1 - mean) / variance - 1)
     beta = (1 - mean) * (mean * (1 - mean) / variance - 1)
-    return lower_bound + support_width*scipy.stats.beta.rvs(alpha, beta)
+    return lower_bound + support_width*scipy.stats.beta.ppf(q, alpha, beta)
 
 
-def sample_trianglular_distribution(seed: int, mode: float, upper_bound: float, lower_bound: float) -> float:
-    """Gets a single random draw from a triangular distribution.
+def triangular_distribution_ppf(q: np.ndarray, mode: float, upper_bound: float, lower_bound: float) -> np.ndarray:
+    """Evaluates the quantile function of a triangular distribution.
 
     Parameters
     ----------
-    seed
-        Seed for the random number generator.
+    q
+        Quantiles to evaluate.
     mode
         The mode of the triangular distribution.
     upper_bound
@@ -66,22 +97,21 @@ def sample_trianglular_distribution(seed: int, mode: float, upper_bound: float,
 
     Returns
     -------
-        The random variate from the triangular distribution.
+        The values of the triangular distribution at the quantiles.
 
     """
-    np.random.seed(seed)
     support_width = (upper_bound - lower_bound)
     c = (mode - lower_bound) / support_width
-    return scipy.stats.triang.rvs(c, loc=lower_bound, scale=support_width)
+    return scipy.stats.triang.ppf(q, c, loc=lower_bound, scale=support_width)
 
 
-def sample_gamma_distribution(seed: int, mean: float, lower_bound: float, shape: float) -> float:
-    """Gets a single random draw from a gamma distribution.
+def gamma_distribution_ppf(q: np.ndarray, mean: float, lower_bound: float, shape: float) -> np.ndarray:
+    """Evaluates the quantile function of a gamma distribution.
 
     Parameters
     ----------
-    seed
-        Seed for the random number generator.
+    q
+        Quantiles to evaluate.
     mean
         The mean of the gamma distribution
     lower_bound
@@ -91,23 +121,21 @@ def sample_gamma_distribution(seed: int, mean: float, lower_bound: float, shape:
 
     Returns
     -------
-        The random variate from the triangular distribution.
+        The values of the gamma distribution at the quantiles.
 
     """
-    np.random.seed(seed)
     mean -= lower_bound
     scale = mean / shape
-    return scipy.stats.gamma.rvs(shape, lower_bound, scale)
-
+    return scipy.stats.gamma.ppf(q, shape, lower_bound, scale)
 
 
-def sample_normal_distribution(seed: int, mean: float, sd: float) -> float:
-    """Gets a single random draw from a triangular distribution.
+def normal_distribution_ppf(q: np.ndarray, mean: float, sd: float) -> np.ndarray:
+    """Evaluates the quantile function of a normal distribution.
 
     Parameters
     ----------
-    seed
-        Seed for the random number generator.
+    q
+        Quantiles to evaluate.
     mean
         The mean of the distribution.
     sd
@@ -115,14 +143,12 @@ def sample_normal_distribution(seed: int, mean: float, sd: float) -> float:
 
     Returns
     -------
-        The random variate from the normal distribution.
+        The values of the normal distribution at the quantiles.
 
     """
-    np.random.seed(seed)
-    return scipy.stats.norm.rvs(loc=mean, scale=sd)
+    return scipy.stats.norm.ppf(q, loc=mean, scale=sd)
 
 
-def sample_truncnorm(seed: int, mean: float, std: float,
-                     clip_lower: float, clip_upper: float):
-    np.random.seed(seed)
-    return scipy.stats.truncnorm.rvs(clip_lower, clip_upper, mean, std)
+def truncnorm_ppf(q: np.ndarray, mean: float, std: float,
+                  clip_lower: float, clip_upper: float) -> np.ndarray:
+    return scipy.stats.truncnorm.ppf(q, clip_lower, clip_upper, mean, std)
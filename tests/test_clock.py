@@ -0,0 +1,51 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from vivarium_gates_bep.components.clock import StepSchedule, get_step_boundaries
+
+DURATION = 730
+
+
+def run_schedule(schedule, duration):
+    ages = [0.]
+    steps = []
+    while ages[-1] < duration:
+        step = schedule.get_step_size(ages[-1])
+        steps.append(step.total_seconds() / 86400)
+        ages.append(ages[-1] + steps[-1])
+    return np.array(ages), np.array(steps)
+
+
+def test_steps_follow_schedule_and_land_on_boundaries():
+    boundaries = get_step_boundaries(DURATION)
+    schedule = StepSchedule([0, 28, 182], [1, 7, 30], boundaries)
+
+    ages, steps = run_schedule(schedule, DURATION)
+
+    for boundary in boundaries:
+        # Some step ends just past each boundary.
+        assert np.any((ages > boundary) & (ages - boundary <= 2 / 86400))
+    neonatal = ages[:-1] < 28
+    assert np.allclose(steps[neonatal], 1, atol=0.05)
+    assert steps[~neonatal].max() <= 30 * 1.5
+    assert len(steps) < 100
+
+
+def test_daily_schedule_matches_daily_steps_between_boundaries():
+    schedule = StepSchedule([0], [1], [5, 10])
+    ages, steps = run_schedule(schedule, 10)
+    assert np.allclose(ages, np.arange(11), rtol=0, atol=2 / 86400)
+    assert schedule.get_step_size(12.) == pd.Timedelta(days=1)
+    assert schedule.get_step_size(0.) == pd.Timedelta(days=1, seconds=1)
+
+
+def test_empty_schedule_is_falsy():
+    assert not StepSchedule([], [], [DURATION])
+
+
+@pytest.mark.parametrize('age_start, step_size', [([0, 28], [1]), ([1], [1]), ([0, 28, 20], [1, 7, 30]),
+                                                  ([0], [0])])
+def test_invalid_schedules_raise(age_start, step_size):
+    with pytest.raises(ValueError):
+        StepSchedule(age_start, step_size, [DURATION])
@@ -0,0 +1,59 @@
+from types import SimpleNamespace
+
+import numpy as np
+import pandas as pd
+from vivarium.interpolation import Interpolation
+
+from vivarium_gates_bep.components.cohort_lookup import CohortLookupTable, get_distinct_keys
+
+
+def make_builder():
+    return SimpleNamespace(
+        configuration=SimpleNamespace(interpolation=SimpleNamespace(order=0, extrapolate=True)),
+        population=SimpleNamespace(get_view=lambda columns: None),
+        time=SimpleNamespace(clock=lambda: None),
+    )
+
+
+def make_data():
+    age_edges = [0, 7 / 365, 28 / 365, 1, 5]
+    rows = []
+    for sex in ['Male', 'Female']:
+        for age_start, age_end in zip(age_edges[:-1], age_edges[1:]):
+            for year_start in [2019, 2020]:
+                rows.append({'sex': sex, 'age_start': age_start, 'age_end': age_end,
+                             'year_start': year_start, 'year_end': year_start + 1,
+                             'value': len(rows), 'other': -len(rows)})
+    return pd.DataFrame(rows)
+
+
+def test_cohort_lookup_matches_interpolation():
+    data = make_data()
+    table = CohortLookupTable(make_builder(), data, key_columns=['sex'], parameter_columns=['age', 'year'])
+    reference = Interpolation(data, ['sex'], [('age', 'age_start', 'age_end'), ('year', 'year_start', 'year_end')],
+                              order=0, extrapolate=True)
+    random_state = np.random.RandomState(11)
+    size = 1000
+
+    cohort = pd.DataFrame({'sex': random_state.choice(['Male', 'Female'], size), 'age': 0.1, 'year': 2020.5},
+                          index=pd.Index(random_state.permutation(2 * size)[:size]))
+    result = table.interpolate(cohort)
+    expected = reference(cohort)
+    pd.testing.assert_frame_equal(result, expected[result.columns], check_dtype=False)
+    assert table.cohort_calls == 1
+
+    mixed = cohort.assign(age=random_state.uniform(0, 5, size))
+    result = table.interpolate(mixed)
+    pd.testing.assert_frame_equal(result, reference(mixed)[result.columns], check_dtype=False)
+    assert table.fallback_calls == 1
+
+
+def test_get_distinct_keys():
+    data = pd.DataFrame({'sex': ['Male', 'Female', 'Male', 'Male'], 'age': [0.1, 0.1, 0.1, np.nan]})
+    key_index, first = get_distinct_keys(data, max_keys=3)
+    assert len(first) == 3
+    assert key_index[0] == key_index[2]
+    assert len(set(key_index)) == 3
+    assert (data.iloc[first[key_index]].sex.values == data.sex.values).all()
+
+    assert get_distinct_keys(data, max_keys=2) == (None, None)
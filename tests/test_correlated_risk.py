@@ -0,0 +1,115 @@
+from types import SimpleNamespace
+
+import numpy as np
+import pandas as pd
+import pytest
+import scipy.stats
+from scipy.special import ndtr, ndtri
+
+from vivarium_gates_bep.components.correlated_risk import BirthweightCorrelatedRisk, get_cholesky_factor
+
+RISK = 'alternative_risk_factor.child_wasting'
+
+
+def make_weights_builder(glnorm_weight):
+    weights = pd.DataFrame([{'sex': sex, 'age_start': 0., 'age_end': 5., 'year_start': 2020, 'year_end': 2021,
+                             'parameter': parameter, 'value': value}
+                            for sex in ['Male', 'Female']
+                            for parameter, value in [('gumbel', 0.6 - glnorm_weight), ('lnorm', 0.4),
+                                                     ('glnorm', glnorm_weight)]])
+    return SimpleNamespace(
+        configuration=SimpleNamespace(interpolation=SimpleNamespace(order=0, extrapolate=True)),
+        data=SimpleNamespace(load=lambda key: weights),
+        population=SimpleNamespace(get_view=lambda columns: None),
+        time=SimpleNamespace(clock=lambda: None),
+    )
+
+
+def test_cholesky_propensities_match_conditional_bivariate_normal():
+    correlations = np.array([0.308, 0.394, 0.25])
+    random_state = np.random.RandomState(90210)
+    bw_propensity = random_state.random_sample(10_000)
+    draws = random_state.random_sample((10_000, len(correlations)))
+
+    normals = np.column_stack([ndtri(bw_propensity), ndtri(draws)])
+    propensity = ndtr(normals @ get_cholesky_factor(correlations)[1:].T)
+
+    # Each risk on its own, conditional on the birth weight normal.
+    bw_probit = scipy.stats.norm.ppf(bw_propensity)
+    for i, rho in enumerate(correlations):
+        expected = scipy.stats.norm.cdf(scipy.stats.norm(rho * bw_probit, np.sqrt(1 - rho**2)).ppf(draws[:, i]))
+        assert np.allclose(propensity[:, i], expected, rtol=0, atol=1e-12)
+
+
+def test_exposure_weights_drop_unused_glnorm():
+    weights, _ = BirthweightCorrelatedRisk(RISK).load_exposure_weights(make_weights_builder(0.))
+    assert list(weights.columns) == ['gumbel', 'lnorm']
+    assert np.allclose(weights.sum(axis=1), 1)
+
+
+def test_exposure_weights_reject_glnorm():
+    with pytest.raises(NotImplementedError, match='glnorm'):
+        BirthweightCorrelatedRisk(RISK).load_exposure_weights(make_weights_builder(0.1))
+
+
+class CountingExposure:
+    """A static exposure pipeline that depends on each simulant's parameter row."""
+
+    def __init__(self, parameter_row):
+        self.parameter_row = parameter_row
+        self.evaluated = []
+
+    def __call__(self, index):
+        self.evaluated += list(index)
+        return pd.Series(100. * self.parameter_row[index] + index, index=index)
+
+
+def make_cached_risk(size):
+    risk = BirthweightCorrelatedRisk(RISK)
+    parameter_row = np.zeros(size, dtype=int)
+    risk.exposure_weights = pd.DataFrame({'gumbel': [0.6, 0.5], 'lnorm': [0.4, 0.5]})
+    risk.exposure_parameter_row = lambda index: pd.Series(parameter_row[index].astype(float), index=index)
+    risk.exposure_weight_row = lambda index: pd.Series(1., index=index)
+    risk.static_exposure = CountingExposure(parameter_row)
+    risk.cached_row = np.empty(0, dtype=int)
+    risk.cached_exposure = np.empty(0)
+    return risk, parameter_row
+
+
+def test_cached_exposure_is_reused_until_parameter_row_changes():
+    risk, parameter_row = make_cached_risk(10)
+    index = pd.Index(range(5))
+
+    assert risk.get_cached_exposure(index).tolist() == [0., 1., 2., 3., 4.]
+    assert risk.static_exposure.evaluated == [0, 1, 2, 3, 4]
+
+    risk.static_exposure.evaluated = []
+    assert risk.get_cached_exposure(index).tolist() == [0., 1., 2., 3., 4.]
+    assert risk.static_exposure.evaluated == []
+
+    parameter_row[[1, 3]] = 1
+    assert risk.get_cached_exposure(index).tolist() == [0., 101., 2., 103., 4.]
+    assert risk.static_exposure.evaluated == [1, 3]
+
+
+def test_cached_exposure_grows_for_new_simulants():
+    risk, parameter_row = make_cached_risk(10)
+    risk.get_cached_exposure(pd.Index(range(3)))
+    assert len(risk.cached_row) == 3
+
+    risk.static_exposure.evaluated = []
+    new_simulants = pd.Index(range(3, 10))
+    assert risk.get_cached_exposure(new_simulants).tolist() == list(range(3, 10))
+    assert len(risk.cached_row) >= 10 and len(risk.cached_exposure) == len(risk.cached_row)
+    assert risk.static_exposure.evaluated == list(range(3, 10))
+
+
+def test_cached_exposure_matches_static_exposure_for_mixed_index():
+    risk, parameter_row = make_cached_risk(10)
+    risk.get_cached_exposure(pd.Index([0, 2, 4, 6]))
+    parameter_row[[2, 7]] = 1
+
+    # Cached, stale and never seen simulants, out of order.
+    index = pd.Index([9, 2, 6, 0, 7, 4, 3])
+    expected = risk.static_exposure(index)
+    pd.testing.assert_series_equal(risk.get_cached_exposure(index), expected)
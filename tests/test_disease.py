@@ -0,0 +1,159 @@
+from types import SimpleNamespace
+
+import numpy as np
+import pandas as pd
+from vivarium.framework.randomness import RandomnessStream
+from vivarium_public_health.disease import DiseaseState, RateTransition
+
+from vivarium_gates_bep.components.disease import (DiseaseTransitionEngine, NeonatalSIS, SIR_fixed_duration, SIS,
+                                                   choose_outputs)
+
+TIME = pd.Timestamp('2020-08-01')
+MEASLES_DWELL_TIME = 10  # Days
+
+
+class PopulationView:
+    """A view of an in memory state table that counts its writes."""
+
+    def __init__(self, table, columns):
+        self.table = table
+        self.columns = list(columns)
+        self.updates = 0
+
+    def subview(self, columns):
+        return PopulationView(self.table, columns)
+
+    def get(self, index, query=''):
+        pop = self.table.loc[index, self.columns]
+        return pop.query(query) if query else pop
+
+    def update(self, data):
+        self.updates += 1
+        if isinstance(data, pd.Series):
+            data = data.to_frame(self.columns[0] if data.name is None else data.name)
+        for column in data.columns:
+            self.table.loc[data.index, column] = data[column].values
+
+
+def choose_by_stream(draw, p):
+    """The choice ``RandomnessStream.choice`` makes, kept as a reference."""
+    p = p / p.sum(axis=1, keepdims=True)
+    return (draw[np.newaxis].T > np.cumsum(p, axis=1)).sum(axis=1)
+
+
+def test_choose_outputs_matches_per_model_choice():
+    random_state = np.random.RandomState(42)
+    size = 10_000
+    # An SIS pair of states, an SIR state with a dwell time and a model with three outputs.
+    outputs_by_model = [2, 2, 3]
+    probabilities = np.zeros((size, len(outputs_by_model), max(outputs_by_model)))
+    draws = random_state.random_sample((size, len(outputs_by_model)))
+    for model, outputs in enumerate(outputs_by_model):
+        transition = random_state.uniform(0, 0.3, (size, outputs - 1))
+        probabilities[:, model, :outputs - 1] = transition
+        probabilities[:, model, outputs - 1] = 1 - transition.sum(axis=1)
+
+    choices = choose_outputs(probabilities, draws)
+
+    assert choices.shape == (size, len(outputs_by_model))
+    for model, outputs in enumerate(outputs_by_model):
+        expected = choose_by_stream(draws[:, model], probabilities[:, model, :outputs])
+        assert np.array_equal(choices[:, model], expected)
+
+
+def test_choose_outputs_ignores_rows_without_transitions():
+    probabilities = np.array([[[0.2, 0.8]], [[0., 0.]]])
+    draws = np.array([[0.5], [0.5]])
+    assert choose_outputs(probabilities, draws).tolist() == [[1], [0]]
+
+
+def make_models():
+    return [SIS('diarrheal_diseases'), SIR_fixed_duration('measles', str(MEASLES_DWELL_TIME)),
+            NeonatalSIS('lower_respiratory_infections')]
+
+
+def make_state_table(models, size):
+    random_state = np.random.RandomState(7)
+    table = pd.DataFrame({'alive': np.where(random_state.random_sample(size) < 0.9, 'alive', 'dead')})
+    for model in models:
+        state_ids = [state.state_id for state in model.states]
+        table[model.state_column] = random_state.choice(state_ids, size)
+        for state in model.states:
+            in_state = table[model.state_column] == state.state_id
+            days_in_state = pd.to_timedelta(random_state.randint(0, 20, size), unit='D')
+            table[state.event_time_column] = (TIME - days_in_state).where(in_state)
+            table[state.event_count_column] = in_state.astype(int)
+    return table
+
+
+def set_up_models(models, table):
+    """Gives the models what their setup would, reading and writing ``table``."""
+    rates = iter(np.linspace(0.05, 0.5, 20))
+    for model in models:
+        model.population_view = PopulationView(table, [model.state_column])
+        for state in model.states:
+            state.population_view = PopulationView(table, [model.state_column, 'alive',
+                                                           state.event_time_column, state.event_count_column])
+            state.transition_set.random = RandomnessStream(state.transition_set.name, lambda: TIME, seed=0)
+            if isinstance(state, DiseaseState):
+                dwell_time = MEASLES_DWELL_TIME if model.state_column == 'measles' else 0
+                state.dwell_time = lambda index, dwell_time=dwell_time: pd.Series(float(dwell_time), index=index)
+                if dwell_time:
+                    state.transition_set.allow_null_transition = True
+            for transition in state.transition_set:
+                if isinstance(transition, RateTransition):
+                    transition.transition_rate = make_rate(next(rates))
+
+
+def make_rate(rate):
+    return lambda index: pd.Series(rate * (index % 3 + 1), index=index)
+
+
+def test_engine_matches_per_model_transitions():
+    models = make_models()
+    table = make_state_table(models, 5_000)
+
+    expected = table.copy()
+    set_up_models(models, expected)
+    for model in models:
+        model.transition(expected.index, TIME)
+
+    actual = table.copy()
+    set_up_models(models, actual)
+    engine = DiseaseTransitionEngine()
+    engine.setup(SimpleNamespace(
+        components=SimpleNamespace(get_components_by_type=lambda type_: [m for m in models if isinstance(m, type_)]),
+        population=SimpleNamespace(get_view=lambda columns: PopulationView(actual, columns)),
+        event=SimpleNamespace(register_listener=lambda *args: None),
+    ))
+    engine.on_time_step(SimpleNamespace(index=actual.index, time=TIME))
+
+    pd.testing.assert_frame_equal(actual, expected)
+    assert engine.population_view.updates == 1
+
+    # Every kind of outcome was exercised: transitions, null transitions
+    # and simulants held in measles by its dwell time or by being dead.
+    for model in models:
+        changed = table[model.state_column] != expected[model.state_column]
+        assert changed.any() and (~changed & (table[model.state_column] == model.initial_state)).any()
+    in_measles = table.measles == 'measles'
+    held = TIME - table.measles_event_time < pd.Timedelta(days=MEASLES_DWELL_TIME)
+    assert (expected.measles[in_measles & held] == 'measles').all()
+    assert (expected.measles[in_measles & (table.alive == 'dead')] == 'measles').all()
+    recovered = in_measles & ~held & (table.alive == 'alive')
+    assert recovered.any() and (expected.measles[recovered] == 'recovered_from_measles').all()
+    assert (expected.recovered_from_measles_event_time[recovered] == TIME).all()
+
+
+def test_models_defer_to_transition_engine():
+    model = SIS('diarrheal_diseases')
+    transitions = []
+    model.transition = lambda index, time: transitions.append(time)
+    event = SimpleNamespace(index=pd.RangeIndex(3), time=TIME)
+
+    model.transition_engine = None
+    model.on_time_step(event)
+    model.transition_engine = DiseaseTransitionEngine()
+    model.on_time_step(event)
+
+    assert transitions == [TIME]
@@ -0,0 +1,85 @@
+import numpy as np
+import pandas as pd
+import scipy.optimize
+import scipy.stats
+from risk_distributions import EnsembleDistribution
+from vivarium_public_health.risks.distributions import clip
+
+from vivarium_gates_bep.components import ensemble_ppf
+from vivarium_gates_bep.components.ensemble_ppf import (TabulatedQuantileFunction, get_accuracy_report,
+                                                        get_ensemble_quantile_function)
+
+COMPONENTS = [(0.5, scipy.stats.norm(9, 1)), (0.3, scipy.stats.gumbel_r(8.5, 0.8)),
+              (0.2, scipy.stats.lognorm(0.2, scale=9))]
+
+
+def mixture_ppf(q):
+    def cdf(x):
+        # The gumbel cdf underflows in its lower tail, which vivarium makes numpy raise on.
+        with np.errstate(under='ignore'):
+            return sum(weight * distribution.cdf(x) for weight, distribution in COMPONENTS)
+    return np.array([scipy.optimize.brentq(lambda x: cdf(x) - p, 0, 30) for p in np.atleast_1d(q)])
+
+
+def test_tabulated_quantile_function_is_within_tolerance():
+    tolerance = 1e-5
+    quantile_function = TabulatedQuantileFunction(mixture_ppf, tolerance)
+    assert quantile_function.max_error <= tolerance
+
+    q = np.random.RandomState(3).random_sample(1000)
+    x = quantile_function(q)
+    assert np.abs(x - mixture_ppf(clip(q.copy()))).max() <= 10 * tolerance
+    assert np.all(np.diff(x[np.argsort(q)]) >= 0)
+
+
+def test_ensemble_quantile_function_tabulates_real_ensembles_when_numpy_raises():
+    weights = pd.Series({'betasr': 0., 'exp': 0., 'gamma': 0., 'gumbel': 0.6, 'invgamma': 0., 'invweibull': 0.,
+                         'llogis': 0., 'lnorm': 0.4, 'mgamma': 0., 'mgumbel': 0., 'norm': 0., 'weibull': 0.})
+    mean, sd, tolerance = 8.7, 1.3, 1e-4
+    q = np.random.RandomState(5).random_sample(1000)
+
+    # vivarium sets numpy to raise on every floating point error when imported.
+    with np.errstate(all='raise'):
+        quantile_function = get_ensemble_quantile_function(weights, mean, sd, tolerance)
+        x = quantile_function(q)
+
+    with np.errstate(under='ignore'):
+        exact = EnsembleDistribution(weights=weights, mean=mean, sd=sd).ppf(clip(q.copy()))
+    assert quantile_function.interpolant is not None
+    assert quantile_function.max_error <= tolerance
+    assert np.abs(x - exact).max() <= 10 * tolerance
+    assert np.all(np.diff(x[np.argsort(q)]) >= 0)
+
+
+def test_tabulated_quantile_function_ignores_underflow_in_exact_ppf():
+    def underflowing_ppf(q):
+        return q - np.exp(-1e6 * q)
+
+    with np.errstate(all='raise'):
+        quantile_function = TabulatedQuantileFunction(underflowing_ppf)
+    assert quantile_function.interpolant is not None
+
+
+def test_tabulated_quantile_function_falls_back_to_exact_ppf():
+    def undefined_ppf(q):
+        return np.full(len(q), np.nan)
+
+    quantile_function = TabulatedQuantileFunction(undefined_ppf)
+    assert quantile_function.interpolant is None
+    assert np.array_equal(quantile_function(np.array([0.1, 0.5])), [0., 0.])
+
+
+def test_accuracy_report_is_restricted_to_requested_tables(monkeypatch):
+    tables = {(9., 1.): TabulatedQuantileFunction(mixture_ppf, 1e-3),
+              (12., 2.): TabulatedQuantileFunction(lambda q: np.full(len(q), np.nan))}
+    monkeypatch.setattr(ensemble_ppf, '_quantile_functions',
+                        {((), mean, sd, 1e-3): table for (mean, sd), table in tables.items()})
+
+    report = get_accuracy_report()
+    assert list(report['mean']) == [9., 12.]
+    assert report.loc[0, 'max_error'] <= 1e-3
+    assert report.loc[1, 'grid_size'] == 0
+
+    report = get_accuracy_report([tables[(12., 2.)], np.zeros_like])
+    assert list(report['mean']) == [12.]
+    assert get_accuracy_report([]).empty
@@ -0,0 +1,173 @@
+import itertools
+
+import numpy as np
+import pandas as pd
+
+from vivarium_gates_bep import globals as project_globals
+from vivarium_gates_bep.data.draws import get_draws, write_draw_frames, write_draws
+from vivarium_gates_bep.components.lbwsg import (build_categories_by_interval, get_category_edges,
+                                                 CategoryLattice, LBWSGSampler, DrawDataCache,
+                                                 get_birth_weight_cdf_knots)
+
+GESTATION_TIME_BINS = [(0, 24), (24, 26), (26, 28), (28, 30), (30, 32), (32, 34),
+                       (34, 36), (36, 37), (37, 38), (38, 40), (40, 42)]
+BIRTH_WEIGHT_BINS = [(start, start + 500) for start in range(0, 5000, 500)]
+
+
+def make_category_dict():
+    """A lattice in the shape of the GBD one, with holes in the corners."""
+    category_dict = {}
+    for (gt_start, gt_end), (bw_start, bw_end) in itertools.product(GESTATION_TIME_BINS, BIRTH_WEIGHT_BINS):
+        missing = ((gt_end <= 30 and bw_start >= 2500)
+                   or (gt_start >= 38 and bw_end <= 1000)
+                   or (bw_start >= 4500 and gt_end <= 34)
+                   or (gt_start == 37 and bw_start == 1000))  # Filled in with the missing category
+        if not missing:
+            category_dict[f'cat{len(category_dict) + 1}'] = (f'Birth prevalence - [{gt_start}, {gt_end}) wks, '
+                                                             f'[{bw_start}, {bw_end}) g')
+    return category_dict
+
+
+def convert_to_categorical_by_interval(exposure, categories_by_interval):
+    """The original pd.Interval based boundary resolution, kept as a reference."""
+    def get_categorical_index(e):
+        return categories_by_interval.index.get_indexer(e.set_index(project_globals.LBWSG_COLUMNS).index)
+
+    cats = categories_by_interval.reset_index()
+    max_gt_by_bw = pd.Series({bw_interval: pd.Index(group.gestation_time).right.max()
+                              for bw_interval, group in cats.groupby(project_globals.BIRTH_WEIGHT)})
+    max_bw_by_gt = pd.Series({gt_interval: pd.Index(group.birth_weight).right.max()
+                              for gt_interval, group in cats.groupby(project_globals.GESTATION_TIME)})
+
+    birth_weight = exposure[project_globals.BIRTH_WEIGHT]
+    gestation_time = exposure[project_globals.GESTATION_TIME]
+    eps = 1e-4
+    outside_bounds = get_categorical_index(exposure) == -1
+    shift_down = outside_bounds & (
+            (birth_weight < 1000)
+            | ((1000 < birth_weight) & (birth_weight < project_globals.MAX_BIRTH_WEIGHT) & (40 < gestation_time))
+    )
+    shift_left = outside_bounds & (
+            ((1000 < birth_weight) & (gestation_time < 34))
+            | ((project_globals.MAX_BIRTH_WEIGHT < birth_weight)
+               & (gestation_time < project_globals.MAX_GESTATIONAL_TIME))
+    )
+    tmrel = outside_bounds & (
+            (project_globals.MAX_BIRTH_WEIGHT < birth_weight) & (project_globals.MAX_GESTATIONAL_TIME < gestation_time)
+    )
+
+    max_gt_for_bw = max_gt_by_bw.loc[exposure.loc[shift_down, project_globals.BIRTH_WEIGHT]].values
+    exposure.loc[shift_down, project_globals.GESTATION_TIME] = max_gt_for_bw - eps
+    max_bw_for_gt = max_bw_by_gt.loc[exposure.loc[shift_left, project_globals.GESTATION_TIME]].values
+    exposure.loc[shift_left, project_globals.BIRTH_WEIGHT] = max_bw_for_gt - eps
+    exposure.loc[tmrel, project_globals.GESTATION_TIME] = project_globals.MAX_GESTATIONAL_TIME - eps
+    exposure.loc[tmrel, project_globals.BIRTH_WEIGHT] = project_globals.MAX_BIRTH_WEIGHT - eps
+
+    return exposure, get_categorical_index(exposure)
+
+
+def test_resolve_boundary_cases_matches_interval_lookup():
+    categories_by_interval = build_categories_by_interval(make_category_dict())
+    lattice = CategoryLattice(get_category_edges(categories_by_interval))
+
+    random_state = np.random.RandomState(8675309)
+    size = 20_000
+    # Cover the lattice, its holes, and values shifted past the top edges.
+    exposure = pd.DataFrame({
+        project_globals.BIRTH_WEIGHT: random_state.uniform(100, 5400, size),
+        project_globals.GESTATION_TIME: random_state.uniform(0, 44, size),
+    })
+
+    expected_exposure, expected_index = convert_to_categorical_by_interval(exposure.copy(), categories_by_interval)
+
+    category_index = lattice.get_category_index(exposure.birth_weight.values, exposure.gestation_time.values)
+    assert (category_index == -1).any()
+    birth_weight, gestation_time, category_index = lattice.resolve_boundary_cases(
+        exposure.birth_weight.values, exposure.gestation_time.values, category_index
+    )
+
+    assert np.array_equal(category_index, expected_index)
+    assert np.allclose(birth_weight, expected_exposure.birth_weight.values, rtol=0, atol=1e-9)
+    assert np.allclose(gestation_time, expected_exposure.gestation_time.values, rtol=0, atol=1e-9)
+
+
+def test_sampler_matches_cumulative_exposure_rule():
+    categories_by_interval = build_categories_by_interval(make_category_dict())
+    random_state = np.random.RandomState(24601)
+    exposure = pd.Series(random_state.dirichlet(np.ones(len(categories_by_interval))),
+                         index=categories_by_interval.values)
+    sampler = LBWSGSampler(categories_by_interval, exposure)
+
+    category_q = random_state.random_sample(1000)
+    # The rule used when initializing simulants in LBWSGDistribution.
+    expected = (exposure.cumsum().values[np.newaxis, :] < category_q[:, np.newaxis]).sum(axis=1)
+    assert np.array_equal(sampler.get_category_index(category_q), expected)
+
+    birth_weight, gestation_time = sampler.sample(1000, random_state=5)
+    assert np.array_equal(birth_weight, sampler.sample(1000, random_state=5)[0])
+    category_index = sampler.lattice.get_category_index(birth_weight, gestation_time)
+    assert (category_index != -1).all()
+
+
+def test_draw_data_cache_reads_each_table_once(tmp_path):
+    path = tmp_path / 'artifact.hdf'
+    index = pd.DataFrame({'location': 'Mali', 'sex': ['Female', 'Male'], 'parameter': 'cat1'})
+    with pd.HDFStore(str(path), mode='w') as store:
+        store.put('risk_factor/lbwsg/exposure/index', index)
+        for draw in range(3):
+            store.put(f'risk_factor/lbwsg/exposure/draw_{draw}', pd.Series([draw, draw + 0.5]))
+
+    cache = DrawDataCache(maxsize=2)
+    first = cache.get(path, 'risk_factor.lbwsg.exposure', 0)
+    first['value'] = -1
+    second = cache.get(path, 'risk_factor.lbwsg.exposure', 0)
+    assert second.value.tolist() == [0, 0.5]
+    assert 'location' not in second
+    assert (cache.hits, cache.misses) == (1, 1)
+
+    cache.get(path, 'risk_factor.lbwsg.exposure', 1)
+    cache.get(path, 'risk_factor.lbwsg.exposure', 2)
+    assert cache.info()['size'] == 2
+    cache.get(path, 'risk_factor.lbwsg.exposure', 0)  # Evicted as least recently used.
+    assert (cache.hits, cache.misses) == (1, 4)
+
+
+def test_draw_data_cache_reads_chunked_layout(tmp_path):
+    path = tmp_path / 'artifact.hdf'
+    index = pd.MultiIndex.from_product([['Mali'], ['Female', 'Male'], ['cat1', 'cat2']],
+                                       names=['location', 'sex', 'parameter'])
+    data = pd.DataFrame(np.random.RandomState(1).random_sample((4, 3)), index=index,
+                        columns=[f'draw_{d}' for d in [0, 5, 9]])
+    write_draws(path, 'risk_factor.lbwsg.exposure', data)
+
+    draw = DrawDataCache().get(path, 'risk_factor.lbwsg.exposure', 5)
+    assert list(draw.columns) == ['sex', 'parameter', 'value']
+    assert np.allclose(draw.value.values, data['draw_5'].values, rtol=1e-6, atol=0)
+
+
+def test_draw_frames_round_trip(tmp_path):
+    path = tmp_path / 'artifact.hdf'
+    random_state = np.random.RandomState(2)
+    index = pd.DataFrame({'sex': ['Female', 'Male'], 'age_start': 0.})
+    frames = {draw: index.assign(cat1=random_state.random_sample(2), cat2=random_state.random_sample(2))
+              for draw in [3, 0, 7]}
+    write_draw_frames(path, 'risk_factor.lbwsg.sim_exposure', frames, ['sex', 'age_start'])
+
+    assert get_draws(path, 'risk_factor.lbwsg.sim_exposure') == [0, 3, 7]
+    draw = DrawDataCache().get(path, 'risk_factor.lbwsg.sim_exposure', 7)
+    assert list(draw.columns) == ['sex', 'age_start', 'cat1', 'cat2']
+    assert np.allclose(draw[['cat1', 'cat2']].values, frames[7][['cat1', 'cat2']].values, rtol=1e-6, atol=0)
+
+
+def test_birth_weight_cdf_knots_match_sampled_birth_weights():
+    categories_by_interval = build_categories_by_interval(make_category_dict())
+    random_state = np.random.RandomState(1138)
+    exposure = pd.Series(random_state.dirichlet(np.ones(len(categories_by_interval))),
+                         index=categories_by_interval.values)
+    sampler = LBWSGSampler(categories_by_interval, exposure)
+    knots = get_birth_weight_cdf_knots(sampler.category_edges, sampler.exposure)
+
+    birth_weight, _ = sampler.sample(100_000, random_state=random_state)
+    propensity = np.interp(birth_weight, knots.birth_weight.values, knots.value.values)
+    # The CDF evaluated at the samples is uniform.
+    assert np.abs(np.sort(propensity) - np.linspace(0, 1, len(propensity))).max() < 0.01
@@ -0,0 +1,32 @@
+import os
+
+from vivarium_gates_bep.components import maternal_malnutrition
+
+SHIFTS = {(0.0, 0.01917808, 'Male'): [0.1, -0.2]}
+
+
+def test_load_cgf_shifts_reuses_cache_and_cleans_up_failed_writes(tmp_path, monkeypatch):
+    artifact_path = tmp_path / 'mali.hdf'
+    artifact_path.write_text('')
+    calls = []
+
+    def compute_cgf_shifts(*args):
+        calls.append(args)
+        return SHIFTS
+
+    monkeypatch.setattr(maternal_malnutrition, 'compute_cgf_shifts', compute_cgf_shifts)
+
+    def replace(*args):
+        raise OSError('cache directory is read only')
+
+    with monkeypatch.context() as m:
+        m.setattr(maternal_malnutrition.os, 'replace', replace)
+        assert maternal_malnutrition.load_cgf_shifts(artifact_path, 0, 'Mali', 'stunting', 0.1, 1.5) == SHIFTS
+    assert os.listdir(tmp_path / 'calibration_cache') == []
+
+    assert maternal_malnutrition.load_cgf_shifts(artifact_path, 0, 'Mali', 'stunting', 0.1, 1.5) == SHIFTS
+    assert maternal_malnutrition.load_cgf_shifts(artifact_path, 0, 'Mali', 'stunting', 0.1, 1.5) == SHIFTS
+    assert len(calls) == 2
+    assert maternal_malnutrition.load_cgf_shifts(artifact_path, 0, 'Niger', 'stunting', 0.1, 1.5) == SHIFTS
+    assert len(calls) == 3
+    assert [path.suffix for path in (tmp_path / 'calibration_cache').iterdir()] == ['.json', '.json']
@@ -0,0 +1,28 @@
+import pandas as pd
+
+from vivarium_gates_bep.components.mortality import StepMemo
+
+
+def test_step_memo_slices_subsets_within_a_step():
+    calls = []
+
+    def pipeline(index):
+        calls.append(index)
+        return pd.Series(index.values * 2., index=index)
+
+    memo = StepMemo()
+    index = pd.Index(range(10))
+    with memo.step():
+        full = memo.get('rate', pipeline, index)
+        subset = memo.get('rate', pipeline, index[[2, 5, 7]])
+        pd.testing.assert_series_equal(subset, full.loc[index[[2, 5, 7]]])
+        # An index outside the kept one is computed.
+        memo.get('rate', pipeline, pd.Index([11]))
+    assert len(calls) == 2
+    assert memo.info() == {'rate': {'hits': 1, 'misses': 2}}
+
+    # Nothing is kept between steps.
+    with memo.step():
+        memo.get('rate', pipeline, index)
+    memo.get('rate', pipeline, index)
+    assert len(calls) == 4
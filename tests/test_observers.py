@@ -0,0 +1,84 @@
+from itertools import product
+from types import SimpleNamespace
+
+import numpy as np
+import pandas as pd
+import pytest
+from vivarium_public_health.risks.data_transformations import get_exposure_post_processor
+
+from vivarium_gates_bep import globals as project_globals
+from vivarium_gates_bep.components.observers import ChildGrowthFailureObserver, get_cgf_category
+
+THRESHOLDS = [7, 8, 9]
+
+
+def make_post_processor(thresholds):
+    builder = SimpleNamespace(configuration={'risk': {'category_thresholds': list(thresholds)}})
+    post_processor = get_exposure_post_processor(builder, SimpleNamespace(name='risk'))
+    # The pinned pandas casts missing categories to 'nan'; newer releases leave them missing.
+    return lambda exposure, time: post_processor(exposure, time).fillna('nan')
+
+
+class FakeExposure:
+
+    def __init__(self, z, thresholds):
+        self.z = z
+        self.post_processor = make_post_processor(thresholds)
+
+    def __call__(self, index, skip_post_processor=False):
+        z = self.z.loc[index]
+        return z if skip_post_processor else self.post_processor(z, None)
+
+
+def old_cgf_stats(pop, exposures, timepoint):
+    # The per-stratum loop the observer used to run.
+    stats = {}
+    for mother_cat, treatment in product(project_globals.MOTHER_NUTRITION_CATEGORIES, project_globals.TREATMENTS):
+        pop_in_group = pop.loc[(pop[project_globals.MOTHER_NUTRITION_STATUS_COLUMN] == mother_cat)
+                               & (pop[project_globals.SCENARIO_COLUMN] == treatment)]
+        if pop_in_group.empty:
+            continue
+        suffix = f'mother_{mother_cat}_treatment_{treatment}'
+        for name, exposure in exposures.items():
+            z = exposure(pop_in_group.index, skip_post_processor=True)
+            stats[f'{name}_z_score_mean_at_{timepoint}_{suffix}'] = z.mean()
+            stats[f'{name}_z_score_sd_at_{timepoint}_{suffix}'] = z.std()
+            for cat, value in dict(exposure(pop_in_group.index).value_counts()).items():
+                stats[f'{name}_{cat}_exposed_at_{timepoint}_{suffix}'] = value
+    return stats
+
+
+def test_cgf_category_matches_exposure_post_processor():
+    z = pd.Series([6.5, 7., 7. + 1e-12, 8., 8.5, 9., 9. + 1e-12, 12., np.nan, np.inf])
+
+    expected = make_post_processor(THRESHOLDS)(z, None)
+
+    assert list(get_cgf_category(z.values, THRESHOLDS)) == list(expected)
+
+
+def test_cgf_stats_match_per_stratum_loop():
+    random = np.random.RandomState(17)
+    size = 200
+    pop = pd.DataFrame({
+        project_globals.MOTHER_NUTRITION_STATUS_COLUMN: random.choice(project_globals.MOTHER_NUTRITION_CATEGORIES,
+                                                                      size),
+        # One treatment is left out so some strata are empty.
+        project_globals.SCENARIO_COLUMN: random.choice(list(project_globals.TREATMENTS)[:-1], size),
+        'age': 0.08,
+    }, index=pd.RangeIndex(1000, 1000 + size))
+    wasting = pd.Series(random.normal(8.5, 1.2, size), index=pop.index)
+    wasting.iloc[:3] = THRESHOLDS
+    wasting.iloc[5:7] = np.nan
+    stunting = pd.Series(random.normal(8, 1.5, size), index=pop.index)
+
+    observer = ChildGrowthFailureObserver()
+    observer.exposures = {'wasting': FakeExposure(wasting, THRESHOLDS),
+                          'stunting': FakeExposure(stunting, THRESHOLDS)}
+    observer.category_thresholds = {'wasting': THRESHOLDS, 'stunting': THRESHOLDS}
+
+    stats = observer.get_cgf_stats(pop, 'one_month')
+    expected = old_cgf_stats(pop, observer.exposures, 'one_month')
+
+    assert stats.keys() == expected.keys()
+    for key, value in expected.items():
+        assert stats[key] == pytest.approx(value, nan_ok=True), key
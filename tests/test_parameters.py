@@ -0,0 +1,36 @@
+import numpy as np
+import pandas as pd
+
+from vivarium_gates_bep import globals as project_globals
+from vivarium_gates_bep.data import parameters
+
+ANC_COVERAGE = pd.DataFrame({'mean_value': [0.5, 0.4], 'lower_value': [0.45, 0.35], 'upper_value': [0.55, 0.45]},
+                            index=['India', 'Mali'])
+
+
+def test_sample_parameters_is_independent_of_draws_sampled():
+    data = parameters.sample_parameters(['India', 'Mali'], ANC_COVERAGE)
+    assert data.shape[0] == 2 * project_globals.NUM_DRAWS
+    assert data.notnull().values.all()
+
+    subset = parameters.sample_parameters(['Mali'], ANC_COVERAGE, draws=[3, 999])
+    pd.testing.assert_frame_equal(subset, data.loc[subset.index])
+
+
+def test_sample_parameters_match_distribution_means():
+    data = parameters.sample_parameters(['India', 'Mali'], ANC_COVERAGE)
+    for location in ['India', 'Mali']:
+        location_data = data.loc[location]
+        assert np.isclose(location_data[parameters.MATERNAL_MALNUTRITION_EXPOSURE].mean(),
+                          project_globals.MALNOURISHED_MOTHERS_PROPORTION_MEAN[location], rtol=0.02)
+        assert np.isclose(location_data[parameters.IFA_COVERAGE].mean(),
+                          project_globals.IFA_COVERAGE_MEAN[location], rtol=0.02)
+        assert np.isclose(location_data[parameters.ANC_COVERAGE].mean(),
+                          ANC_COVERAGE.loc[location, 'mean_value'], rtol=0.02)
+    assert np.isclose(data[parameters.MATERNAL_MALNUTRITION_RELATIVE_RISK].mean(),
+                      project_globals.MALNOURISHED_MOTHERS_EFFECT_RR_MEAN, rtol=0.05)
+    # Effect size assumptions with the same distribution share their draws.
+    assert np.all(data[parameters.get_bep_parameter(parameters.BEP_BIRTH_WEIGHT_SHIFT_NORMAL,
+                                                    project_globals.EFFECT_CURRENT_EVIDENCE)]
+                  == data[parameters.get_bep_parameter(parameters.BEP_BIRTH_WEIGHT_SHIFT_NORMAL,
+                                                       project_globals.EFFECT_HOPES_AND_DREAMS)])
@@ -0,0 +1,53 @@
+import numpy as np
+import scipy.optimize
+
+from vivarium_gates_bep.components.shift_solver import solve_shifts
+
+THRESHOLD = 8
+PAF = 0.1
+
+
+def solve_shifts_by_optimizer(sample, mask, threshold, paf):
+    """The original Nelder-Mead calibration, kept as a reference."""
+    proportion_exposed = np.mean(sample < threshold)
+    target_exposed = proportion_exposed * (1 - paf)
+
+    def shift_up_objective(guess):
+        return (np.mean(sample + guess < threshold) - target_exposed) ** 2
+
+    shift_up = scipy.optimize.minimize(shift_up_objective, 1, method='Nelder-Mead', tol=1e-6).x[0]
+
+    def shift_down_objective(guess):
+        exposure = sample + shift_up
+        exposure[mask] -= guess
+        return (np.mean(exposure < threshold) - proportion_exposed) ** 2
+
+    shift_down = scipy.optimize.minimize(shift_down_objective, 1, method='Nelder-Mead', tol=1e-6).x[0]
+    return shift_up, shift_down, shift_up_objective
+
+
+def test_solve_shifts_matches_optimizer():
+    random_state = np.random.RandomState(5)
+    size = 100_000
+    samples = np.array([random_state.normal(mean, sd, size) for mean, sd in [(9, 1.2), (8.5, 1), (10, 1.5)]])
+    masks = random_state.random_sample(samples.shape) < 0.2
+
+    shift_up, shift_down = solve_shifts(samples, masks, THRESHOLD, PAF)
+
+    for i, (sample, mask) in enumerate(zip(samples, masks)):
+        expected_up, expected_down, shift_up_objective = solve_shifts_by_optimizer(sample, mask, THRESHOLD, PAF)
+        assert np.isclose(shift_up[i], expected_up, rtol=0, atol=5e-3)
+        assert np.isclose(shift_down[i], expected_down, rtol=0, atol=5e-3)
+        # The exact shift is at least as good as the optimizer's.
+        assert shift_up_objective(shift_up[i]) <= shift_up_objective(expected_up)
+
+        exposure = sample + shift_up[i]
+        exposure[mask] -= shift_down[i]
+        assert abs(np.mean(exposure < THRESHOLD) - np.mean(sample < THRESHOLD)) <= 0.5 / size
+
+
+def test_solve_shifts_handles_empty_mask():
+    sample = np.random.RandomState(6).normal(9, 1, 1000)
+    shift_up, shift_down = solve_shifts(sample, np.zeros_like(sample, dtype=bool), THRESHOLD, PAF)
+    assert np.mean(sample + shift_up[0] < THRESHOLD) == np.round(np.mean(sample < THRESHOLD) * (1 - PAF) * 1000) / 1000
+    assert shift_down[0] == 0
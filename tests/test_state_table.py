@@ -0,0 +1,52 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from vivarium_gates_bep import globals as project_globals
+from vivarium_gates_bep.components.state_table import StateTableSchema, get_memory_report
+
+
+def test_schema_casts_columns_to_shared_categories():
+    schema = StateTableSchema()
+    pop = pd.DataFrame({
+        'alive': ['alive', 'dead', 'alive'],
+        project_globals.SCENARIO_COLUMN: ['none', 'bep', 'ifa'],
+        'age': [0., 0.1, 0.2],
+    })
+
+    update = schema.apply(pop)
+
+    assert update.alive.dtype == schema.dtypes['alive']
+    assert list(update.alive.cat.categories) == ['alive', 'dead', 'untracked']
+    assert update.age.dtype == np.float64
+    assert (update.alive == pop.alive).all()
+    assert (update[project_globals.SCENARIO_COLUMN] == pop[project_globals.SCENARIO_COLUMN]).all()
+    # Applying it again leaves the update untouched.
+    assert schema.apply(update).alive.values is update.alive.values
+
+
+def test_schema_rejects_values_outside_categories():
+    with pytest.raises(ValueError, match='zombie'):
+        StateTableSchema().apply(pd.Series(['alive', 'zombie'], name='alive'))
+
+
+def test_schema_narrows_floats_when_configured():
+    pop = pd.DataFrame({project_globals.BIRTH_WEIGHT: [2500., 3100.]})
+    assert StateTableSchema().apply(pop)[project_globals.BIRTH_WEIGHT].dtype == np.float64
+    assert StateTableSchema(float32=True).apply(pop)[project_globals.BIRTH_WEIGHT].dtype == np.float32
+
+
+def test_memory_report_shrinks_with_schema():
+    size = 10_000
+    pop = pd.DataFrame({
+        'sex': np.where(np.arange(size) % 2, 'Male', 'Female'),
+        'cause_of_death': 'not_dead',
+        project_globals.BIRTH_WEIGHT: np.linspace(500, 4500, size),
+    })
+
+    before = get_memory_report(pop)
+    after = get_memory_report(StateTableSchema(float32=True).apply(pop))
+
+    assert after.loc['sex', 'dtype'] == 'category'
+    assert after.loc['sex', 'bytes_per_simulant'] < 2
+    assert after.loc['total', 'bytes'] < before.loc['total', 'bytes'] / 4
@@ -0,0 +1,31 @@
+import gc
+
+from vivarium_gates_bep import utilites
+
+
+class Builder:
+    pass
+
+
+def test_get_shared_makes_one_object_per_builder_and_factory():
+    calls = []
+
+    def make_list(builder):
+        calls.append(id(builder))
+        return []
+
+    def make_dict(builder):
+        return {}
+
+    registered = len(utilites._shared_by_builder)
+    builder, other_builder = Builder(), Builder()
+
+    shared = utilites.get_shared(builder, make_list)
+    assert utilites.get_shared(builder, make_list) is shared
+    assert utilites.get_shared(other_builder, make_list) is not shared
+    assert utilites.get_shared(builder, make_dict) == {}
+    assert calls == [id(builder), id(other_builder)]
+
+    del builder, other_builder
+    gc.collect()
+    assert len(utilites._shared_by_builder) == registered